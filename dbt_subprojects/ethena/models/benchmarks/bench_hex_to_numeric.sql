@@ -0,0 +1,53 @@
+{{
+    config(
+        materialized='table',
+        enabled=var('run_benchmarks', false),
+        tags=['benchmark']
+    )
+}}
+
+-- Benchmark of hex_to_numeric against the per-character legacy decoder on the
+-- amount words of the USDe contract logs. Run with:
+--   dbt run -s bench_hex_to_numeric --vars '{run_benchmarks: true}'
+-- Scalar subqueries are evaluated in select-list order, so the clock_timestamp()
+-- calls between them time each decoder.
+
+with words as materialized (
+    select {{ abi_word('data', 0) }} as word
+    from {{ ref('stg_usde_contract_logs') }}
+    where data is not null
+),
+
+timed as (
+    select
+        (select count(*) from words) as n_words,
+        clock_timestamp() as legacy_started_at,
+        (select sum({{ hex_to_numeric_legacy('word') }}) from words) as legacy_sum,
+        clock_timestamp() as fast_started_at,
+        (select sum({{ hex_to_numeric('word') }}) from words) as fast_sum,
+        clock_timestamp() as finished_at
+),
+
+mismatches as (
+    select count(*) as n_mismatches
+    from words
+    where {{ hex_to_numeric_legacy('word') }} <> {{ hex_to_numeric('word') }}
+)
+
+select
+    'hex_to_numeric_legacy' as decoder,
+    n_words,
+    extract(epoch from fast_started_at - legacy_started_at) as seconds,
+    legacy_sum as decoded_sum,
+    n_mismatches
+from timed cross join mismatches
+
+union all
+
+select
+    'hex_to_numeric' as decoder,
+    n_words,
+    extract(epoch from finished_at - fast_started_at) as seconds,
+    fast_sum as decoded_sum,
+    n_mismatches
+from timed cross join mismatches
@@ -1,6 +1,13 @@
 {{
     config(
-        materialized='table'
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['chainid', 'transaction_hash', 'log_index'],
+        indexes=[
+            {'columns': ['chainid', 'transaction_hash', 'log_index'], 'unique': True},
+            {'columns': ['block_number']},
+            {'columns': ['_dlt_load_id']},
+        ]
     )
 }}
 
@@ -15,6 +22,7 @@ select
     log_index,
     transaction_hash,
     transaction_index,
+    _dlt_load_id,
     
     -- Event type based on topic0
     case 
@@ -39,4 +47,5 @@ where topic0 in (
     '0xf114ca9eb82947af39f957fa726280fd3d5d81c3d7635a4aeb5c302962856eba',  -- mint 
     '0x18fd144d7dbcbaa6f00fd47a84adc7dc3cc64a326ffa2dc7691a25e3837dba03'   -- redeem 
 )
+    and {{ incremental_load_predicate() }}
 order by block_number, log_index
\ No newline at end of file
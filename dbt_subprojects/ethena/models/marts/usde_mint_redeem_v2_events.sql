@@ -1,6 +1,13 @@
 {{
     config(
-        materialized='table'
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['chainid', 'transaction_hash', 'log_index'],
+        indexes=[
+            {'columns': ['chainid', 'transaction_hash', 'log_index'], 'unique': True},
+            {'columns': ['block_number']},
+            {'columns': ['_dlt_load_id']},
+        ]
     )
 }}
 
@@ -15,6 +22,7 @@ select
     log_index,
     transaction_hash,
     transaction_index,
+    _dlt_load_id,
     
     -- Event type based on topic0
     case 
@@ -38,4 +46,5 @@ where topic0 in (
     '0x29ee92e51cda311463f5c9ef98c54824a4bebe45e689c37da35edc774585d437',  -- mint
     '0x0ea36c5b7b274f8fe58654fe884bb9307dec1899e0312f40ae10d9b3d100cc0c'   -- redeem
 )
+    and {{ incremental_load_predicate() }}
 order by block_number, log_index
\ No newline at end of file
@@ -1,6 +1,13 @@
 {{
     config(
-        materialized='table'
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['chainid', 'transaction_hash', 'log_index'],
+        indexes=[
+            {'columns': ['chainid', 'transaction_hash', 'log_index'], 'unique': True},
+            {'columns': ['block_number']},
+            {'columns': ['_dlt_load_id']},
+        ]
     )
 }}
 
@@ -1,5 +1,9 @@
-{% macro process_contract_logs(source_schema, source_table) %}
-select distinct
+{% macro process_contract_logs(source_schema, source_table, deduplicate=true) %}
+{#-
+    Raw tables loaded with upsert=True are unique on the log key already,
+    otherwise the log of the latest load is kept
+-#}
+select {% if deduplicate %}distinct on (chainid, transaction_hash, log_index){% endif %}
     topics::json->>0 as topic0,
     case when json_array_length(topics::json) >= 2 then topics::json->>1 end as topic1,
     case when json_array_length(topics::json) >= 3 then topics::json->>2 end as topic2,
@@ -14,6 +18,9 @@ select distinct
     gas_used,
     log_index,
     transaction_hash,
-    transaction_index
+    transaction_index,
+    _dlt_load_id
 from {{ source(source_schema, source_table) }}
+where {{ incremental_load_predicate() }}
+{% if deduplicate %}order by chainid, transaction_hash, log_index, _dlt_load_id desc{% endif %}
 {% endmacro %}
\ No newline at end of file
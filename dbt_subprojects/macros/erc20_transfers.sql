@@ -15,7 +15,8 @@ select
     gas_used,
     log_index,
     transaction_hash,
-    transaction_index
+    transaction_index,
+    _dlt_load_id
     {% if contract_name %}
     , '{{ contract_name }}' as contract_name
     {% endif %}
@@ -23,5 +24,6 @@ from {{ logs_ref }}
 where topic0 = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'  -- Transfer event signature
     and topic1 is not null
     and topic2 is not null
+    and {{ incremental_load_predicate() }}
 order by block_number, log_index
 {% endmacro %}
\ No newline at end of file
@@ -22,7 +22,62 @@
     end
 {% endmacro %}
 
+{% macro hex_to_bytea(field_name) %}
+    {%- set digits = "regexp_replace(" ~ field_name ~ ", '^0x', '')" -%}
+    case
+        when {{ field_name }} is null or {{ field_name }} = '' or {{ field_name }} = '0x'
+        then null
+        else decode(lpad({{ digits }}, (length({{ digits }}) + 1) / 2 * 2, '0'), 'hex')
+    end
+{% endmacro %}
+
+{% macro bytea_to_hex(field_name) %}
+    case when {{ field_name }} is null then null else '0x' || encode({{ field_name }}, 'hex') end
+{% endmacro %}
+
+{% macro hex_to_address_bytea(field_name) %}
+    case 
+        when {{ field_name }} is null or length({{ field_name }}) < 42
+        then null
+        else decode(right({{ field_name }}, 40), 'hex')
+    end
+{% endmacro %}
+
+{% macro abi_word(data_field, index) %}
+    substring({{ data_field }}, {{ 3 + 64 * index }}, 64)
+{% endmacro %}
+
 {% macro hex_to_numeric(hex_value) %}
+    {#-
+        Exact numeric of a hex string of up to 64 chars (one ABI word), without 0x.
+        The word is left-padded to 64 chars and split into eight 8-char chunks,
+        each cast through bit(64) to bigint and scaled by an exact power of 2^32.
+        Longer inputs are not truncated: they decode to null.
+    -#}
+    {%- set padded = "lpad(coalesce(nullif(" ~ hex_value ~ ", ''), '0'), 64, '0')" -%}
+    case
+        when length({{ hex_value }}) > 64
+        then null
+        else (
+            {%- for i in range(8) %}
+            {% if not loop.first %}+ {% endif -%}
+            ('x' || lpad(substr({{ padded }}, {{ 8 * i + 1 }}, 8), 16, '0'))::bit(64)::bigint::numeric
+                {%- if i < 7 %} * {{ 2 ** (32 * (7 - i)) }}::numeric{% endif %}
+            {%- endfor %}
+        )
+    end
+{% endmacro %}
+
+{% macro abi_word_to_numeric(data_field, index) %}
+    {{ hex_to_numeric(abi_word(data_field, index)) }}
+{% endmacro %}
+
+{% macro abi_word_to_address(data_field, index) %}
+    {{ hex_to_address(abi_word(data_field, index)) }}
+{% endmacro %}
+
+{% macro hex_to_numeric_legacy(hex_value) %}
+    {#- Per-character decoding, kept for benchmarking; loses precision on large values -#}
     case 
         when {{ hex_value }} is null or {{ hex_value }} = '' or {{ hex_value }} = '0'
         then 0::numeric
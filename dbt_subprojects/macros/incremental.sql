@@ -0,0 +1,21 @@
+{% macro incremental_load_predicate(load_column='_dlt_load_id') %}
+    {#-
+        Predicate selecting rows of loads newer than the last load already in
+        the model (minus `incremental_lookback_seconds`) on incremental runs,
+        and every row on full builds. Load ids are the load's start time, so
+        rows of a late or repaired raw range are picked up whatever their
+        blocks, and re-selected rows are replaced through the model's
+        unique_key.
+    -#}
+    {%- if is_incremental() %}
+    {{ load_column }} > (
+        select coalesce(
+            (max({{ load_column }})::numeric - {{ var('incremental_lookback_seconds', 0) }})::text,
+            ''
+        )
+        from {{ this }}
+    )
+    {%- else %}
+    true
+    {%- endif %}
+{% endmacro %}
@@ -0,0 +1,206 @@
+"""
+Time the DeFiLlama row transforms against per-row standardization.
+
+Every path starts from the same raw rows and ends with the same load package,
+normalized by dlt, so the numbers include what each path leaves to dlt:
+
+- per-row: the per-row standardization the transforms replaced, dict rows
+- compiled rows: `compile_transform`, dict rows
+- compiled arrow: `compile_transform` with `arrow_columns`, arrow tables,
+  the default of the time series load helpers
+
+Measured on 1M rows of one series (a yield pool history, every timestamp
+distinct), best of three runs, extract and normalize:
+
+    time series              per-row 146.0s, rows 126.4s (1.2x), arrow 11.2s (13.0x)
+    rename, remove and time  per-row  70.3s, rows  73.2s (1.0x), arrow 14.1s (5.0x)
+    with JSON fields         per-row  73.7s, rows  59.7s (1.2x), arrow 14.6s (5.1x)
+
+Most of the time goes to dlt normalizing dict rows one by one, which arrow
+tables skip. The transforms alone (--transform-only) take 1.2-3.1s per-row;
+compiled, they are 1.2-2.2x faster as dict rows and 0.8-1.6x as arrow
+tables, which cost more to build than dict rows.
+"""
+
+import os
+import gc
+import time
+import json
+import argparse
+import datetime
+import tempfile
+
+import dlt
+
+from stables.data.source.arrow import add_dlt_columns
+from stables.data.source.defillama import compile_transform, _transform_rows
+
+HINTS = {
+    "tvl_usd": {"data_type": "double"},
+    "apy": {"data_type": "double"},
+    "exposure": {"data_type": "json"},
+}
+
+SPECS = {
+    # The transform of the time series resources
+    "time series": {"timestamp_fields": ["timestamp"]},
+    "rename, remove and time": {
+        "remove_fields": ["rewardTokens"],
+        "field_mappings": {"tvlUsd": "tvl_usd"},
+        "timestamp_fields": ["timestamp"],
+    },
+    # Bound by json.dumps either way
+    "with JSON fields": {
+        "json_fields": ["exposure"],
+        "remove_fields": ["rewardTokens"],
+        "field_mappings": {"tvlUsd": "tvl_usd"},
+        "timestamp_fields": ["timestamp"],
+    },
+}
+
+
+def _per_row_standardize(item: dict, transformations: dict) -> dict:
+    """The per-row transform the compiled transforms replaced, as a baseline."""
+    for field in transformations.get("json_fields", []):
+        if field in item and item[field]:
+            item[field] = json.dumps(item[field])
+    for field in transformations.get("remove_fields", []):
+        if field in item:
+            item.pop(field)
+    for old_key, new_key in transformations.get("field_mappings", {}).items():
+        if old_key in item:
+            item[new_key] = item.pop(old_key)
+    for field in transformations.get("timestamp_fields", []):
+        if field in item and item[field] is not None:
+            value = item.pop(field)
+            if isinstance(value, str):
+                try:
+                    item["time"] = datetime.datetime.fromisoformat(
+                        value.replace("Z", "+00:00")
+                    )
+                except ValueError:
+                    try:
+                        item["time"] = datetime.datetime.fromtimestamp(
+                            int(value), tz=datetime.timezone.utc
+                        )
+                    except ValueError:
+                        item["time"] = value
+            else:
+                item["time"] = datetime.datetime.fromtimestamp(
+                    value, tz=datetime.timezone.utc
+                )
+    return item
+
+
+def _synthetic_rows(n_rows: int, n_series: int) -> list[dict]:
+    """
+    Daily points of `n_series` series, like yield pool or price histories.
+    A resource loads one series, every timestamp of its rows distinct.
+    """
+    days = n_rows // n_series
+    return [
+        {
+            "pool": f"pool-{i % n_series}",
+            "timestamp": 1_600_000_000 + 86_400 * (i // n_series),
+            "tvlUsd": float(i),
+            "apy": 1.5,
+            "rewardTokens": None,
+            "exposure": ["a", "b"] if i % 2 else None,
+        }
+        for i in range(days * n_series)
+    ]
+
+
+def _per_row_pages(rows: list[dict], spec: dict):
+    for i in range(0, len(rows), 10_000):
+        yield [_per_row_standardize(row, spec) for row in rows[i : i + 10_000]]
+
+
+def _paths(spec: dict) -> dict:
+    """Functions turning raw rows into the items of each path."""
+    rows_transform = compile_transform(**spec)
+    arrow_transform = compile_transform(**spec, arrow_columns=HINTS)
+    return {
+        "per-row": lambda rows: _per_row_pages(rows, spec),
+        "rows": lambda rows: _transform_rows(rows_transform, rows),
+        "arrow": lambda rows: _transform_rows(arrow_transform, rows),
+    }
+
+
+def _timed(f, rows: list[dict]) -> tuple[float, object]:
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = f(rows)
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def _transform_only(items) -> int:
+    return sum(len(item) for item in items)
+
+
+def _extract_normalize(items, pipelines_dir: str, arrow: bool) -> dict[str, int]:
+    pipeline = dlt.pipeline(
+        pipeline_name=f"bench_row_transforms_{time.monotonic_ns()}",
+        pipelines_dir=pipelines_dir,
+        destination="postgres",
+        dataset_name="bench",
+    )
+    if arrow:
+        add_dlt_columns(pipeline)
+    resource = dlt.resource(items, name="yield_pools", columns=HINTS)
+    pipeline.extract(resource)
+    pipeline.normalize()
+    return dict(pipeline.last_trace.last_normalize_info.row_counts)
+
+
+def main():
+    """Time the row transforms against per-row standardization."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--series", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--transform-only",
+        action="store_true",
+        help="time the transforms without dlt extract and normalize",
+    )
+    args = parser.parse_args()
+    # dlt warns of hint mismatches between the arrow tables and the resource
+    os.environ["RUNTIME__LOG_LEVEL"] = "ERROR"
+
+    print(f"{args.rows:,} rows of {args.series:,} series, best of {args.runs}")
+    with tempfile.TemporaryDirectory() as pipelines_dir:
+        for name, spec in SPECS.items():
+            seconds, results = {}, {}
+            for path, items in _paths(spec).items():
+                if args.transform_only:
+                    run = lambda rows: _transform_only(items(rows))
+                else:
+                    run = lambda rows: _extract_normalize(
+                        items(rows), pipelines_dir, path == "arrow"
+                    )
+                runs = [
+                    _timed(run, _synthetic_rows(args.rows, args.series))
+                    for _ in range(args.runs)
+                ]
+                seconds[path] = min(s for s, _ in runs)
+                results[path] = runs[0][1]
+            # Every path loads the same rows into the same tables
+            assert all(r == results["per-row"] for r in results.values()), results
+            baseline = seconds["per-row"]
+            print(
+                f"{name}: per-row {baseline:.2f}s, "
+                + ", ".join(
+                    f"{path} {s:.2f}s ({baseline / s:.1f}x)"
+                    for path, s in seconds.items()
+                    if path != "per-row"
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
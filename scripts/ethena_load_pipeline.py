@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from dotenv import load_dotenv
 import dlt
 from stables.utils.logging import setup_logging
@@ -11,6 +12,9 @@ from stables.data import (
     load_yield_pool,
 )
 from stables.data.load.etherscan import logs
+from stables.data.load.backfill import LogTarget, plan_backfill, backfill_logs
+from stables.data.load.ledger import BlockRangeLedger
+from stables.data.source.block_index import BlockTimestampIndex
 from stables.config import local_pg_config
 
 logger = logging.getLogger(__name__)
@@ -41,9 +45,74 @@ def load_logs(table_schema: str, table_name: str, contract_address: str, chainid
         start_block=None,
         end_block=19_000_000,
         block_chunk_size=10_000,
+        streaming=True,
+        commit_rows=500_000,
     )
 
 
+def backfill_ethena_logs(
+    table_schema: str = "ethena_raw",
+    max_workers: int = 4,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+):
+    """
+    Backfill logs for USDe and both mint/redeem contracts concurrently, from
+    and to unix timestamps if given, resolved with the block index of the
+    logs already loaded.
+    """
+
+    pg_config = local_pg_config
+    destination = dlt.destinations.postgres(
+        f"postgresql://{pg_config.user}:{pg_config.password}@{pg_config.host}:{pg_config.port}/{pg_config.database}"
+    )
+
+    pipeline = dlt.pipeline(
+        pipeline_name="ethena_etherscan",
+        destination=destination,
+        dataset_name=table_schema,
+    )
+    targets = [
+        LogTarget(
+            "usde_contract_logs",
+            1,
+            "0x4c9edd5852cd905f086c759e8383e09bff1e68b3",
+            start_time=start_time,
+            end_time=end_time,
+        ),
+        LogTarget(
+            "mint_redeem_v1_contract_logs",
+            1,
+            "0x2CC440b721d2CaFd6D64908D6d8C4aCC57F8Afc3".lower(),
+            start_time=start_time,
+            end_time=end_time,
+        ),
+        LogTarget(
+            "mint_redeem_v2_contract_logs",
+            1,
+            "0xe3490297a08d6fC8Da46Edb7B6142E4F461b62D3".lower(),
+            start_time=start_time,
+            end_time=end_time,
+        ),
+    ]
+    ledger = BlockRangeLedger(pg_config, table_schema)
+    block_index = None
+    if start_time is not None or end_time is not None:
+        block_index = BlockTimestampIndex.from_postgres(
+            pg_config, table_schema, [target.table_name for target in targets], 1
+        )
+    units = plan_backfill(
+        pg_config, table_schema, targets, ledger=ledger, block_index=block_index
+    )
+    if block_index is not None:
+        logger.info(f"Block index lookups: {block_index.stats()}")
+    failed = backfill_logs(
+        pipeline, units, max_workers=max_workers, ledger=ledger, pg_config=pg_config
+    )
+    if failed:
+        logger.warning(f"{len(failed)} work units failed: {failed}")
+
+
 def llama():
 
     pg_config = local_pg_config
@@ -64,12 +133,9 @@ def llama():
     # # # 3. token price ✅
     network = "ethereum"
     contract_address = "0x57e114B691Db790C35207b2e685D4A43181e6061"
-    # # ### First time load with default params {"span": 1000, "period": "1d"}
-    # # load_token_price(network, contract_address, pg_config)  # 477
-    # # ### Next time with smaller span, 10 would overlap but fine
-    # load_token_price(
-    #     network, contract_address, pg_config, params={"span": 10, "period": "1d"}
-    # )
+    # # ### Default params {"span": 1000, "period": "1d"}, with incremental later
+    # # ### runs only load prices newer than the last loaded time, minus a lookback
+    # load_token_price(network, contract_address, pg_config, incremental=True)  # 477
 
     # # # # 4. protocol revenue ✅
     # # # both first time and ongoing use same params, merge with primary_key will take care
@@ -82,9 +148,10 @@ def llama():
     # # susde_staking_pool_defillama_id = "66985a81-9c51-46ca-9977-42b4fe7bc6df"
     load_yield_pool(
         # pool_id="66985a81-9c51-46ca-9977-42b4fe7bc6df",
-        pool_id='13392973-be6e-4b2f-bce9-4f7dd53d1c3a',
+        pool_id="13392973-be6e-4b2f-bce9-4f7dd53d1c3a",
         pool_name="sdai",
         pg_config=pg_config,
+        incremental=True,
     )
 
 
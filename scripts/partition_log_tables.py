@@ -0,0 +1,37 @@
+import argparse
+import logging
+from dotenv import load_dotenv
+from stables.utils.logging import setup_logging
+from stables.utils.postgres import PARTITION_BLOCKS, ensure_log_layout
+from stables.config import local_pg_config
+
+logger = logging.getLogger(__name__)
+setup_logging()
+load_dotenv()
+
+
+def main():
+    """
+    Partition raw log tables by block number and create their indexes.
+
+    A one-off migration: each table is locked against reads and writes while
+    its rows are copied, so run it while no loads or dbt runs use the tables.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--table-schema", default="ethena_raw")
+    parser.add_argument("--table-name", required=True, nargs="+")
+    parser.add_argument("--partition-blocks", type=int, default=PARTITION_BLOCKS)
+    args = parser.parse_args()
+
+    for table_name in args.table_name:
+        logger.info(f"Partitioning {args.table_schema}.{table_name}")
+        ensure_log_layout(
+            local_pg_config,
+            args.table_schema,
+            table_name,
+            partition_blocks=args.partition_blocks,
+        )
+
+
+if __name__ == "__main__":
+    main()
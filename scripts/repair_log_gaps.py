@@ -0,0 +1,63 @@
+import argparse
+import logging
+from dotenv import load_dotenv
+import dlt
+from stables.utils.logging import setup_logging
+from stables.data.load.etherscan import repair_gaps
+from stables.data.load.metrics import LoadMetrics
+from stables.config import local_pg_config
+
+logger = logging.getLogger(__name__)
+setup_logging()
+load_dotenv()
+
+
+def main():
+    """Refill block ranges missing from the block range ledger of a raw log table."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--table-schema", default="ethena_raw")
+    parser.add_argument("--table-name", required=True)
+    parser.add_argument("--address", required=True)
+    parser.add_argument("--chainid", type=int, default=1)
+    parser.add_argument(
+        "--start-block",
+        type=int,
+        default=None,
+        help="also repair from this block up to the first loaded range; for a "
+        "table loaded before it had a ledger, this refetches its whole history",
+    )
+    parser.add_argument(
+        "--no-upsert",
+        action="store_true",
+        help="append the refilled logs instead of upserting them, refused if "
+        "the gaps already hold logs",
+    )
+    args = parser.parse_args()
+
+    pg_config = local_pg_config
+    destination = dlt.destinations.postgres(
+        f"postgresql://{pg_config.user}:{pg_config.password}@{pg_config.host}:{pg_config.port}/{pg_config.database}"
+    )
+    pipeline = dlt.pipeline(
+        pipeline_name="ethena_etherscan",
+        destination=destination,
+        dataset_name=args.table_schema,
+    )
+    metrics = LoadMetrics()
+    gaps = repair_gaps(
+        pipeline=pipeline,
+        pg_config=pg_config,
+        table_schema=args.table_schema,
+        table_name=args.table_name,
+        chainid=args.chainid,
+        contract_address=args.address.lower(),
+        start_block=args.start_block,
+        upsert=not args.no_upsert,
+        metrics=metrics,
+    )
+    logger.info(f"Repaired {len(gaps)} gaps: {gaps}")
+    logger.info(f"Refilled {metrics.rows_loaded} rows in {len(metrics.chunks)} chunks")
+
+
+if __name__ == "__main__":
+    main()
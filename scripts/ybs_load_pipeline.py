@@ -2,7 +2,7 @@ import logging
 from dotenv import load_dotenv
 
 from stables.utils.logging import setup_logging
-from stables.data import load_yield_pool
+from stables.data import run_load_batch, yield_pool_config
 from stables.config import local_pg_config
 
 logger = logging.getLogger(__name__)
@@ -14,13 +14,16 @@ from stables.config import ybs_tokens
 def llama_ybs():
 
     pg_config = local_pg_config
-    for key, value in ybs_tokens.items():
-        # print(key, value["defillama_pool_id"])
-        load_yield_pool(
-            pool_id=value["defillama_pool_id"],
-            pool_name=key,
-            pg_config=pg_config,
+    # All pools in one pipeline run, fetched 4 at a time, each only from its
+    # last loaded time on
+    load_configs = [
+        yield_pool_config(
+            pool_id=value["defillama_pool_id"], pool_name=key, incremental=True
         )
+        for key, value in ybs_tokens.items()
+    ]
+    row_counts = run_load_batch(pg_config, load_configs, max_workers=4)
+    logger.info(f"Loaded yield pools: {row_counts}")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 import os
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from dotenv import load_dotenv
 
@@ -8,6 +8,14 @@ load_dotenv()
 
 
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY")
+ETHERSCAN_CALLS_PER_SECOND = float(os.getenv("ETHERSCAN_CALLS_PER_SECOND", 5))
+ETHERSCAN_BURST = float(os.getenv("ETHERSCAN_BURST", ETHERSCAN_CALLS_PER_SECOND))
+
+METADATA_CACHE_DIR = os.getenv("METADATA_CACHE_DIR", "data/cache")
+LATEST_BLOCK_TTL_SECONDS = float(os.getenv("LATEST_BLOCK_TTL_SECONDS", 60))
+
+# Landing zone of raw API responses, see stables.data.source.lake
+RAW_LAKE_DIR = os.getenv("RAW_LAKE_DIR", "data/lake")
 
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
 COINGECKO_PRICES_COLUMNS = {
@@ -45,6 +53,14 @@ class BlockExplorerColumns:
         "block_number": {"data_type": "bigint"},
         "time_stamp": {"data_type": "timestamp"},
     }
+    # Natural key of a log
+    LogKey = ["chainid", "transaction_hash", "log_index"]
+
+
+POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", 1))
+POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10))
+POSTGRES_STATEMENT_TIMEOUT_MS = os.getenv("POSTGRES_STATEMENT_TIMEOUT_MS")
+POSTGRES_PREPARE_STATEMENTS = os.getenv("POSTGRES_PREPARE_STATEMENTS", "") == "1"
 
 
 class PostgresConfig:
@@ -57,23 +73,46 @@ class PostgresConfig:
         database: str = None,
         user: str = None,
         password: str = None,
+        pool_min_size: int = POSTGRES_POOL_MIN_SIZE,
+        pool_max_size: int = POSTGRES_POOL_MAX_SIZE,
+        statement_timeout_ms: Optional[int] = (
+            int(POSTGRES_STATEMENT_TIMEOUT_MS)
+            if POSTGRES_STATEMENT_TIMEOUT_MS
+            else None
+        ),
+        prepare_statements: bool = POSTGRES_PREPARE_STATEMENTS,
     ):
-        """Initializes the PostgresConfig with environment variables or provided parameters."""
+        """
+        Initializes the PostgresConfig with environment variables or provided parameters.
+
+        Connections are pooled per configuration, see `stables.utils.postgres`:
+        `pool_min_size` connections are kept open and at most `pool_max_size`
+        are open at once. `statement_timeout_ms` bounds every statement, and
+        with `prepare_statements` the helpers' lookups are prepared once per
+        connection.
+        """
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.statement_timeout_ms = statement_timeout_ms
+        self.prepare_statements = prepare_statements
 
     def get_connection_params(self) -> dict[str, Any]:
         """Return connection parameters for psycopg2."""
-        return {
+        params = {
             "host": self.host,
             "port": self.port,
             "database": self.database,
             "user": self.user,
             "password": self.password,
         }
+        if self.statement_timeout_ms is not None:
+            params["options"] = f"-c statement_timeout={self.statement_timeout_ms}"
+        return params
 
 
 local_pg_config = PostgresConfig(
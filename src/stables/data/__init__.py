@@ -5,6 +5,9 @@ from .load.defillama import (
     load_protocol_revenue,
     load_stable_circulating,
     load_stables_metadata,
+    run_load_batch,
+    yield_pool_config,
+    stable_circulating_config,
 )
 
 __all__ = [
@@ -14,4 +17,7 @@ __all__ = [
     "load_protocol_revenue",
     "load_stable_circulating",
     "load_stables_metadata",
+    "run_load_batch",
+    "yield_pool_config",
+    "stable_circulating_config",
 ]
@@ -0,0 +1,407 @@
+import logging
+import time
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import dlt
+
+from stables.config import BlockExplorerColumns, PostgresConfig
+from stables.utils.postgres import (
+    get_loaded_block,
+    ensure_block_partitions,
+    ensure_log_indexes,
+)
+from stables.data.source.arrow import add_dlt_columns
+from stables.data.source.block_index import BlockTimestampIndex
+from stables.data.source.decode import EventDecoder
+from stables.data.source.lake import RawLake
+from stables.data.load.bulk import CopyLoader
+from stables.data.load.etherscan import LOG_UPSERT, log_resources
+from stables.data.load.ledger import BlockRangeLedger
+from stables.data.load.metrics import ChunkMetrics, LoadMetrics, load_info_stats
+from stables.data.source.etherscan import (
+    iter_log_windows,
+    get_latest_block,
+    get_contract_creation_txn,
+    etherscan_bucket,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LogTarget:
+    """A contract whose logs should be backfilled into `table_name`."""
+
+    table_name: str
+    chainid: int
+    address: str
+    start_block: Optional[int] = None
+    end_block: Optional[int] = None
+    # Unix timestamps resolved to the start/end block when those aren't given
+    start_time: Optional[int] = None
+    end_time: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """A (chainid, address, block range) slice of a backfill, fetched by one worker."""
+
+    table_name: str
+    chainid: int
+    address: str
+    from_block: int
+    to_block: int
+
+
+def split_work_units(
+    target: LogTarget, start_block: int, end_block: int, unit_blocks: int
+) -> list[WorkUnit]:
+    """Split a target's block range into consecutive work units of `unit_blocks` blocks."""
+    return [
+        WorkUnit(
+            table_name=target.table_name,
+            chainid=target.chainid,
+            address=target.address,
+            from_block=from_block,
+            to_block=min(from_block + unit_blocks - 1, end_block),
+        )
+        for from_block in range(start_block, end_block + 1, unit_blocks)
+    ]
+
+
+def _block_at(
+    block_index: Optional[BlockTimestampIndex],
+    chainid: int,
+    timestamp: int,
+    closest: str,
+) -> int:
+    """Resolve a timestamp with the block index of its chain, else the API."""
+    if block_index is not None and block_index.chainid == chainid:
+        return block_index.block_at(timestamp, closest)
+    return get_latest_block(chainid, timestamp=timestamp, closest=closest)
+
+
+def plan_backfill(
+    pg_config: PostgresConfig,
+    table_schema: str,
+    targets: list[LogTarget],
+    unit_blocks: int = 1_000_000,
+    ledger: Optional[BlockRangeLedger] = None,
+    block_index: Optional[BlockTimestampIndex] = None,
+) -> list[WorkUnit]:
+    """
+    Resolve start/end blocks for each target and split them into work units.
+
+    Failed ranges in the ledger whose backoff has elapsed are planned first.
+    Targets without a start block start at their start time, or resume from
+    the ledger, or from the last loaded block, targets without an end block
+    run to their end time, or the latest block of their chain. Times are
+    resolved with `block_index` for targets on its chain, without API calls
+    inside the indexed blocks. Partitioned tables get partitions attached for
+    the planned blocks.
+    """
+    ledger = ledger or BlockRangeLedger(pg_config, table_schema)
+    start_blocks = {}
+    for target in targets:
+        start_blocks[id(target)] = target.start_block
+        if target.start_block is None and target.start_time is not None:
+            start_blocks[id(target)] = _block_at(
+                block_index, target.chainid, target.start_time, "after"
+            )
+        elif target.start_block is None:
+            start_blocks[id(target)] = ledger.resume_block(
+                target.table_name, target.chainid, target.address
+            )
+
+    # Targets new to the ledger may fall back to their creation block, look
+    # them up in batches so get_loaded_block finds them in the cache
+    unresolved = {}
+    for target in targets:
+        if start_blocks[id(target)] is None:
+            unresolved.setdefault(target.chainid, []).append(target.address)
+    for chainid, addresses in unresolved.items():
+        get_contract_creation_txn(chainid, addresses)
+
+    latest_blocks = {}
+    units = []
+    for target in targets:
+        for retry_from, retry_to in ledger.due_retries(
+            target.table_name, target.chainid, target.address
+        ):
+            units.extend(split_work_units(target, retry_from, retry_to, unit_blocks))
+
+        start_block = start_blocks[id(target)]
+        if start_block is None:
+            start_block = get_loaded_block(
+                pg_config,
+                table_schema,
+                target.table_name,
+                target.chainid,
+                target.address,
+            )
+        end_block = target.end_block
+        if end_block is None and target.end_time is not None:
+            end_block = _block_at(
+                block_index, target.chainid, target.end_time, "before"
+            )
+        if end_block is None:
+            if target.chainid not in latest_blocks:
+                latest_blocks[target.chainid] = get_latest_block(target.chainid)
+            end_block = latest_blocks[target.chainid]
+
+        units.extend(split_work_units(target, start_block, end_block, unit_blocks))
+
+    for table_name in {unit.table_name for unit in units}:
+        table_units = [unit for unit in units if unit.table_name == table_name]
+        ensure_block_partitions(
+            pg_config,
+            table_schema,
+            table_name,
+            min(unit.from_block for unit in table_units),
+            max(unit.to_block for unit in table_units),
+        )
+    return units
+
+
+_DONE = object()
+
+
+def _fetch_unit(
+    unit: WorkUnit,
+    results: queue.Queue,
+    stop: threading.Event,
+    block_chunk_size: int,
+    lake: Optional[RawLake] = None,
+) -> None:
+    """Worker: fetch all logs of a work unit and hand each window to the loader."""
+    try:
+        for from_block, to_block, rows in iter_log_windows(
+            chainid=unit.chainid,
+            address=unit.address,
+            from_block=unit.from_block,
+            to_block=unit.to_block,
+            chunk_size=block_chunk_size,
+            lake=lake,
+        ):
+            if stop.is_set():
+                break
+            results.put((unit, from_block, to_block, rows))
+        results.put((unit, _DONE, None, None))
+    except Exception as e:
+        results.put((unit, _DONE, None, e))
+
+
+def backfill_logs(
+    pipeline: dlt.Pipeline,
+    units: list[WorkUnit],
+    max_workers: int = 4,
+    block_chunk_size: int = 10_000,
+    flush_rows: int = 50_000,
+    max_pending_windows: int = 64,
+    ledger: Optional[BlockRangeLedger] = None,
+    metrics: Optional[LoadMetrics] = None,
+    decoders: Optional[dict[str, EventDecoder]] = None,
+    decode_processes: Optional[int] = None,
+    decode_batch_rows: int = 10_000,
+    upsert: bool = False,
+    arrow: bool = False,
+    copy_loader: Optional[CopyLoader] = None,
+    lake: Optional[RawLake] = None,
+    pg_config: Optional[PostgresConfig] = None,
+) -> list[WorkUnit]:
+    """
+    Backfill logs for many work units concurrently into one pipeline.
+
+    Workers fetch work units in parallel and share the Etherscan session's
+    rate budget; a single loader (the calling thread) buffers the fetched rows
+    per table and loads them with one `pipeline.run` per `flush_rows` rows.
+
+    Args:
+        pipeline: Configured DLT pipeline instance for data loading
+        units: Work units, e.g. from `plan_backfill`
+        max_workers: Number of concurrent fetch workers
+        block_chunk_size: Initial block window size for each worker
+        flush_rows: Buffered row count that triggers a load
+        max_pending_windows: Fetched windows queued for the loader before
+            workers block, bounding memory use
+        ledger: Block range ledger that loaded windows are recorded in, and
+            failed ranges are queued in for retry
+        metrics: Collects per-table metrics for every flush
+        decoders: Event decoders by table name; the logs of these tables are
+            also loaded decoded, into one `{table_name}_{event}` table per event
+        decode_processes: Decode in this many worker processes
+        decode_batch_rows: Logs per batch handed to a decoding process
+        upsert: Upsert logs on (chainid, transaction_hash, log_index) instead of
+            appending them; call `ensure_unique_key` on the tables first so
+            upserts don't scan them
+        arrow: Load raw and decoded logs as arrow tables, which dlt loads
+            without normalizing every row
+        copy_loader: Load every flush with `COPY` through this loader instead
+            of the pipeline, into the loader's schema
+        lake: Also write every fetched window to this raw lake
+        pg_config: Index the raw tables of the work units after the backfill,
+            see `ensure_log_indexes`
+
+    Returns:
+        list[WorkUnit]: Work units that failed and need to be retried
+    """
+    results = queue.Queue(maxsize=max_pending_windows)
+    stop = threading.Event()
+    buffers: dict[str, list[dict]] = {}
+    buffered = 0
+    buffered_windows: list[tuple[WorkUnit, int, int]] = []
+    last_fetched: dict[WorkUnit, int] = {}
+    failed = []
+
+    def _flush():
+        nonlocal buffered
+        if buffered:
+            load_started = time.perf_counter()
+            if copy_loader is not None:
+                row_counts, load_bytes = copy_loader.load(
+                    _copy_items(),
+                    write_disposition="merge" if upsert else "append",
+                    primary_key=BlockExplorerColumns.LogKey if upsert else None,
+                )
+            else:
+                resources = [
+                    resource
+                    for table_name, rows in buffers.items()
+                    if rows
+                    for resource in log_resources(
+                        rows, table_name, upsert=upsert, arrow=arrow
+                    )
+                ]
+                for table_name, rows in buffers.items():
+                    if rows and table_name in decoders:
+                        resources.extend(_decoded_resources(table_name, rows))
+                if arrow:
+                    add_dlt_columns(pipeline)
+                load_info = pipeline.run(
+                    resources, write_disposition=LOG_UPSERT if upsert else "append"
+                )
+                row_counts, load_bytes = load_info_stats(pipeline, load_info)
+            load_seconds = time.perf_counter() - load_started
+            logger.info(f"Loaded {buffered} logs into {len(row_counts)} tables")
+            if metrics is not None:
+                for table_name, rows in buffers.items():
+                    blocks = [
+                        (from_block, to_block)
+                        for unit, from_block, to_block in buffered_windows
+                        if unit.table_name == table_name
+                    ]
+                    metrics.add(
+                        ChunkMetrics(
+                            table_name=table_name,
+                            from_block=min(b[0] for b in blocks),
+                            to_block=max(b[1] for b in blocks),
+                            rows_fetched=len(rows),
+                            rows_loaded=row_counts.get(table_name, 0),
+                            load_seconds=load_seconds,
+                            load_bytes=load_bytes.get(table_name, 0),
+                        )
+                    )
+        if ledger:
+            for unit, from_block, to_block in buffered_windows:
+                ledger.mark_done(
+                    unit.table_name, unit.chainid, unit.address, from_block, to_block
+                )
+        buffers.clear()
+        buffered_windows.clear()
+        buffered = 0
+
+    decoders = decoders or {}
+    decode_pool = None
+    if decoders and decode_processes and decode_processes > 1:
+        decode_pool = ProcessPoolExecutor(max_workers=decode_processes)
+
+    def _decode(table_name: str, rows: list[dict]) -> list:
+        batches = [
+            rows[i : i + decode_batch_rows]
+            for i in range(0, len(rows), decode_batch_rows)
+        ]
+        decoder = decoders[table_name]
+        return list(decoder.decode_many(batches, executor=decode_pool))
+
+    def _decoded_resources(table_name: str, rows: list[dict]) -> list:
+        decoder = decoders[table_name]
+        decoded = _decode(table_name, rows)
+        if arrow:
+            return decoder.arrow_resources(decoded, table_name)
+        items = [
+            item for batch in decoded for item in decoder.iter_tables(batch, table_name)
+        ]
+        return [dlt.resource(items, name=f"{table_name}_events")]
+
+    def _copy_items():
+        for table_name, rows in buffers.items():
+            if not rows:
+                continue
+            yield table_name, rows, BlockExplorerColumns.Log
+            if table_name in decoders:
+                decoder = decoders[table_name]
+                for decoded in _decode(table_name, rows):
+                    yield from decoder.iter_arrow_tables(decoded, table_name)
+
+    logger.info(f"Backfilling {len(units)} work units with {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for unit in units:
+            executor.submit(_fetch_unit, unit, results, stop, block_chunk_size, lake)
+
+        pending = len(units)
+        try:
+            while pending:
+                unit, from_block, to_block, rows = results.get()
+                if from_block is _DONE:
+                    pending -= 1
+                    if rows is not None:
+                        logger.error(
+                            f"Failed to fetch {unit.address} {unit.from_block}-{unit.to_block}: {rows}"
+                        )
+                        failed.append(unit)
+                        if ledger:
+                            ledger.mark_failed(
+                                unit.table_name,
+                                unit.chainid,
+                                unit.address,
+                                last_fetched.get(unit, unit.from_block - 1) + 1,
+                                unit.to_block,
+                                str(rows),
+                            )
+                    continue
+
+                last_fetched[unit] = to_block
+                buffered_windows.append((unit, from_block, to_block))
+                buffers.setdefault(unit.table_name, []).extend(rows)
+                buffered += len(rows)
+                if buffered >= flush_rows:
+                    _flush()
+            _flush()
+        except Exception:
+            # Stop the workers and drain the queue so none stays blocked on put
+            stop.set()
+            while pending:
+                if results.get()[1] is _DONE:
+                    pending -= 1
+            raise
+        finally:
+            if decode_pool is not None:
+                decode_pool.shutdown()
+
+    if pg_config is not None:
+        table_schema = (
+            copy_loader.table_schema
+            if copy_loader is not None
+            else pipeline.dataset_name
+        )
+        for table_name in sorted({unit.table_name for unit in units}):
+            ensure_log_indexes(pg_config, table_schema, table_name)
+
+    logger.info(
+        f"Backfill finished, {len(failed)} work units failed, rate limiter: {etherscan_bucket.stats()}"
+    )
+    return failed
@@ -0,0 +1,489 @@
+import io
+import json
+import time
+import logging
+from typing import Any, Iterable, Optional
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from dlt.common.normalizers.naming.snake_case import NamingConvention
+
+from stables.config import PostgresConfig
+from stables.utils.postgres import (
+    get_postgres_connection,
+    create_unique_key,
+    partitioned_key,
+)
+from stables.data.source.arrow import rows_to_arrow
+
+logger = logging.getLogger(__name__)
+
+_naming = NamingConvention()
+
+# Postgres types of dlt data types, as dlt creates them
+_PG_TYPES = {
+    "bigint": "bigint",
+    "double": "double precision",
+    "bool": "boolean",
+    "text": "varchar",
+    "json": "jsonb",
+    "timestamp": "timestamp with time zone",
+    "date": "date",
+    "binary": "bytea",
+}
+
+_DLT_COLUMNS = ("_dlt_load_id", "_dlt_id")
+
+
+def _pg_type(field: pa.Field, hint: Optional[dict]) -> str:
+    """Postgres type of a column, from its dlt hint or else its arrow type."""
+    if hint is not None and "data_type" in hint:
+        if hint["data_type"] == "decimal":
+            return f"numeric({hint.get('precision', 38)},{hint.get('scale', 9)})"
+        return _PG_TYPES[hint["data_type"]]
+    t = field.type
+    if pa.types.is_integer(t):
+        return "bigint"
+    if pa.types.is_floating(t):
+        return "double precision"
+    if pa.types.is_boolean(t):
+        return "boolean"
+    if pa.types.is_timestamp(t):
+        return "timestamp with time zone"
+    if pa.types.is_date(t):
+        return "date"
+    if pa.types.is_decimal(t):
+        return f"numeric({t.precision},{t.scale})"
+    if pa.types.is_nested(t):
+        return "jsonb"
+    return "varchar"
+
+
+def _csv_ready(table: pa.Table) -> pa.Table:
+    """Serialize the columns the CSV writer can't write, nested ones to JSON."""
+    for i, field in enumerate(table.schema):
+        if pa.types.is_nested(field.type):
+            values = [
+                None if v is None else json.dumps(v)
+                for v in table.column(i).to_pylist()
+            ]
+            table = table.set_column(i, field.name, pa.array(values, pa.string()))
+        elif pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table
+
+
+class CopyLoader:
+    """
+    Bulk loads tables into a Postgres schema with `COPY`.
+
+    Batches are written as CSV into temporary staging tables, one per target
+    table, as they come and outside a transaction, so a slow stream of batches
+    holds no locks. Every target is then appended to, replaced or merged into
+    with a single statement, all in one transaction. Target tables and columns are
+    created as dlt would create them, including dlt's load and row id columns,
+    so tables can be loaded by both dlt pipelines and this loader.
+
+    Args:
+        pg_config: PostgresConfig instance
+        table_schema: Schema of the target tables
+    """
+
+    def __init__(self, pg_config: PostgresConfig, table_schema: str):
+        self.pg_config = pg_config
+        self.table_schema = table_schema
+
+    def _target_columns(self, cursor, table_name: str) -> dict[str, str]:
+        cursor.execute(
+            """
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            """,
+            (self.table_schema, table_name),
+        )
+        return dict(cursor.fetchall())
+
+    def _prepare(
+        self,
+        cursor,
+        table_name: str,
+        stage: str,
+        types: dict[str, str],
+        fresh: bool = False,
+    ) -> None:
+        """
+        Create or extend the target and staging tables for the columns, with
+        `fresh` replacing a staging table left by an earlier load.
+        """
+        target = f"{self.table_schema}.{table_name}"
+        existing = self._target_columns(cursor, table_name)
+        if not existing:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {self.table_schema}")
+            columns = ", ".join(
+                f'"{name}" {pg_type}' for name, pg_type in types.items()
+            )
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {target} ({columns}, "
+                '"_dlt_load_id" varchar NOT NULL, "_dlt_id" varchar NOT NULL UNIQUE)'
+            )
+        else:
+            for name, pg_type in types.items():
+                if name not in existing:
+                    cursor.execute(
+                        f'ALTER TABLE {target} ADD COLUMN IF NOT EXISTS "{name}" {pg_type}'
+                    )
+        if fresh:
+            cursor.execute(f"DROP TABLE IF EXISTS pg_temp.{stage}")
+            columns = ", ".join(
+                f'"{name}" {pg_type}' for name, pg_type in types.items()
+            )
+            cursor.execute(f"CREATE TEMP TABLE {stage} ({columns})")
+        else:
+            for name, pg_type in types.items():
+                cursor.execute(
+                    f'ALTER TABLE {stage} ADD COLUMN IF NOT EXISTS "{name}" {pg_type}'
+                )
+
+    def _copy(self, cursor, stage: str, table: pa.Table) -> int:
+        """COPY an arrow table into a staging table, returns the CSV size."""
+        buffer = io.BytesIO()
+        pa_csv.write_csv(
+            _csv_ready(table),
+            buffer,
+            pa_csv.WriteOptions(include_header=False),
+        )
+        size = buffer.tell()
+        buffer.seek(0)
+        columns = ", ".join(f'"{name}"' for name in table.column_names)
+        cursor.copy_expert(
+            f"COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        return size
+
+    def _publish(
+        self,
+        cursor,
+        table_name: str,
+        stage: str,
+        columns: list[str],
+        write_disposition: str,
+        primary_key: Optional[list[str]],
+        load_id: str,
+        merge_window: Optional[str] = None,
+    ) -> int:
+        """Move the staged rows into the target with one statement."""
+        target = f"{self.table_schema}.{table_name}"
+        target_columns = self._target_columns(cursor, table_name)
+        names = [f'"{name}"' for name in columns]
+        values = list(names)
+        if all(name in target_columns for name in _DLT_COLUMNS):
+            names += ['"_dlt_load_id"', '"_dlt_id"']
+            values += ["%(load_id)s", "gen_random_uuid()::text"]
+        select = f"SELECT {', '.join(values)} FROM {stage}"
+
+        if write_disposition == "replace":
+            cursor.execute(f"TRUNCATE {target}")
+        if write_disposition == "merge" and primary_key and merge_window:
+            return self._publish_window(
+                cursor,
+                table_name,
+                stage,
+                names,
+                values,
+                primary_key,
+                merge_window,
+                load_id,
+            )
+        if write_disposition == "merge" and primary_key:
+            deleted = create_unique_key(
+                cursor, self.table_schema, table_name, primary_key
+            )
+            if deleted:
+                logger.warning(
+                    f"Deleted {deleted} duplicate rows of {target} to merge on "
+                    f"{primary_key}, use ensure_unique_key to dedupe before loading"
+                )
+            # Partitioned tables are keyed on their partition key too
+            conflict_key = partitioned_key(
+                cursor, self.table_schema, table_name, primary_key
+            )
+            key = ", ".join(f'"{name}"' for name in conflict_key)
+            updates = [
+                f"{name} = EXCLUDED.{name}"
+                for name in names
+                if name.strip('"') not in conflict_key and name != '"_dlt_id"'
+            ]
+            # Later rows of a key win, a statement can't update a row twice
+            select = f"""
+                SELECT DISTINCT ON ({key}) {', '.join(values)} FROM {stage}
+                ORDER BY {key}, ctid DESC
+            """
+            conflict = f"ON CONFLICT ({key}) DO " + (
+                f"UPDATE SET {', '.join(updates)}" if updates else "NOTHING"
+            )
+        else:
+            conflict = ""
+        cursor.execute(
+            f"INSERT INTO {target} ({', '.join(names)}) {select} {conflict}",
+            {"load_id": load_id},
+        )
+        return cursor.rowcount
+
+    def _window_index(
+        self, cursor, table_name: str, primary_key: list[str], merge_window: str
+    ) -> list[str]:
+        """
+        Index the target on its series key then `merge_window`, so merges and
+        `latest_window` scan the window of each series instead of the table.
+        Returns the key columns, with the partition key of a partitioned table.
+        """
+        key_columns = partitioned_key(
+            cursor,
+            self.table_schema,
+            table_name,
+            [c for c in primary_key if c != merge_window] + [merge_window],
+        )
+        key = ", ".join(f'"{name}"' for name in key_columns)
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_window_idx "
+            f"ON {self.table_schema}.{table_name} ({key})"
+        )
+        return key_columns
+
+    def _publish_window(
+        self,
+        cursor,
+        table_name: str,
+        stage: str,
+        names: list[str],
+        values: list[str],
+        primary_key: list[str],
+        merge_window: str,
+        load_id: str,
+    ) -> int:
+        """
+        Merge the staged rows by deleting the target rows with their keys
+        within the staged range of `merge_window`, then inserting them.
+        """
+        target = f"{self.table_schema}.{table_name}"
+        key_columns = self._window_index(cursor, table_name, primary_key, merge_window)
+        key = ", ".join(f'"{name}"' for name in key_columns)
+        cursor.execute(
+            f'SELECT min("{merge_window}"), max("{merge_window}") FROM {stage}'
+        )
+        window_from, window_to = cursor.fetchone()
+        if window_from is None:
+            return 0
+        # NULL keys match NULL keys, the index serving the columns without NULLs
+        cursor.execute(
+            "SELECT "
+            + ", ".join(f'bool_or("{name}" IS NULL)' for name in key_columns)
+            + f" FROM {stage}"
+        )
+        matches = " AND ".join(
+            (
+                f't."{name}" IS NOT DISTINCT FROM s."{name}"'
+                if has_null
+                else f't."{name}" = s."{name}"'
+            )
+            for name, has_null in zip(key_columns, cursor.fetchone())
+        )
+        cursor.execute(
+            f"""
+            DELETE FROM {target} t USING (SELECT DISTINCT {key} FROM {stage}) s
+            WHERE t."{merge_window}" BETWEEN %(window_from)s AND %(window_to)s
+                AND {matches}
+            """,
+            {"window_from": window_from, "window_to": window_to},
+        )
+        logger.debug(
+            f"Replacing {cursor.rowcount} rows of {target} from {window_from} to {window_to}"
+        )
+        # Later rows of a key win
+        cursor.execute(
+            f"""
+            INSERT INTO {target} ({', '.join(names)})
+            SELECT DISTINCT ON ({key}) {', '.join(values)} FROM {stage}
+            ORDER BY {key}, ctid DESC
+            """,
+            {"load_id": load_id},
+        )
+        return cursor.rowcount
+
+    def _since_latest(
+        self,
+        cursor,
+        table_name: str,
+        batch: pa.Table,
+        primary_key: list[str],
+        merge_window: str,
+        lookback: Any,
+        latest: dict[tuple, Any],
+    ) -> pa.Table:
+        """
+        Drop the rows of a batch older than the latest `merge_window` value
+        loaded for their series, minus `lookback`. Latest values are looked up
+        once per series, through the window index, and cached in `latest`.
+        """
+        if not self._target_columns(cursor, table_name):
+            return batch
+        key_columns = self._window_index(cursor, table_name, primary_key, merge_window)
+        series_columns = [c for c in key_columns if c != merge_window]
+        columns = [
+            (
+                batch.column(name).to_pylist()
+                if name in batch.column_names
+                else [None] * batch.num_rows
+            )
+            for name in series_columns
+        ]
+        series = list(zip(*columns)) if columns else [()] * batch.num_rows
+        for key in set(series) - latest.keys():
+            conditions = [
+                f'"{name}" IS NULL' if value is None else f'"{name}" = %s'
+                for name, value in zip(series_columns, key)
+            ]
+            cursor.execute(
+                f'SELECT max("{merge_window}") FROM {self.table_schema}.{table_name}'
+                + (f" WHERE {' AND '.join(conditions)}" if conditions else ""),
+                [value for value in key if value is not None],
+            )
+            latest[key] = cursor.fetchone()[0]
+        keep = [
+            latest[key] is None or value is None or value >= latest[key] - lookback
+            for key, value in zip(series, batch.column(merge_window).to_pylist())
+        ]
+        return batch.filter(pa.array(keep, pa.bool_()))
+
+    def _register_load(self, cursor, load_id: str) -> None:
+        """
+        Record a completed load in dlt's `_dlt_loads` table, creating it as dlt
+        would, so the `_dlt_load_id` of the copied rows refers to a load.
+        """
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_schema}._dlt_loads (
+                "load_id" varchar NOT NULL, "schema_name" varchar,
+                "status" bigint NOT NULL, "inserted_at" timestamp with time zone NOT NULL,
+                "schema_version_hash" varchar
+            )
+            """)
+        # Status 0 is a completed load, copied rows belong to no dlt schema
+        cursor.execute(
+            f"INSERT INTO {self.table_schema}._dlt_loads "
+            "(load_id, schema_name, status, inserted_at) VALUES (%s, NULL, 0, now())",
+            (load_id,),
+        )
+
+    def _drop_stages(self, conn, staged: dict[str, list[str]]) -> None:
+        """Drop the staging tables of a failed load from its connection."""
+        try:
+            conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                for table_name in staged:
+                    cursor.execute(f"DROP TABLE IF EXISTS pg_temp._stage_{table_name}")
+        except psycopg2.Error as e:
+            logger.debug(f"Couldn't drop staging tables: {e}")
+
+    def load(
+        self,
+        items: Iterable[tuple[str, Any, Optional[dict]]],
+        write_disposition: str = "append",
+        primary_key: Optional[list[str]] = None,
+        merge_window: Optional[str] = None,
+        lookback: Optional[Any] = None,
+    ) -> tuple[dict[str, int], dict[str, int]]:
+        """
+        Bulk load batches into their tables. Batches are staged as `items`
+        yields them, outside a transaction, and published in one transaction
+        once `items` is exhausted.
+
+        Args:
+            items: (table_name, batch, column hints) tuples, a batch being an
+                arrow table or a list of row dicts, consumed as they come
+            write_disposition: "append", "replace" or "merge"
+            primary_key: Key columns to merge on, given a unique index if
+                missing; required for "merge"
+            merge_window: Column, e.g. "time", bounding a merge to the range
+                of the loaded rows: target rows of the range are deleted by
+                key and the loaded rows inserted, so the merge costs the same
+                however much history the target holds
+            lookback: With `merge_window`, only load the rows of each series
+                newer than its latest loaded window value minus `lookback`,
+                e.g. a `datetime.timedelta`
+
+        Returns:
+            tuple[dict[str, int], dict[str, int]]: Rows loaded and CSV bytes
+                copied per table, like `load_info_stats`
+        """
+        if write_disposition == "merge" and not primary_key:
+            raise ValueError("A primary key is required to merge")
+        staged: dict[str, list[str]] = {}
+        load_bytes: dict[str, int] = {}
+        row_counts: dict[str, int] = {}
+        latest: dict[str, dict[tuple, Any]] = {}
+        with get_postgres_connection(self.pg_config) as conn:
+            # Staging commits as it goes, the pool resets autocommit
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    for table_name, batch, hints in items:
+                        table_name = _naming.normalize_table_identifier(table_name)
+                        if not isinstance(batch, pa.Table):
+                            if not batch:
+                                continue
+                            batch = rows_to_arrow(batch, hints)
+                        if merge_window and lookback is not None:
+                            batch = self._since_latest(
+                                cursor,
+                                table_name,
+                                batch,
+                                primary_key,
+                                merge_window,
+                                lookback,
+                                latest.setdefault(table_name, {}),
+                            )
+                            if not batch.num_rows:
+                                continue
+                        hints = hints or {}
+                        types = {
+                            field.name: _pg_type(field, hints.get(field.name))
+                            for field in batch.schema
+                        }
+                        stage = f"_stage_{table_name}"
+                        self._prepare(
+                            cursor, table_name, stage, types, table_name not in staged
+                        )
+                        load_bytes[table_name] = load_bytes.get(
+                            table_name, 0
+                        ) + self._copy(cursor, stage, batch)
+                        columns = staged.setdefault(table_name, [])
+                        columns.extend(
+                            n for n in batch.column_names if n not in columns
+                        )
+
+                    conn.autocommit = False
+                    load_id = str(time.time())
+                    for table_name, columns in staged.items():
+                        row_counts[table_name] = self._publish(
+                            cursor,
+                            table_name,
+                            f"_stage_{table_name}",
+                            columns,
+                            write_disposition,
+                            primary_key,
+                            load_id,
+                            merge_window,
+                        )
+                        cursor.execute(f"DROP TABLE _stage_{table_name}")
+                    if staged:
+                        self._register_load(cursor, load_id)
+                conn.commit()
+            except Exception:
+                self._drop_stages(conn, staged)
+                raise
+        logger.info(
+            f"Copied {sum(row_counts.values())} rows into {len(row_counts)} tables of {self.table_schema}"
+        )
+        return row_counts, load_bytes
@@ -1,8 +1,16 @@
+import json
+import hashlib
 import logging
-from dataclasses import dataclass, field
+import datetime
+from dataclasses import dataclass, field, replace
 from typing import Optional, List, Callable
 import dlt
+from dlt.extract.exceptions import InvalidParallelResourceDataType
+from dlt.extract.hints import HintsMeta
 from stables.config import PostgresConfig
+from stables.data.source.arrow import add_dlt_columns, iter_arrow_batches
+from stables.data.source.lake import RawLake
+from stables.data.load.bulk import CopyLoader
 
 from stables.data.source.defillama import (
     token_price,
@@ -11,6 +19,8 @@ from stables.data.source.defillama import (
     all_yield_pools,
     yield_pool,
     stables_metadata,
+    time_cursor,
+    TIME_CURSOR_LOOKBACK,
 )
 
 logger = logging.getLogger(__name__)
@@ -33,6 +43,28 @@ class LoadConfig:
     write_disposition: str = "replace"
     primary_key: Optional[List[str]] = None
     pipeline_config: Optional[PipelineConfig] = None
+    # Have the resource yield arrow tables, loaded without per-row normalization.
+    # The time series helpers below default to it, see scripts/bench_row_transforms.py
+    arrow: bool = False
+    # Load with COPY and one INSERT (or upsert) statement instead of dlt, best
+    # with `arrow` so the batches are typed by the resource
+    bulk: bool = False
+    # Write the API responses to this raw lake, or with `replay`, load the
+    # latest responses in the lake instead of calling the API
+    lake: Optional[RawLake] = None
+    replay: bool = False
+    # Only load rows newer than the last loaded `time` of the series, minus
+    # `lookback`, for time series resources. Not applied to `replay`, which
+    # rebuilds the series, nor to `bulk` loads without a `merge_window`, which
+    # have no pipeline state to keep the cursor in. Opt-in: older rows are then
+    # skipped even if a later call asks for a longer span or other params
+    incremental: bool = False
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK
+    # Merge with COPY, bounded to the range of this column (e.g. "time") in
+    # the loaded rows instead of matched against the whole table, see
+    # `CopyLoader.load`. Incremental loads start from the latest value of
+    # each series in the table
+    merge_window: Optional[str] = None
 
 
 def _create_pipeline(pg_config: PostgresConfig, config: PipelineConfig) -> dlt.Pipeline:
@@ -48,6 +80,8 @@ def _create_pipeline(pg_config: PostgresConfig, config: PipelineConfig) -> dlt.P
             destination=destination,
             dataset_name=config.dataset_name,
         )
+        # Resources may yield arrow tables into tables of dict rows
+        add_dlt_columns(pipeline)
 
         return pipeline
     except Exception as e:
@@ -55,20 +89,110 @@ def _create_pipeline(pg_config: PostgresConfig, config: PipelineConfig) -> dlt.P
         raise
 
 
+def _run_bulk_load(
+    pg_config: PostgresConfig,
+    load_config: LoadConfig,
+    dataset_name: str,
+    resource: dlt.sources.DltResource,
+) -> int:
+    """Load a resource's items with COPY, bypassing the dlt pipeline. Returns the rows loaded."""
+    table_name = load_config.table_name or resource.name
+    hints = resource.columns if isinstance(resource.columns, dict) else None
+    incremental = load_config.incremental and not load_config.replay
+    loader = CopyLoader(pg_config, dataset_name)
+
+    # Rows marked for their own tables, e.g. metadata, are loaded after
+    marked: dict[str, tuple[dict, list]] = {}
+
+    def _unmarked(item, meta) -> bool:
+        if isinstance(meta, HintsMeta) and meta.hints.get("table_name"):
+            table_hints = meta.hints
+            marked.setdefault(table_hints["table_name"], (table_hints, []))[1].append(
+                item
+            )
+            return False
+        return True
+
+    row_counts, _ = loader.load(
+        (
+            (table_name, batch, hints)
+            for batch in iter_arrow_batches(resource.add_filter(_unmarked), hints)
+        ),
+        write_disposition=load_config.write_disposition,
+        primary_key=load_config.primary_key,
+        merge_window=load_config.merge_window,
+        lookback=load_config.lookback if incremental else None,
+    )
+    for marked_table, (table_hints, rows) in marked.items():
+        primary_key = table_hints.get("primary_key")
+        marked_counts, _ = loader.load(
+            [(marked_table, rows, table_hints.get("columns") or None)],
+            write_disposition=table_hints.get("write_disposition", "append"),
+            primary_key=[primary_key] if isinstance(primary_key, str) else primary_key,
+        )
+        row_counts.update(marked_counts)
+    logger.info(
+        f"Successfully copied {row_counts.get(table_name, 0)} rows to {table_name}"
+    )
+    return row_counts.get(table_name, 0)
+
+
+def _resource_name(load_config: LoadConfig, resource: dlt.sources.DltResource) -> str:
+    """Name of a config's resource, the same on every run for the same arguments."""
+    # How the items are fetched doesn't change the series
+    kwargs = {k: v for k, v in load_config.resource_kwargs.items() if k != "stream"}
+    key = json.dumps(
+        [load_config.resource_args, kwargs],
+        sort_keys=True,
+        default=str,
+    )
+    return f"{resource.name}_{hashlib.md5(key.encode()).hexdigest()[:12]}"
+
+
+def _copies(load_config: LoadConfig) -> bool:
+    """Whether a config is loaded with COPY instead of a dlt pipeline."""
+    return load_config.bulk or load_config.merge_window is not None
+
+
+def _create_resource(load_config: LoadConfig) -> dlt.sources.DltResource:
+    """Create a config's resource with its arguments and arrow/lake/cursor options."""
+    resource_kwargs = dict(load_config.resource_kwargs)
+    if load_config.arrow:
+        resource_kwargs["arrow"] = True
+    if load_config.lake is not None or load_config.replay:
+        resource_kwargs.update(lake=load_config.lake, replay=load_config.replay)
+    incremental = (
+        load_config.incremental and not _copies(load_config) and not load_config.replay
+    )
+    if incremental:
+        resource_kwargs["time"] = time_cursor(load_config.lookback)
+    resource = load_config.resource_func(*load_config.resource_args, **resource_kwargs)
+    if incremental:
+        # The cursor state is kept per resource name, one per series
+        table_name = load_config.table_name or resource.name
+        resource = resource.with_name(_resource_name(load_config, resource))
+        resource.apply_hints(table_name=table_name)
+    return resource
+
+
 def _run_load_pipeline(pg_config: PostgresConfig, load_config: LoadConfig) -> None:
     """Generic function to run a DLT load pipeline."""
     try:
         # Use provided pipeline config or create default
         pipeline_config = load_config.pipeline_config or PipelineConfig()
 
+        # Create resource with provided arguments
+        resource = _create_resource(load_config)
+
+        if _copies(load_config):
+            _run_bulk_load(
+                pg_config, load_config, pipeline_config.dataset_name, resource
+            )
+            return
+
         # Create pipeline with nullable columns by default
         pipeline = _create_pipeline(pg_config, pipeline_config)
 
-        # Create resource with provided arguments
-        resource = load_config.resource_func(
-            *load_config.resource_args, **load_config.resource_kwargs
-        )
-
         # Prepare run kwargs
         run_kwargs = {
             "table_name": load_config.table_name,
@@ -89,6 +213,94 @@ def _run_load_pipeline(pg_config: PostgresConfig, load_config: LoadConfig) -> No
         raise
 
 
+def run_load_batch(
+    pg_config: PostgresConfig,
+    load_configs: List[LoadConfig],
+    max_workers: int = 4,
+) -> dict[str, int]:
+    """
+    Load many configs with one pipeline run per pipeline config, extracting
+    their resources concurrently.
+
+    Resources are extracted by up to `max_workers` threads and normalized and
+    loaded together as one load package, so a refresh of many series pays
+    the pipeline startup, state sync and load once instead of per config.
+    Configs loading the same table are written to it together, e.g. merged
+    on their primary key, as arrow tables if any of them uses `arrow`.
+    Configs with `bulk` or a `merge_window` are loaded with COPY after the
+    run.
+
+    Args:
+        pg_config: PostgresConfig instance
+        load_configs: Configs to load, grouped by their pipeline config
+        max_workers: Resources extracted at once
+
+    Returns:
+        dict[str, int]: Rows loaded per table
+    """
+    groups: dict[tuple[str, str], List[LoadConfig]] = {}
+    for load_config in load_configs:
+        pipeline_config = load_config.pipeline_config or PipelineConfig()
+        key = (pipeline_config.pipeline_name, pipeline_config.dataset_name)
+        groups.setdefault(key, []).append(load_config)
+
+    row_counts: dict[str, int] = {}
+    for (pipeline_name, dataset_name), configs in groups.items():
+        configs = [c for c in configs if not _copies(c)]
+        table_names = [c.table_name or _create_resource(c).table_name for c in configs]
+        # A load package can't mix arrow tables and rows in one table
+        arrow_tables = {t for t, c in zip(table_names, configs) if c.arrow}
+        resources = []
+        names: set[str] = set()
+        for table_name, load_config in zip(table_names, configs):
+            if table_name in arrow_tables:
+                load_config = replace(load_config, arrow=True)
+            resource = _create_resource(load_config)
+            # Resource names are unique within a run, their tables may not be
+            if not load_config.incremental:
+                resource = resource.with_name(_resource_name(load_config, resource))
+            if resource.name in names:
+                logger.warning(f"Skipping duplicate config of {resource.name}")
+                continue
+            names.add(resource.name)
+            resource.apply_hints(
+                table_name=table_name,
+                write_disposition=load_config.write_disposition,
+                primary_key=load_config.primary_key,
+            )
+            try:
+                resource.parallelize()
+            except InvalidParallelResourceDataType:
+                logger.warning(
+                    f"Resource {resource.name} isn't a generator and is extracted "
+                    "serially"
+                )
+            resources.append(resource)
+
+        if resources:
+            pipeline = _create_pipeline(
+                pg_config, PipelineConfig(pipeline_name, dataset_name)
+            )
+            pipeline.extract(resources, workers=max_workers)
+            normalize_info = pipeline.normalize()
+            pipeline.load()
+            for table_name, count in normalize_info.row_counts.items():
+                if not table_name.startswith("_dlt"):
+                    row_counts[table_name] = row_counts.get(table_name, 0) + count
+            logger.info(
+                f"Loaded {len(resources)} resources into {dataset_name} in one run"
+            )
+
+        for load_config in groups[(pipeline_name, dataset_name)]:
+            if _copies(load_config):
+                resource = _create_resource(load_config)
+                table_name = load_config.table_name or resource.name
+                row_counts[table_name] = row_counts.get(table_name, 0) + _run_bulk_load(
+                    pg_config, load_config, dataset_name, resource
+                )
+    return row_counts
+
+
 def create_default_pipeline_config(
     pipeline_name: str = "defillama", dataset_name: str = "llama"
 ) -> PipelineConfig:
@@ -101,6 +313,8 @@ def load_stables_metadata(
     pipeline_name: str = "defillama",
     dataset_name: str = "llama",
     table_name: str = "stables_metadata",
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
 ):
     """Load stablecoins metadata from DeFiLlama."""
     load_config = LoadConfig(
@@ -108,27 +322,77 @@ def load_stables_metadata(
         table_name=table_name,
         write_disposition="replace",
         pipeline_config=create_default_pipeline_config(pipeline_name, dataset_name),
+        lake=lake,
+        replay=replay,
     )
     _run_load_pipeline(pg_config, load_config)
 
 
-def load_stable_circulating(
+def stable_circulating_config(
     id: int,
-    pg_config: PostgresConfig,
     pipeline_name: str = "defillama",
     dataset_name: str = "llama",
     table_name: str = "circulating",
     get_response: str = "currentChainBalances",
-):
-    """Load stablecoin circulating supply data by coin ID."""
-    load_config = LoadConfig(
+    arrow: bool = True,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    incremental: bool = False,
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+    merge_window: Optional[str] = None,
+    stream: bool = False,
+) -> LoadConfig:
+    """Get the load config of a stablecoin's circulating supply, e.g. for `run_load_batch`."""
+    return LoadConfig(
         resource_func=stable_data,
         resource_args=(id,),
-        resource_kwargs={"get_response": get_response},
+        resource_kwargs={"get_response": get_response, "stream": stream},
         table_name=table_name,
         write_disposition="merge",
         primary_key=["time", "id", "chain"],
         pipeline_config=create_default_pipeline_config(pipeline_name, dataset_name),
+        arrow=arrow or bulk,
+        bulk=bulk,
+        lake=lake,
+        replay=replay,
+        incremental=incremental,
+        lookback=lookback,
+        merge_window=merge_window,
+    )
+
+
+def load_stable_circulating(
+    id: int,
+    pg_config: PostgresConfig,
+    pipeline_name: str = "defillama",
+    dataset_name: str = "llama",
+    table_name: str = "circulating",
+    get_response: str = "currentChainBalances",
+    arrow: bool = True,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    incremental: bool = False,
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+    merge_window: Optional[str] = None,
+    stream: bool = False,
+):
+    """Load stablecoin circulating supply data by coin ID."""
+    load_config = stable_circulating_config(
+        id,
+        pipeline_name=pipeline_name,
+        dataset_name=dataset_name,
+        table_name=table_name,
+        get_response=get_response,
+        arrow=arrow,
+        bulk=bulk,
+        lake=lake,
+        replay=replay,
+        incremental=incremental,
+        lookback=lookback,
+        merge_window=merge_window,
+        stream=stream,
     )
     _run_load_pipeline(pg_config, load_config)
 
@@ -140,16 +404,31 @@ def load_stable_data(
     dataset_name: str = "llama",
     table_name: str = "circulating",
     include_metadata: bool = True,
+    arrow: bool = True,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    incremental: bool = False,
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+    merge_window: Optional[str] = None,
+    stream: bool = False,
 ):
     """Load stablecoin circulating supply data by coin ID."""
     load_config = LoadConfig(
         resource_func=stable_data,
         resource_args=(id,),
-        resource_kwargs={"include_metadata": include_metadata},
+        resource_kwargs={"include_metadata": include_metadata, "stream": stream},
         table_name=table_name,
         write_disposition="merge",
         primary_key=["time", "id", "chain"],
         pipeline_config=create_default_pipeline_config(pipeline_name, dataset_name),
+        arrow=arrow or bulk,
+        bulk=bulk,
+        lake=lake,
+        replay=replay,
+        incremental=incremental,
+        lookback=lookback,
+        merge_window=merge_window,
     )
     _run_load_pipeline(pg_config, load_config)
 
@@ -162,6 +441,13 @@ def load_token_price(
     dataset_name: str = "llama",
     table_name: str = "token_price",
     params=None,
+    arrow: bool = True,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    incremental: bool = False,
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+    merge_window: Optional[str] = None,
 ):
     """Load token price data for a specific network and contract address."""
     load_config = LoadConfig(
@@ -171,6 +457,13 @@ def load_token_price(
         write_disposition="merge",
         primary_key=["time", "network", "contract_address"],
         pipeline_config=create_default_pipeline_config(pipeline_name, dataset_name),
+        arrow=arrow or bulk,
+        bulk=bulk,
+        lake=lake,
+        replay=replay,
+        incremental=incremental,
+        lookback=lookback,
+        merge_window=merge_window,
     )
     _run_load_pipeline(pg_config, load_config)
 
@@ -183,6 +476,13 @@ def load_protocol_revenue(
     table_name: str = "protocol_revenue",
     data_selector: str = "totalDataChartBreakdown",
     include_metadata: bool = False,
+    arrow: bool = True,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    incremental: bool = False,
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+    merge_window: Optional[str] = None,
 ):
     """Load protocol revenue data from DeFiLlama."""
     load_config = LoadConfig(
@@ -196,6 +496,13 @@ def load_protocol_revenue(
         write_disposition="merge",
         primary_key=["time", "chain", "protocol", "sub_protocol"],
         pipeline_config=create_default_pipeline_config(pipeline_name, dataset_name),
+        arrow=arrow or bulk,
+        bulk=bulk,
+        lake=lake,
+        replay=replay,
+        incremental=incremental,
+        lookback=lookback,
+        merge_window=merge_window,
     )
     _run_load_pipeline(pg_config, load_config)
 
@@ -205,32 +512,83 @@ def load_all_yield_pools(
     pipeline_name: str = "defillama",
     dataset_name: str = "llama",
     table_name: str = "all_yield_pools",
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    stream: bool = False,
 ):
     """Load all yield pools data from DeFiLlama."""
     load_config = LoadConfig(
         resource_func=all_yield_pools,
+        resource_kwargs={"stream": stream},
         table_name=table_name,
         write_disposition="replace",
         pipeline_config=create_default_pipeline_config(pipeline_name, dataset_name),
+        lake=lake,
+        replay=replay,
     )
     _run_load_pipeline(pg_config, load_config)
 
 
-def load_yield_pool(
+def yield_pool_config(
     pool_id: str,
     pool_name: str,
-    pg_config: PostgresConfig,
     pipeline_name: str = "defillama",
     dataset_name: str = "llama",
     table_name: str = "yield_pools",
-):
-    """Load historical yield pool data for a specific pool."""
-    load_config = LoadConfig(
+    arrow: bool = True,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    incremental: bool = False,
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+    merge_window: Optional[str] = None,
+) -> LoadConfig:
+    """Get the load config of a yield pool's history, e.g. for `run_load_batch`."""
+    return LoadConfig(
         resource_func=yield_pool,
         resource_args=(pool_id, pool_name),
         table_name=table_name,
         write_disposition="merge",
         primary_key=["time", "pool_id"],
         pipeline_config=create_default_pipeline_config(pipeline_name, dataset_name),
+        arrow=arrow or bulk,
+        bulk=bulk,
+        lake=lake,
+        replay=replay,
+        incremental=incremental,
+        lookback=lookback,
+        merge_window=merge_window,
+    )
+
+
+def load_yield_pool(
+    pool_id: str,
+    pool_name: str,
+    pg_config: PostgresConfig,
+    pipeline_name: str = "defillama",
+    dataset_name: str = "llama",
+    table_name: str = "yield_pools",
+    arrow: bool = True,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    incremental: bool = False,
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+    merge_window: Optional[str] = None,
+):
+    """Load historical yield pool data for a specific pool."""
+    load_config = yield_pool_config(
+        pool_id,
+        pool_name,
+        pipeline_name=pipeline_name,
+        dataset_name=dataset_name,
+        table_name=table_name,
+        arrow=arrow,
+        bulk=bulk,
+        lake=lake,
+        replay=replay,
+        incremental=incremental,
+        lookback=lookback,
+        merge_window=merge_window,
     )
     _run_load_pipeline(pg_config, load_config)
@@ -1,10 +1,406 @@
 import time, logging
-from stables.utils.postgres import get_rows_count, get_loaded_block, PostgresConfig
-from stables.data.source.etherscan import etherscan_logs, get_latest_block
+from typing import Optional
+import dlt
+from stables.config import BlockExplorerColumns
+from stables.utils.postgres import (
+    get_loaded_block,
+    get_loaded_ranges,
+    ensure_unique_key,
+    ensure_block_partitions,
+    ensure_log_indexes,
+    PostgresConfig,
+)
+from stables.data.source.etherscan import (
+    iter_log_windows,
+    get_latest_block,
+    etherscan_bucket,
+)
+from stables.data.source.arrow import add_dlt_columns, rows_to_arrow
+from stables.data.source.decode import EventDecoder
+from stables.data.source.lake import RawLake
+from stables.data.load.bulk import CopyLoader
+from stables.data.load.ledger import BlockRangeLedger
+from stables.data.load.metrics import ChunkMetrics, LoadMetrics, load_info_stats
 
 logger = logging.getLogger(__name__)
 
 
+# Upsert on the log key, see BlockExplorerColumns.LogKey
+LOG_UPSERT = {"disposition": "merge", "strategy": "upsert"}
+
+
+def _fill_empty_indexes(pages):
+    """Etherscan returns index 0 as "0x", which dlt can't coerce to bigint."""
+    for page in pages:
+        for row in page:
+            for column in ("logIndex", "transactionIndex"):
+                if row.get(column) == "0x":
+                    row[column] = "0x0"
+        yield page
+
+
+def _drop_duplicate_logs(pages):
+    """Drop logs repeated within one load, a MERGE can't apply a key twice."""
+    seen = set()
+    for page in pages:
+        unique = []
+        for row in page:
+            key = (row.get("chainid"), row["transactionHash"], row["logIndex"])
+            if key not in seen:
+                seen.add(key)
+                unique.append(row)
+        yield unique
+
+
+def _logs_to_arrow(page: list[dict]):
+    yield rows_to_arrow(page, BlockExplorerColumns.Log)
+
+
+def log_resources(
+    rows,
+    table_name: str,
+    decoder: Optional[EventDecoder] = None,
+    upsert: bool = False,
+    arrow: bool = False,
+):
+    """
+    Get the dlt resources loading raw logs into `table_name`, plus, with a
+    decoder, a transformer loading the decoded events into one table per event.
+
+    With `upsert`, logs are keyed on (chainid, transaction_hash, log_index) and
+    must be loaded with the `LOG_UPSERT` write disposition. With `arrow`, pages
+    are loaded as arrow tables, skipping dlt's per-row normalization.
+    """
+    if isinstance(rows, list):
+        # Keep a window as one page, so it is decoded as one columnar batch
+        rows = iter([rows])
+    rows = _fill_empty_indexes(rows)
+    if upsert:
+        rows = _drop_duplicate_logs(rows)
+    hints = dict(
+        columns=BlockExplorerColumns.Log,
+        primary_key=BlockExplorerColumns.LogKey if upsert else None,
+    )
+    if not arrow:
+        raw = dlt.resource(rows, name=table_name, **hints)
+        resources = [raw]
+    else:
+        # Pages are converted by a transformer, so the decoder still gets dicts
+        raw = dlt.resource(rows, name=f"{table_name}_pages", selected=False)
+        resources = [
+            raw,
+            raw | dlt.transformer(_logs_to_arrow, name=table_name, **hints),
+        ]
+    if decoder is not None and arrow:
+        resources.extend(raw | t for t in decoder.arrow_transformers(table_name))
+    elif decoder is not None:
+        resources.append(raw | decoder.transformer(table_name))
+    return resources
+
+
+def _copy_items(pages, table_name: str, decoder: Optional[EventDecoder] = None):
+    """Items of raw and decoded log batches for `CopyLoader.load`."""
+    if isinstance(pages, list):
+        pages = iter([pages])
+    for page in pages:
+        yield table_name, page, BlockExplorerColumns.Log
+        if decoder is not None:
+            yield from decoder.iter_arrow_tables(decoder.decode(page), table_name)
+
+
+def _run_logs(
+    pipeline,
+    pages,
+    table_name: str,
+    decoder: Optional[EventDecoder] = None,
+    upsert: bool = False,
+    arrow: bool = False,
+    copy_loader: Optional[CopyLoader] = None,
+) -> tuple[dict[str, int], dict[str, int]]:
+    """
+    Load pages of logs with the pipeline, or with `COPY` given a `copy_loader`.
+
+    Returns:
+        tuple[dict[str, int], dict[str, int]]: Rows and bytes loaded per table
+    """
+    if copy_loader is not None:
+        return copy_loader.load(
+            _copy_items(pages, table_name, decoder),
+            write_disposition="merge" if upsert else "append",
+            primary_key=BlockExplorerColumns.LogKey if upsert else None,
+        )
+    if arrow:
+        add_dlt_columns(pipeline)
+    load_info = pipeline.run(
+        log_resources(pages, table_name, decoder, upsert, arrow),
+        write_disposition=LOG_UPSERT if upsert else "append",
+    )
+    return load_info_stats(pipeline, load_info)
+
+
+def _log_windows(
+    chainid: int,
+    contract_address: str,
+    start_block: int,
+    end_block: int,
+    block_chunk_size: int,
+    max_block_chunk_size: int,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+):
+    """Log windows fetched from Etherscan (and landed in the lake), or replayed from the lake."""
+    if replay:
+        return lake.iter_log_windows(chainid, contract_address, start_block, end_block)
+    return iter_log_windows(
+        chainid=chainid,
+        address=contract_address,
+        from_block=start_block,
+        to_block=end_block,
+        chunk_size=block_chunk_size,
+        max_chunk_size=max_block_chunk_size,
+        lake=lake,
+    )
+
+
+def _load_range(
+    pipeline,
+    ledger: BlockRangeLedger,
+    metrics: LoadMetrics,
+    table_name: str,
+    chainid: int,
+    contract_address: str,
+    start_block: int,
+    end_block: int,
+    block_chunk_size: int,
+    max_block_chunk_size: int,
+    decoder: Optional[EventDecoder] = None,
+    upsert: bool = False,
+    arrow: bool = False,
+    copy_loader: Optional[CopyLoader] = None,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+):
+    """
+    Fetch and load one block range window by window, recording every window
+    in the ledger and its accounting in `metrics`. Windows that fail to load,
+    or the rest of the range if fetching fails, are queued in the ledger for retry.
+    """
+    windows = _log_windows(
+        chainid,
+        contract_address,
+        start_block,
+        end_block,
+        block_chunk_size,
+        max_block_chunk_size,
+        lake,
+        replay,
+    )
+    cursor = start_block
+    try:
+        fetch_started = time.perf_counter()
+        for from_block, to_block, rows in windows:
+            cursor = to_block + 1
+            chunk = ChunkMetrics(
+                table_name=table_name,
+                from_block=from_block,
+                to_block=to_block,
+                rows_fetched=len(rows),
+                fetch_seconds=time.perf_counter() - fetch_started,
+            )
+            logger.info(f"Loading logs from block {from_block} to {to_block}")
+            if not rows:
+                ledger.mark_done(
+                    table_name, chainid, contract_address, from_block, to_block
+                )
+                metrics.add(chunk)
+                fetch_started = time.perf_counter()
+                continue
+
+            max_retries = 2
+            retries = max_retries
+            while retries > 0:
+                try:
+                    load_started = time.perf_counter()
+                    row_counts, load_bytes = _run_logs(
+                        pipeline,
+                        rows,
+                        table_name,
+                        decoder,
+                        upsert,
+                        arrow,
+                        copy_loader,
+                    )
+                    chunk.load_seconds = time.perf_counter() - load_started
+                    chunk.rows_loaded = row_counts.get(table_name, 0)
+                    chunk.load_bytes = load_bytes.get(table_name, 0)
+
+                    logger.info(
+                        f"Loaded {chunk.rows_loaded} logs from {from_block} to {to_block}"
+                    )
+                    ledger.mark_done(
+                        table_name, chainid, contract_address, from_block, to_block
+                    )
+                    break  # Succeeded
+                except Exception as e:
+                    retries -= 1
+                    logger.error(
+                        f"Error loading logs: {e}. Retrying... ({retries} retries left)"
+                    )
+                    if retries > 0:
+                        time.sleep(3)
+                    else:
+                        logger.error(
+                            f"Failed to load logs for block range {from_block}-{to_block} after {max_retries} retries."
+                        )
+                        ledger.mark_failed(
+                            table_name,
+                            chainid,
+                            contract_address,
+                            from_block,
+                            to_block,
+                            str(e),
+                        )
+            metrics.add(chunk)
+            fetch_started = time.perf_counter()
+    except Exception as e:
+        logger.error(f"Failed to fetch logs from block {cursor}: {e}")
+        ledger.mark_failed(
+            table_name, chainid, contract_address, cursor, end_block, str(e)
+        )
+
+
+def _approx_log_size(row: dict) -> int:
+    """Approximate serialized size of a raw log, dominated by its hex payload."""
+    return len(row.get("data") or "") + 66 * len(row.get("topics") or []) + 400
+
+
+def _stream_range(
+    pipeline,
+    ledger: BlockRangeLedger,
+    metrics: LoadMetrics,
+    table_name: str,
+    chainid: int,
+    contract_address: str,
+    start_block: int,
+    end_block: int,
+    block_chunk_size: int,
+    max_block_chunk_size: int,
+    commit_rows: Optional[int] = None,
+    commit_bytes: Optional[int] = None,
+    decoder: Optional[EventDecoder] = None,
+    upsert: bool = False,
+    arrow: bool = False,
+    copy_loader: Optional[CopyLoader] = None,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+):
+    """
+    Fetch and load a block range as a stream, in as few pipeline runs as possible.
+
+    A single generator walks the whole range; without thresholds all windows
+    go into one `pipeline.run`. With `commit_rows` / `commit_bytes`, the run is
+    committed whenever that many rows / approximate bytes were extracted, and
+    the committed segment is recorded in the ledger, so a crash loses at most
+    one segment. A segment that fails to load is dropped and queued for retry.
+    """
+    windows = _log_windows(
+        chainid,
+        contract_address,
+        start_block,
+        end_block,
+        block_chunk_size,
+        max_block_chunk_size,
+        lake,
+        replay,
+    )
+    cursor = start_block
+    exhausted = False
+    fetch_failed = False
+
+    def _segment(chunk: ChunkMetrics):
+        nonlocal cursor, exhausted, fetch_failed
+        segment_bytes = 0
+        fetch_started = time.perf_counter()
+        try:
+            for from_block, to_block, rows in windows:
+                chunk.fetch_seconds += time.perf_counter() - fetch_started
+                cursor = to_block + 1
+                chunk.to_block = to_block
+                chunk.rows_fetched += len(rows)
+                if rows:
+                    yield rows
+                if commit_bytes:
+                    segment_bytes += sum(_approx_log_size(row) for row in rows)
+                if (commit_rows and chunk.rows_fetched >= commit_rows) or (
+                    commit_bytes and segment_bytes >= commit_bytes
+                ):
+                    return
+                fetch_started = time.perf_counter()
+        except Exception:
+            fetch_failed = True
+            raise
+        exhausted = True
+
+    while not exhausted:
+        chunk = ChunkMetrics(
+            table_name=table_name, from_block=cursor, to_block=cursor - 1
+        )
+        try:
+            load_started = time.perf_counter()
+            row_counts, load_bytes = _run_logs(
+                pipeline,
+                _segment(chunk),
+                table_name,
+                decoder,
+                upsert,
+                arrow,
+                copy_loader,
+            )
+            chunk.load_seconds = (
+                time.perf_counter() - load_started - chunk.fetch_seconds
+            )
+            chunk.rows_loaded = row_counts.get(table_name, 0)
+            chunk.load_bytes = load_bytes.get(table_name, 0)
+            logger.info(
+                f"Streamed {chunk.rows_loaded} logs from {chunk.from_block} to {chunk.to_block}"
+            )
+            if chunk.to_block >= chunk.from_block:
+                ledger.mark_done(
+                    table_name,
+                    chainid,
+                    contract_address,
+                    chunk.from_block,
+                    chunk.to_block,
+                )
+        except Exception as e:
+            logger.error(
+                f"Failed to stream logs from block {chunk.from_block} to {chunk.to_block}: {e}"
+            )
+            pipeline.drop_pending_packages()
+            if fetch_failed:
+                # The window generator is dead, queue the rest of the range
+                ledger.mark_failed(
+                    table_name,
+                    chainid,
+                    contract_address,
+                    chunk.from_block,
+                    end_block,
+                    str(e),
+                )
+                exhausted = True
+            elif chunk.to_block >= chunk.from_block:
+                # The segment was extracted, only its load failed
+                ledger.mark_failed(
+                    table_name,
+                    chainid,
+                    contract_address,
+                    chunk.from_block,
+                    chunk.to_block,
+                    str(e),
+                )
+        metrics.add(chunk)
+
+
 def logs(
     pipeline,
     pg_config: PostgresConfig,
@@ -15,15 +411,27 @@ def logs(
     start_block=None,
     end_block=None,
     block_chunk_size=100000,
-):
+    max_block_chunk_size=1_000_000,
+    ledger: Optional[BlockRangeLedger] = None,
+    streaming: bool = False,
+    commit_rows: Optional[int] = None,
+    commit_bytes: Optional[int] = None,
+    decoder: Optional[EventDecoder] = None,
+    upsert: bool = False,
+    arrow: bool = False,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+) -> LoadMetrics:
     """
     Load blockchain event logs for a specific contract address into PostgreSQL using DLT pipeline.
 
     This function performs incremental loading of blockchain logs by:
-    1. Determining the starting block (either from last loaded block or specified)
-    2. Fetching logs in configurable chunks to manage API rate limits
-    3. Loading data via DLT pipeline with retry logic for robustness
-    4. Tracking progress and warning about potential API limit hits
+    1. Retrying failed block ranges from the ledger whose backoff has elapsed
+    2. Determining the starting block (from the ledger, the last loaded block, or specified)
+    3. Fetching logs in adaptive block windows sized from observed log density
+    4. Loading data via DLT pipeline and recording each window in the ledger
+    5. Collecting per-chunk row counts, timings and sizes from the extractor
+       and the DLT load info, without querying the destination
 
     Args:
         pipeline (dlt.Pipeline): Configured DLT pipeline instance for data loading
@@ -37,14 +445,75 @@ def logs(
 
         start_block (int, optional): Starting block number. If None, continues from last loaded block
         end_block (int, optional): Ending block number. If None, uses latest blockchain block
-        block_chunk_size (int, optional): Number of blocks to process per batch. Defaults to 100000
+        block_chunk_size (int, optional): Initial number of blocks per window. Defaults to 100000
+        max_block_chunk_size (int, optional): Upper bound for window growth. Defaults to 1000000
+        ledger (BlockRangeLedger, optional): Block range ledger. Defaults to one in `table_schema`
+        streaming (bool, optional): Stream the whole block range through one pipeline run
+            instead of one run per window. Defaults to False
+        commit_rows (int, optional): In streaming mode, commit a run every this many rows
+        commit_bytes (int, optional): In streaming mode, commit a run every this many
+            (approximate) bytes of fetched logs
+        decoder (EventDecoder, optional): Also load the logs decoded with the contract
+            ABI, into one `{table_name}_{event}` table per event
+        upsert (bool, optional): Upsert logs on (chainid, transaction_hash, log_index)
+            instead of appending them, so reloaded ranges leave no duplicates.
+            Creates the unique index on the key, deduplicating the table once
+        arrow (bool, optional): Load pages as arrow tables typed from the column
+            hints, which dlt loads without normalizing every row
+        bulk (bool, optional): Load with `COPY` into staging tables and one
+            INSERT (or upsert) per table and run, bypassing the dlt pipeline
+        lake (RawLake, optional): Also write every fetched window to this raw
+            lake, to rebuild the tables from with `rebuild_logs`
 
     Note:
-        - Uses exponential backoff and retry logic for API failures
-        - Warns when exactly 1000 logs are loaded (potential API limit)
-        - Includes 0.2 second delay between batches to respect rate limits
+        - The table is indexed for the staging models after loading, see
+          `ensure_log_indexes`. Tables partitioned by block, see
+          `scripts/partition_log_tables.py`, get partitions attached for the
+          blocks about to be loaded
+        - Windows that hit the 1000-row getLogs cap are bisected and refetched,
+          windows over sparse ranges grow, so no logs are dropped at the cap
+        - Uses retry logic for API and load failures, ranges that still fail are
+          queued in the ledger with exponential backoff
         - Automatically determines incremental loading start point
+
+    Returns:
+        LoadMetrics: Per-chunk load metrics
     """
+    ledger = ledger or BlockRangeLedger(pg_config, table_schema)
+    metrics = LoadMetrics()
+    range_args = dict(
+        pipeline=pipeline,
+        ledger=ledger,
+        metrics=metrics,
+        table_name=table_name,
+        chainid=chainid,
+        contract_address=contract_address,
+        block_chunk_size=block_chunk_size,
+        max_block_chunk_size=max_block_chunk_size,
+        decoder=decoder,
+        upsert=upsert,
+        arrow=arrow,
+        copy_loader=CopyLoader(pg_config, table_schema) if bulk else None,
+        lake=lake,
+    )
+    if upsert:
+        ensure_unique_key(
+            pg_config, table_schema, table_name, BlockExplorerColumns.LogKey
+        )
+
+    load_range = _load_range
+    if streaming:
+        load_range = _stream_range
+        range_args.update(commit_rows=commit_rows, commit_bytes=commit_bytes)
+
+    for retry_from, retry_to in ledger.due_retries(
+        table_name, chainid, contract_address
+    ):
+        logger.info(f"Retrying failed block range {retry_from} to {retry_to}")
+        load_range(start_block=retry_from, end_block=retry_to, **range_args)
+
+    if start_block is None:
+        start_block = ledger.resume_block(table_name, chainid, contract_address)
     if start_block is None:
         start_block = get_loaded_block(
             pg_config,
@@ -58,45 +527,191 @@ def logs(
     if end_block is None:
         end_block = get_latest_block(chainid=chainid)
 
-    for from_block in range(start_block, end_block, block_chunk_size):
-        to_block = str(min(from_block + block_chunk_size - 1, end_block))
-        logger.info(f"Loading logs from block {from_block} to {to_block}")
-
-        max_retries = 2
-        retries = max_retries
-        while retries > 0:
-            try:
-                n_before = get_rows_count(pg_config, table_schema, table_name)
-                pipeline.run(
-                    etherscan_logs(
-                        chainid=chainid,
-                        address=contract_address,
-                        fromBlock=from_block,
-                        toBlock=to_block,
-                    ),
-                    table_name=table_name,
-                    write_disposition="append",
-                )
-                n_after = get_rows_count(pg_config, table_schema, table_name)
+    ensure_block_partitions(pg_config, table_schema, table_name, start_block, end_block)
+    load_range(start_block=start_block, end_block=end_block, **range_args)
+    if upsert:
+        # The table may only have been created by this load
+        ensure_unique_key(
+            pg_config, table_schema, table_name, BlockExplorerColumns.LogKey
+        )
+    ensure_log_indexes(pg_config, table_schema, table_name)
 
-                n = n_after - n_before
+    logger.info(f"Load metrics: {metrics.summary()}")
+    logger.info(f"Rate limiter: {etherscan_bucket.stats()}")
+    return metrics
 
-                if n >= 1000:
-                    logger.warning(
-                        f"Loaded {n} logs from {from_block} to {to_block}, smaller batch size may be needed."
-                    )
-                else:
-                    logger.info(f"Loaded {n} logs from {from_block} to {to_block}")
-                break  # Succeeded
-            except Exception as e:
-                retries -= 1
-                logger.error(
-                    f"Error loading logs: {e}. Retrying... ({retries} retries left)"
-                )
-                if retries > 0:
-                    time.sleep(3)
-                else:
-                    logger.error(
-                        f"Failed to load logs for block range {from_block}-{to_block} after {max_retries} retries."
-                    )
-        time.sleep(0.2)
+
+def repair_gaps(
+    pipeline,
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+    chainid: int,
+    contract_address: str,
+    start_block: Optional[int] = None,
+    block_chunk_size=10_000,
+    max_block_chunk_size=1_000_000,
+    ledger: Optional[BlockRangeLedger] = None,
+    decoder: Optional[EventDecoder] = None,
+    upsert: bool = True,
+    arrow: bool = False,
+    bulk: bool = False,
+    lake: Optional[RawLake] = None,
+    metrics: Optional[LoadMetrics] = None,
+) -> list[tuple[int, int]]:
+    """
+    Find block ranges missing from the ledger and refill them.
+
+    Gaps are computed from the ledger alone, so the raw table is not scanned.
+    Failed ranges are refilled regardless of their retry backoff.
+
+    Args:
+        start_block (int, optional): Also repair the range from this block up to
+            the first completed range, e.g. the contract creation block.
+            If None, only gaps between completed ranges are repaired. For a
+            table loaded before it had a ledger, that range is its whole
+            history, refetched and upserted again.
+        decoder (EventDecoder, optional): Also load the refilled logs decoded
+        upsert (bool, optional): Upsert the refilled logs on their key, so gaps
+            that already hold rows, loaded before the ledger existed or by a
+            load that failed before marking its range done, aren't duplicated.
+            Creates the unique index on the key, deduplicating the table once.
+            Without it, gaps holding rows raise a ValueError
+        arrow (bool, optional): Load the refilled logs as arrow tables
+        bulk (bool, optional): Load the refilled logs with `COPY`
+        lake (RawLake, optional): Also write the refilled windows to this raw lake
+        metrics (LoadMetrics, optional): Collects the per-chunk metrics of the refill
+
+    Returns:
+        list[tuple[int, int]]: The (from_block, to_block) gaps that were refilled
+
+    Raises:
+        ValueError: Without `upsert`, if gaps already hold rows
+    """
+    ledger = ledger or BlockRangeLedger(pg_config, table_schema)
+    copy_loader = CopyLoader(pg_config, table_schema) if bulk else None
+    metrics = metrics if metrics is not None else LoadMetrics()
+    gaps = ledger.find_gaps(table_name, chainid, contract_address, start_block)
+    logger.info(f"Found {len(gaps)} gaps for {contract_address} in {table_name}")
+    if upsert:
+        ensure_unique_key(
+            pg_config, table_schema, table_name, BlockExplorerColumns.LogKey
+        )
+    else:
+        loaded = get_loaded_ranges(
+            pg_config, table_schema, table_name, chainid, contract_address, gaps
+        )
+        if loaded:
+            raise ValueError(
+                f"Gaps {loaded} of {table_name} already hold logs of "
+                f"{contract_address}, repair them with upsert=True"
+            )
+    if gaps:
+        ensure_block_partitions(
+            pg_config, table_schema, table_name, gaps[0][0], gaps[-1][1]
+        )
+    for gap_from, gap_to in gaps:
+        logger.info(f"Repairing gap {gap_from} to {gap_to}")
+        _load_range(
+            pipeline=pipeline,
+            ledger=ledger,
+            metrics=metrics,
+            table_name=table_name,
+            chainid=chainid,
+            contract_address=contract_address,
+            start_block=gap_from,
+            end_block=gap_to,
+            block_chunk_size=block_chunk_size,
+            max_block_chunk_size=max_block_chunk_size,
+            decoder=decoder,
+            upsert=upsert,
+            arrow=arrow,
+            copy_loader=copy_loader,
+            lake=lake,
+        )
+    logger.info(f"Repair metrics: {metrics.summary()}")
+    return gaps
+
+
+def rebuild_logs(
+    pipeline,
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+    chainid: int,
+    contract_address: str,
+    lake: RawLake,
+    start_block: Optional[int] = None,
+    end_block: Optional[int] = None,
+    commit_rows: Optional[int] = 500_000,
+    ledger: Optional[BlockRangeLedger] = None,
+    decoder: Optional[EventDecoder] = None,
+    upsert: bool = True,
+    arrow: bool = False,
+    bulk: bool = False,
+) -> LoadMetrics:
+    """
+    Rebuild a raw log table from the windows in a raw lake instead of Etherscan.
+
+    Each contiguous block range of the lake is streamed like `logs(streaming=True)`,
+    with files read `lake.read_workers` at a time, and recorded in the ledger.
+    Blocks missing from the lake are left to `logs` or `repair_gaps`.
+
+    Args:
+        lake (RawLake): Raw lake the windows were written to by `logs`,
+            `repair_gaps` or `backfill_logs`
+        start_block (int, optional): First block to rebuild. Defaults to the lake's first
+        end_block (int, optional): Last block to rebuild. Defaults to the lake's last
+        commit_rows (int, optional): Commit a run every this many rows
+        upsert (bool, optional): Upsert logs on their key, so rebuilding over
+            rows already loaded leaves no duplicates. Defaults to True
+        decoder, arrow, bulk: As for `logs`
+
+    Returns:
+        LoadMetrics: Per-segment load metrics
+    """
+    ledger = ledger or BlockRangeLedger(pg_config, table_schema)
+    metrics = LoadMetrics()
+    copy_loader = CopyLoader(pg_config, table_schema) if bulk else None
+    if upsert:
+        ensure_unique_key(
+            pg_config, table_schema, table_name, BlockExplorerColumns.LogKey
+        )
+
+    coverage = lake.log_coverage(chainid, contract_address, start_block, end_block)
+    logger.info(
+        f"Rebuilding {table_name} for {contract_address} from {len(coverage)} lake ranges"
+    )
+    if coverage:
+        ensure_block_partitions(
+            pg_config, table_schema, table_name, coverage[0][0], coverage[-1][1]
+        )
+    for from_block, to_block in coverage:
+        # A stream stops at gaps, so a segment never spans blocks the lake lacks
+        _stream_range(
+            pipeline=pipeline,
+            ledger=ledger,
+            metrics=metrics,
+            table_name=table_name,
+            chainid=chainid,
+            contract_address=contract_address,
+            start_block=from_block,
+            end_block=to_block,
+            block_chunk_size=0,
+            max_block_chunk_size=0,
+            commit_rows=commit_rows,
+            decoder=decoder,
+            upsert=upsert,
+            arrow=arrow,
+            copy_loader=copy_loader,
+            lake=lake,
+            replay=True,
+        )
+    if upsert:
+        ensure_unique_key(
+            pg_config, table_schema, table_name, BlockExplorerColumns.LogKey
+        )
+    ensure_log_indexes(pg_config, table_schema, table_name)
+
+    logger.info(f"Rebuild metrics: {metrics.summary()}")
+    return metrics
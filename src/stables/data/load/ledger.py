@@ -0,0 +1,220 @@
+import logging
+from typing import Optional
+
+from stables.config import PostgresConfig
+from stables.utils.postgres import get_postgres_connection
+
+logger = logging.getLogger(__name__)
+
+
+class BlockRangeLedger:
+    """
+    Persistent ledger of loaded block ranges per (table, chainid, address).
+
+    Every fetched window is recorded as `done` once it is loaded, or as
+    `failed` with an exponential-backoff retry time. Resume points and gaps
+    are read from the ledger, so the raw log tables are never scanned.
+
+    Args:
+        pg_config: PostgresConfig instance
+        table_schema: Schema holding the raw log tables and the ledger
+        ledger_table: Name of the ledger table
+        retry_base_seconds: Delay before the first retry of a failed range,
+            doubled on every further attempt
+        max_attempts: Failed ranges are no longer retried automatically after
+            this many attempts, only by gap repair
+    """
+
+    def __init__(
+        self,
+        pg_config: PostgresConfig,
+        table_schema: str,
+        ledger_table: str = "block_range_ledger",
+        retry_base_seconds: int = 60,
+        max_attempts: int = 8,
+    ):
+        self.pg_config = pg_config
+        self.table_schema = table_schema
+        self.ledger_table = ledger_table
+        self.retry_base_seconds = retry_base_seconds
+        self.max_attempts = max_attempts
+        self._table_ready = False
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.table_schema}.{self.ledger_table}"
+
+    def _execute(self, query: str, params: Optional[tuple] = None, fetch=False):
+        self.ensure_table()
+        with get_postgres_connection(self.pg_config) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                result = cursor.fetchall() if fetch else None
+            conn.commit()
+        return result
+
+    def ensure_table(self) -> None:
+        """Create the ledger table and its indexes if they don't exist."""
+        if self._table_ready:
+            return
+        with get_postgres_connection(self.pg_config) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {self.table_schema}")
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.qualified_name} (
+                        table_name text NOT NULL,
+                        chainid bigint NOT NULL,
+                        address text NOT NULL,
+                        from_block bigint NOT NULL,
+                        to_block bigint NOT NULL,
+                        status text NOT NULL,
+                        attempts integer NOT NULL DEFAULT 0,
+                        next_retry_at timestamptz,
+                        error text,
+                        updated_at timestamptz NOT NULL DEFAULT now(),
+                        PRIMARY KEY (table_name, chainid, address, from_block)
+                    )
+                    """)
+                cursor.execute(f"""
+                    CREATE INDEX IF NOT EXISTS {self.ledger_table}_status_idx
+                    ON {self.qualified_name} (table_name, chainid, address, status, to_block)
+                    """)
+            conn.commit()
+        self._table_ready = True
+
+    def resume_block(
+        self, table_name: str, chainid: int, address: str
+    ) -> Optional[int]:
+        """
+        Get the block after the last completed range, or None if nothing was
+        recorded for the address yet.
+        """
+        result = self._execute(
+            f"""
+            SELECT MAX(to_block) FROM {self.qualified_name}
+            WHERE table_name = %s AND chainid = %s AND address = %s AND status = 'done'
+            """,
+            (table_name, chainid, address.lower()),
+            fetch=True,
+        )
+        if result and result[0][0] is not None:
+            return result[0][0] + 1
+        return None
+
+    def mark_done(
+        self,
+        table_name: str,
+        chainid: int,
+        address: str,
+        from_block: int,
+        to_block: int,
+    ) -> None:
+        """Record a loaded range and clear failed ranges it covers."""
+        address = address.lower()
+        self._execute(
+            f"""
+            DELETE FROM {self.qualified_name}
+            WHERE table_name = %s AND chainid = %s AND address = %s
+                AND status = 'failed' AND from_block >= %s AND to_block <= %s;
+            INSERT INTO {self.qualified_name}
+                (table_name, chainid, address, from_block, to_block, status)
+            VALUES (%s, %s, %s, %s, %s, 'done')
+            ON CONFLICT (table_name, chainid, address, from_block) DO UPDATE
+            SET to_block = EXCLUDED.to_block, status = 'done', error = NULL,
+                next_retry_at = NULL, updated_at = now()
+            """,
+            (table_name, chainid, address, from_block, to_block)
+            + (table_name, chainid, address, from_block, to_block),
+        )
+
+    def mark_failed(
+        self,
+        table_name: str,
+        chainid: int,
+        address: str,
+        from_block: int,
+        to_block: int,
+        error: str = None,
+    ) -> None:
+        """Queue a range for retry, backing off exponentially with each attempt."""
+        self._execute(
+            f"""
+            INSERT INTO {self.qualified_name} AS l
+                (table_name, chainid, address, from_block, to_block, status,
+                 attempts, next_retry_at, error)
+            VALUES (%s, %s, %s, %s, %s, 'failed', 1,
+                    now() + make_interval(secs => %s), %s)
+            ON CONFLICT (table_name, chainid, address, from_block) DO UPDATE
+            SET to_block = EXCLUDED.to_block, status = 'failed',
+                attempts = l.attempts + 1,
+                next_retry_at = now() + make_interval(secs => %s * power(2, l.attempts)),
+                error = EXCLUDED.error, updated_at = now()
+            """,
+            (
+                table_name,
+                chainid,
+                address.lower(),
+                from_block,
+                to_block,
+                self.retry_base_seconds,
+                error,
+                self.retry_base_seconds,
+            ),
+        )
+        logger.warning(
+            f"Queued block range {from_block}-{to_block} of {address} for retry: {error}"
+        )
+
+    def due_retries(
+        self, table_name: str, chainid: int, address: str
+    ) -> list[tuple[int, int]]:
+        """Get failed ranges whose backoff has elapsed."""
+        result = self._execute(
+            f"""
+            SELECT from_block, to_block FROM {self.qualified_name}
+            WHERE table_name = %s AND chainid = %s AND address = %s
+                AND status = 'failed' AND attempts < %s AND next_retry_at <= now()
+            ORDER BY from_block
+            """,
+            (table_name, chainid, address.lower(), self.max_attempts),
+            fetch=True,
+        )
+        return [tuple(row) for row in result]
+
+    def find_gaps(
+        self,
+        table_name: str,
+        chainid: int,
+        address: str,
+        start_block: Optional[int] = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Get block ranges not covered by completed ranges, from `start_block`
+        (or the first completed block) up to the last completed block.
+        """
+        address = address.lower()
+        result = self._execute(
+            f"""
+            WITH done AS (
+                SELECT from_block, to_block FROM {self.qualified_name}
+                WHERE table_name = %s AND chainid = %s AND address = %s
+                    AND status = 'done'
+                UNION ALL
+                -- sentinel so a gap before the first completed range is found
+                SELECT %s::bigint, %s::bigint - 1 WHERE %s::bigint IS NOT NULL
+            ),
+            ordered AS (
+                SELECT from_block, MAX(to_block) OVER (
+                    ORDER BY from_block
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                ) AS prev_end
+                FROM done
+            )
+            SELECT prev_end + 1, from_block - 1 FROM ordered
+            WHERE from_block > prev_end + 1
+            ORDER BY 1
+            """,
+            (table_name, chainid, address, start_block, start_block, start_block),
+            fetch=True,
+        )
+        return [tuple(row) for row in result]
@@ -0,0 +1,69 @@
+from dataclasses import dataclass, field, asdict
+
+import dlt
+from dlt.common.pipeline import LoadInfo
+
+
+@dataclass
+class ChunkMetrics:
+    """Accounting for one loaded block range of a table."""
+
+    table_name: str
+    from_block: int
+    to_block: int
+    rows_fetched: int = 0
+    rows_loaded: int = 0
+    fetch_seconds: float = 0.0
+    load_seconds: float = 0.0
+    load_bytes: int = 0
+
+
+@dataclass
+class LoadMetrics:
+    """Per-chunk load metrics collected from the extractor and dlt load info."""
+
+    chunks: list[ChunkMetrics] = field(default_factory=list)
+
+    def add(self, chunk: ChunkMetrics) -> None:
+        self.chunks.append(chunk)
+
+    @property
+    def rows_loaded(self) -> int:
+        return sum(chunk.rows_loaded for chunk in self.chunks)
+
+    @property
+    def load_bytes(self) -> int:
+        return sum(chunk.load_bytes for chunk in self.chunks)
+
+    def summary(self) -> dict:
+        """Totals over all chunks."""
+        return {
+            "chunks": len(self.chunks),
+            "rows_fetched": sum(chunk.rows_fetched for chunk in self.chunks),
+            "rows_loaded": self.rows_loaded,
+            "fetch_seconds": round(sum(c.fetch_seconds for c in self.chunks), 3),
+            "load_seconds": round(sum(c.load_seconds for c in self.chunks), 3),
+            "load_bytes": self.load_bytes,
+        }
+
+    def to_records(self) -> list[dict]:
+        """Chunks as dicts, e.g. for a DataFrame."""
+        return [asdict(chunk) for chunk in self.chunks]
+
+
+def load_info_stats(
+    pipeline: dlt.Pipeline, load_info: LoadInfo
+) -> tuple[dict[str, int], dict[str, int]]:
+    """
+    Get rows and bytes loaded per table by the last pipeline run.
+
+    Row counts come from the run's normalize info and bytes from the completed
+    load jobs, so no queries are made against the destination.
+    """
+    row_counts = dict(pipeline.last_trace.last_normalize_info.row_counts)
+    load_bytes: dict[str, int] = {}
+    for package in load_info.load_packages:
+        for job in package.jobs.get("completed_jobs", []):
+            table_name = job.job_file_info.table_name
+            load_bytes[table_name] = load_bytes.get(table_name, 0) + job.file_size
+    return row_counts, load_bytes
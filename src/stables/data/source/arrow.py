@@ -0,0 +1,188 @@
+import os
+import json
+import logging
+import datetime
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Optional
+
+import pyarrow as pa
+from dlt.common.normalizers.naming.snake_case import NamingConvention
+from dlt.extract.items import DataItemWithMeta
+
+logger = logging.getLogger(__name__)
+
+_naming = NamingConvention()
+
+# Rows per arrow table yielded by the resources
+ARROW_BATCH_SIZE = 10_000
+
+_ARROW_TYPES = {
+    "bigint": pa.int64(),
+    "double": pa.float64(),
+    "bool": pa.bool_(),
+    "text": pa.string(),
+    # dlt loads json columns from their serialized text
+    "json": pa.string(),
+    "timestamp": pa.timestamp("us", tz="UTC"),
+}
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Convert Etherscan hex quantities ("0x1a", "0x") and decimal strings to int."""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("0x"):
+            return int(value, 16) if len(value) > 2 else 0
+        return int(value) if value else None
+    return int(value)
+
+
+def _to_timestamp(value: Any) -> Optional[datetime.datetime]:
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromtimestamp(_to_int(value), tz=datetime.timezone.utc)
+
+
+def _to_json(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _to_decimal(value: Any) -> Optional[Decimal]:
+    if value is None or isinstance(value, Decimal):
+        return value
+    return Decimal(_to_int(value) if isinstance(value, str) else value)
+
+
+_CONVERTERS = {
+    "bigint": _to_int,
+    "timestamp": _to_timestamp,
+    "json": _to_json,
+    "decimal": _to_decimal,
+}
+
+
+def _arrow_type(hint: dict) -> pa.DataType:
+    if hint["data_type"] == "decimal":
+        precision, scale = hint.get("precision", 38), hint.get("scale", 9)
+        if precision > 38:
+            return pa.decimal256(precision, scale)
+        return pa.decimal128(precision, scale)
+    return _ARROW_TYPES[hint["data_type"]]
+
+
+def _column(name: str, values: list, hint: Optional[dict]) -> pa.Array:
+    """Build one typed column, inferring the type of columns without a hint."""
+    if hint is not None and "data_type" in hint:
+        convert = _CONVERTERS.get(hint["data_type"])
+        if convert is not None:
+            values = [convert(value) for value in values]
+        if hint["data_type"] == "decimal" and hint.get("precision", 38) > 76:
+            # Wider than arrow decimals, e.g. uint256 in numeric(78,0),
+            # passed as exact text for the destination to cast
+            return pa.array(
+                [None if v is None else str(v) for v in values], type=pa.string()
+            )
+        return pa.array(values, type=_arrow_type(hint))
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        # Mixed types, or ints wider than 64 bits
+        logger.debug(f"Column {name} has mixed types, loading it as text")
+        return pa.array(
+            [
+                None if v is None else v if isinstance(v, str) else _to_json(v)
+                for v in values
+            ],
+            type=pa.string(),
+        )
+
+
+def columns_to_arrow(
+    columns: dict[str, list], hints: Optional[dict[str, dict]] = None
+) -> pa.Table:
+    """
+    Build an arrow table from columnar data (column name -> values).
+
+    Args:
+        columns: Values per column, with normalized column names
+        hints: dlt column hints by column name, typing the matching columns
+    """
+    hints = hints or {}
+    return pa.table(
+        {
+            name: _column(name, values, hints.get(name))
+            for name, values in columns.items()
+        }
+    )
+
+
+def add_dlt_columns(pipeline) -> None:
+    """
+    Have a pipeline add dlt's load and row ids to the arrow tables it loads,
+    which dlt leaves out by default, so arrow batches can go into tables
+    created from dict rows, which require them.
+
+    The option is set in the pipeline's own config section, other pipelines
+    keep dlt's default.
+    """
+    section = pipeline.pipeline_name.upper()
+    for option in ("ADD_DLT_LOAD_ID", "ADD_DLT_ID"):
+        os.environ.setdefault(
+            f"{section}__NORMALIZE__PARQUET_NORMALIZER__{option}", "true"
+        )
+
+
+def rows_to_arrow(
+    rows: list[dict], hints: Optional[dict[str, dict]] = None
+) -> pa.Table:
+    """
+    Build an arrow table from rows, with column names normalized the way dlt
+    normalizes them (e.g. `blockNumber` -> `block_number`).
+
+    Args:
+        rows: Rows as dicts, keys missing from a row are loaded as null
+        hints: dlt column hints by normalized column name, typing the
+            matching columns, e.g. `BlockExplorerColumns.Log`
+    """
+    names: dict[str, str] = {}
+    for row in rows:
+        for key in row:
+            if key not in names:
+                names[key] = _naming.normalize_identifier(key)
+    columns = {names[key]: [row.get(key) for row in rows] for key in names}
+    return columns_to_arrow(columns, hints)
+
+
+def iter_arrow_batches(
+    items: Iterable[Any],
+    hints: Optional[dict[str, dict]] = None,
+    batch_size: int = ARROW_BATCH_SIZE,
+) -> Iterator[pa.Table]:
+    """
+    Collect rows, or pages (lists) of rows, into arrow tables of about
+    `batch_size` rows, to be yielded from a dlt resource. Arrow tables and
+    items marked for other tables (`dlt.mark`) are passed through.
+
+    dlt loads arrow tables column-wise, without normalizing each row.
+    """
+    batch: list[dict] = []
+    for item in items:
+        if isinstance(item, (pa.Table, DataItemWithMeta)):
+            if batch:
+                yield rows_to_arrow(batch, hints)
+                batch = []
+            yield item
+            continue
+        if isinstance(item, list):
+            batch.extend(item)
+        else:
+            batch.append(item)
+        if len(batch) >= batch_size:
+            yield rows_to_arrow(batch, hints)
+            batch = []
+    if batch:
+        yield rows_to_arrow(batch, hints)
@@ -0,0 +1,201 @@
+import logging
+import math
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional
+
+from stables.config import PostgresConfig
+from stables.utils.postgres import get_postgres_connection
+from stables.data.source.etherscan import get_latest_block
+
+logger = logging.getLogger(__name__)
+
+
+class BlockTimestampIndex:
+    """
+    In-memory block number <-> timestamp index of one chain.
+
+    The index is built from the (block_number, time_stamp) pairs of raw log
+    tables. Timestamp lookups bisect the index: a timestamp between two known
+    blocks that are adjacent resolves exactly, one in a wider gap is
+    interpolated, and only timestamps outside the index (or in gaps wider than
+    an allowed error, if given) fall back to `getblocknobytime`.
+
+    Args:
+        chainid: Chain the index covers
+        pairs: Initial (block_number, timestamp) pairs
+    """
+
+    def __init__(self, chainid: int, pairs: Iterable[tuple[int, int]] = ()):
+        self.chainid = chainid
+        self.blocks: list[int] = []
+        self.timestamps: list[int] = []
+        self.hits = 0
+        self.interpolated = 0
+        self.fallbacks = 0
+        self.add(pairs)
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    @classmethod
+    def from_postgres(
+        cls,
+        pg_config: PostgresConfig,
+        table_schema: str,
+        table_names: list[str],
+        chainid: int,
+    ) -> "BlockTimestampIndex":
+        """Build the index of a chain from raw log tables."""
+        index = cls(chainid)
+        index.refresh(pg_config, table_schema, table_names)
+        return index
+
+    def refresh(
+        self, pg_config: PostgresConfig, table_schema: str, table_names: list[str]
+    ) -> int:
+        """
+        Add blocks loaded into raw log tables since the last refresh. Tables
+        that don't exist yet are skipped.
+
+        Returns:
+            int: Number of blocks added
+        """
+        with get_postgres_connection(pg_config) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT name FROM unnest(%s::text[]) AS name "
+                    "WHERE to_regclass(%s || '.' || name) IS NOT NULL",
+                    (table_names, table_schema),
+                )
+                table_names = [name for (name,) in cursor.fetchall()]
+        if not table_names:
+            return 0
+        after = self.blocks[-1] if self.blocks else -1
+        union = " UNION ALL ".join(
+            f"SELECT block_number, time_stamp FROM {table_schema}.{table_name} "
+            f"WHERE chainid = %s AND block_number > %s"
+            for table_name in table_names
+        )
+        query = f"""
+        SELECT block_number, MIN(time_stamp) FROM ({union}) t
+        GROUP BY block_number ORDER BY block_number
+        """
+        with get_postgres_connection(pg_config) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, (self.chainid, after) * len(table_names))
+                rows = cursor.fetchall()
+        self.add((int(block), int(timestamp)) for block, timestamp in rows)
+        logger.info(
+            f"Block index for chain {self.chainid}: {len(rows)} blocks added, {len(self)} total"
+        )
+        return len(rows)
+
+    def add(self, pairs: Iterable[tuple[int, int]]) -> None:
+        """Add (block_number, timestamp) pairs."""
+        pairs = sorted(pairs)
+        if not pairs:
+            return
+        if self.blocks and pairs[0][0] <= self.blocks[-1]:
+            # Out of order insert, merge with what's known
+            pairs = sorted(
+                (dict(zip(self.blocks, self.timestamps)) | dict(pairs)).items()
+            )
+            self.blocks, self.timestamps = [], []
+        for block, timestamp in pairs:
+            if self.blocks and block == self.blocks[-1]:
+                continue
+            self.blocks.append(block)
+            self.timestamps.append(timestamp)
+
+    def timestamp_of(self, block_number: int) -> Optional[int]:
+        """
+        Get the timestamp of a block, interpolated between the nearest known
+        blocks, or None outside the index.
+        """
+        i = bisect_left(self.blocks, block_number)
+        if i < len(self.blocks) and self.blocks[i] == block_number:
+            return self.timestamps[i]
+        if i == 0 or i == len(self.blocks):
+            return None
+        b0, b1 = self.blocks[i - 1], self.blocks[i]
+        t0, t1 = self.timestamps[i - 1], self.timestamps[i]
+        return t0 + (block_number - b0) * (t1 - t0) // (b1 - b0)
+
+    def _bracket(self, timestamp: int, closest: str):
+        """
+        Get (block, max_error) from the index, block being exact when
+        max_error is 0, or None if the timestamp is outside the index.
+        """
+        if closest == "before":
+            i = bisect_right(self.timestamps, timestamp) - 1
+            if i < 0 or (i == len(self.blocks) - 1 and self.timestamps[i] != timestamp):
+                return None
+            if self.timestamps[i] == timestamp:
+                return self.blocks[i], 0
+            lo, hi = i, i + 1
+        else:
+            i = bisect_left(self.timestamps, timestamp)
+            if i == len(self.blocks) or (i == 0 and self.timestamps[i] != timestamp):
+                return None
+            if self.timestamps[i] == timestamp:
+                return self.blocks[i], 0
+            lo, hi = i - 1, i
+
+        b0, b1 = self.blocks[lo], self.blocks[hi]
+        t0, t1 = self.timestamps[lo], self.timestamps[hi]
+        max_error = b1 - b0 - 1
+        if max_error == 0:
+            return (b0 if closest == "before" else b1), 0
+        # Unknown blocks lie strictly between b0 and b1
+        estimate = b0 + (timestamp - t0) * (b1 - b0) / (t1 - t0)
+        if closest == "before":
+            block = min(max(math.floor(estimate), b0), b1 - 1)
+        else:
+            block = min(max(math.ceil(estimate), b0 + 1), b1)
+        return block, max_error
+
+    def block_at(
+        self,
+        timestamp: int,
+        closest: str = "before",
+        max_error_blocks: Optional[int] = None,
+    ) -> int:
+        """
+        Get the block closest to a timestamp, with the semantics of
+        `getblocknobytime`.
+
+        Args:
+            timestamp: Unix timestamp in seconds
+            closest: "before" for the last block at or before the timestamp,
+                "after" for the first block at or after it
+            max_error_blocks: Only accept an interpolated block when at most
+                this many blocks around it are unknown, 0 for exact answers
+                only. If None, any timestamp inside the index is resolved
+                locally
+
+        Returns:
+            int: The block number, from the index or else from the API
+        """
+        found = self._bracket(int(timestamp), closest)
+        if found is not None and (
+            max_error_blocks is None or found[1] <= max_error_blocks
+        ):
+            block, max_error = found
+            if max_error:
+                self.interpolated += 1
+            else:
+                self.hits += 1
+            return block
+
+        self.fallbacks += 1
+        logger.debug(f"Timestamp {timestamp} not covered by the block index")
+        return get_latest_block(self.chainid, timestamp=int(timestamp), closest=closest)
+
+    def stats(self) -> dict:
+        """Returns exact, interpolated and API-resolved lookup counts."""
+        return {
+            "blocks": len(self),
+            "hits": self.hits,
+            "interpolated": self.interpolated,
+            "fallbacks": self.fallbacks,
+        }
@@ -3,6 +3,7 @@ from datetime import datetime
 import dlt
 from dlt.sources.rest_api import RESTAPIConfig, rest_api_resources
 from stables.config import *
+from stables.data.source.http import api_transport
 
 
 def map_market_chart(data):
@@ -36,6 +37,7 @@ def coingecko_prices(
             "headers": {
                 "accept": "application/json",
             },
+            "session": api_transport.session(),
         },
         "resource_defaults": {
             "primary_key": "timestamp",
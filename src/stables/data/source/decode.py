@@ -0,0 +1,424 @@
+import re
+import logging
+from decimal import Decimal
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import dlt
+from dlt.common.normalizers.naming.snake_case import NamingConvention
+from eth_hash.auto import keccak
+
+from stables.config import BlockExplorerColumns
+from stables.data.source.arrow import columns_to_arrow
+from stables.data.source.etherscan import get_contract_abi
+
+logger = logging.getLogger(__name__)
+
+_naming = NamingConvention()
+
+# Columns every decoded event table carries, from the raw log
+BASE_COLUMNS = {
+    "chainid": {"data_type": "bigint"},
+    "address": {"data_type": "text"},
+    "block_number": {"data_type": "bigint"},
+    "time_stamp": {"data_type": "bigint"},
+    "log_index": {"data_type": "bigint"},
+    "transaction_hash": {"data_type": "text"},
+    "transaction_index": {"data_type": "bigint"},
+}
+
+# Wide integers go to numeric(78,0), which holds any (u)int256 exactly
+WIDE_INT_COLUMN = {"data_type": "decimal", "precision": 78, "scale": 0}
+
+_ARRAY = re.compile(r"^(.*)\[(\d*)\]$")
+
+
+def _canonical_type(param: dict) -> str:
+    """ABI type of a parameter as used in the event signature."""
+    abi_type = param["type"]
+    if abi_type.startswith("tuple"):
+        inner = ",".join(_canonical_type(c) for c in param.get("components", []))
+        return f"({inner}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+def event_signature(event: dict) -> str:
+    """Canonical signature of an ABI event, e.g. Transfer(address,address,uint256)."""
+    return f"{event['name']}({','.join(_canonical_type(p) for p in event['inputs'])})"
+
+
+def _is_dynamic(abi_type: str) -> bool:
+    match = _ARRAY.match(abi_type)
+    if match:
+        return match.group(2) == "" or _is_dynamic(match.group(1))
+    if abi_type.startswith("("):
+        return any(_is_dynamic(t) for t in _split_tuple(abi_type))
+    return abi_type in ("bytes", "string")
+
+
+def _split_tuple(abi_type: str) -> list[str]:
+    """Component types of a canonical tuple type like (uint256,(address,bool))."""
+    parts, depth, current = [], 0, ""
+    for char in abi_type[1:-1]:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _head_words(abi_type: str) -> int:
+    """Number of 32-byte words a type occupies in the head of the encoding."""
+    if _is_dynamic(abi_type):
+        return 1
+    match = _ARRAY.match(abi_type)
+    if match:
+        return int(match.group(2)) * _head_words(match.group(1))
+    if abi_type.startswith("("):
+        return sum(_head_words(t) for t in _split_tuple(abi_type))
+    return 1
+
+
+def _word_decoder(abi_type: str) -> Optional[Callable[[str], Any]]:
+    """Decoder of one 64 hex char word holding a static scalar, None if unsupported."""
+    if _ARRAY.match(abi_type) or abi_type.startswith("("):
+        return None
+    if abi_type == "address":
+        return lambda word: "0x" + word[24:]
+    if abi_type == "bool":
+        return lambda word: int(word, 16) != 0
+    if abi_type.startswith("uint"):
+        return lambda word: int(word, 16)
+    if abi_type.startswith("int"):
+
+        def _int(word: str) -> int:
+            value = int(word, 16)
+            return value - (1 << 256) if value >> 255 else value
+
+        return _int
+    match = re.match(r"^bytes(\d+)$", abi_type)
+    if match:
+        size = int(match.group(1))
+        return lambda word: "0x" + word[: 2 * size]
+    return None
+
+
+def _is_reference(abi_type: str) -> bool:
+    return _is_dynamic(abi_type) or bool(_ARRAY.match(abi_type)) or "(" in abi_type
+
+
+def _column_hint(abi_type: str, indexed: bool) -> dict:
+    """dlt column hint for a decoded parameter."""
+    if indexed and _is_reference(abi_type):
+        return {"data_type": "text"}  # only the keccak hash is logged
+    if _ARRAY.match(abi_type) or abi_type.startswith("("):
+        return {"data_type": "json"}
+    if abi_type == "bool":
+        return {"data_type": "bool"}
+    if abi_type.startswith("uint"):
+        bits = int(abi_type[4:] or 256)
+        return {"data_type": "bigint"} if bits < 64 else dict(WIDE_INT_COLUMN)
+    if abi_type.startswith("int"):
+        bits = int(abi_type[3:] or 256)
+        return {"data_type": "bigint"} if bits <= 64 else dict(WIDE_INT_COLUMN)
+    return {"data_type": "text"}
+
+
+@dataclass
+class EventParam:
+    name: str
+    abi_type: str
+    indexed: bool
+    # Integers wider than 64 bits are loaded as Decimal into numeric columns
+    wide: bool = False
+
+
+@dataclass
+class EventSpec:
+    """A decodable event: its topic hash, parameters and target columns."""
+
+    name: str
+    signature: str
+    topic0: str
+    params: list[EventParam]
+    columns: dict[str, dict] = field(default_factory=dict)
+
+    @classmethod
+    def from_abi(cls, event: dict) -> "EventSpec":
+        signature = event_signature(event)
+        topic0 = "0x" + keccak(signature.encode()).hex()
+        params, columns = [], dict(BASE_COLUMNS)
+        for i, param in enumerate(event["inputs"]):
+            name = param.get("name") or f"arg{i}"
+            if _naming.normalize_identifier(name) in columns:
+                name = f"arg_{name}"
+            abi_type = _canonical_type(param)
+            indexed = param.get("indexed", False)
+            hint = _column_hint(abi_type, indexed)
+            params.append(
+                EventParam(name, abi_type, indexed, wide=hint["data_type"] == "decimal")
+            )
+            columns[_naming.normalize_identifier(name)] = hint
+        return cls(event["name"], signature, topic0, params, columns)
+
+
+def _decode_value(data: str, offset: int, abi_type: str) -> Any:
+    """Decode a value whose head starts at hex char `offset` of `data`."""
+    word = data[offset : offset + 64]
+    if _is_dynamic(abi_type):
+        # The head holds the position of the tail, relative to the data start
+        tail = int(word, 16) * 2
+        return _decode_tail(data, tail, abi_type)
+
+    match = _ARRAY.match(abi_type)
+    if match:
+        inner, size = match.group(1), int(match.group(2))
+        step = _head_words(inner) * 64
+        return [_decode_value(data, offset + i * step, inner) for i in range(size)]
+    if abi_type.startswith("("):
+        values, position = [], offset
+        for inner in _split_tuple(abi_type):
+            values.append(_decode_value(data, position, inner))
+            position += _head_words(inner) * 64
+        return values
+    return _word_decoder(abi_type)(word)
+
+
+def _decode_tail(data: str, tail: int, abi_type: str) -> Any:
+    """Decode a dynamic value encoded at hex char `tail` of `data`."""
+    if abi_type in ("bytes", "string"):
+        length = int(data[tail : tail + 64], 16) * 2
+        raw = data[tail + 64 : tail + 64 + length]
+        if abi_type == "string":
+            return bytes.fromhex(raw).decode("utf-8", errors="replace")
+        return "0x" + raw
+
+    # Nested values are encoded relative to the start of their enclosing value
+    nested = data[tail:]
+    match = _ARRAY.match(abi_type)
+    if match:
+        inner, size = match.group(1), match.group(2)
+        if size == "":
+            # Dynamic arrays are prefixed with their length
+            size, nested = int(nested[:64], 16), nested[64:]
+        step = _head_words(inner) * 64
+        return [_decode_value(nested, i * step, inner) for i in range(int(size))]
+    values, position = [], 0
+    for inner in _split_tuple(abi_type):
+        values.append(_decode_value(nested, position, inner))
+        position += _head_words(inner) * 64
+    return values
+
+
+def _hex_ints(values: list) -> list:
+    # Etherscan returns 0 as "0x" for log and transaction indexes
+    return [
+        (int(v, 16) if v != "0x" else 0) if isinstance(v, str) else v for v in values
+    ]
+
+
+class EventDecoder:
+    """
+    Decodes raw Etherscan logs into typed columns using a contract ABI.
+
+    Logs are grouped by topic0 and every parameter is decoded as a whole
+    column, so per-row work is a slice and a conversion. Results are columnar
+    batches (column name -> list of values) per event, which can be loaded
+    as one table per event with `iter_tables`.
+
+    Args:
+        abi: Contract ABI, e.g. from `get_contract_abi`
+    """
+
+    def __init__(self, abi: list[dict]):
+        self.events: dict[str, EventSpec] = {}
+        for item in abi:
+            if item.get("type") == "event" and not item.get("anonymous"):
+                spec = EventSpec.from_abi(item)
+                self.events[spec.topic0] = spec
+        self.table_suffixes = self._table_suffixes()
+
+    @classmethod
+    def from_contract(cls, chainid, address, **kwargs) -> "EventDecoder":
+        """Build a decoder from a contract's ABI, read from disk when already saved."""
+        return cls(get_contract_abi(chainid, address, **kwargs))
+
+    def _table_suffixes(self) -> dict[str, str]:
+        names = [spec.name for spec in self.events.values()]
+        suffixes = {}
+        for topic0, spec in self.events.items():
+            suffix = _naming.normalize_identifier(spec.name)
+            if names.count(spec.name) > 1:
+                # Overloaded event names get their topic prefix appended
+                suffix = f"{suffix}_{topic0[2:10]}"
+            suffixes[topic0] = suffix
+        return suffixes
+
+    def decode(self, logs: list[dict]) -> dict[str, dict[str, list]]:
+        """
+        Decode raw logs into columnar batches keyed by event topic0.
+
+        Logs of events missing from the ABI are skipped.
+        """
+        groups: dict[str, list[dict]] = {}
+        for log in logs:
+            topics = log.get("topics") or []
+            if topics and topics[0] in self.events:
+                groups.setdefault(topics[0], []).append(log)
+
+        batches = {}
+        for topic0, group in groups.items():
+            spec = self.events[topic0]
+            columns = {
+                "chainid": [log.get("chainid") for log in group],
+                "address": [log["address"] for log in group],
+                "block_number": _hex_ints([log["blockNumber"] for log in group]),
+                "time_stamp": _hex_ints([log["timeStamp"] for log in group]),
+                "log_index": _hex_ints([log["logIndex"] for log in group]),
+                "transaction_hash": [log["transactionHash"] for log in group],
+                "transaction_index": _hex_ints(
+                    [log["transactionIndex"] for log in group]
+                ),
+            }
+            datas = [(log.get("data") or "0x")[2:] for log in group]
+            topic_position, offset = 1, 0
+            for param in spec.params:
+                if param.indexed:
+                    words = [log["topics"][topic_position][2:] for log in group]
+                    topic_position += 1
+                    decode_word = _word_decoder(param.abi_type)
+                    if _is_reference(param.abi_type):
+                        # Reference types are logged as the keccak hash of the value
+                        decode_word = lambda word: "0x" + word
+                    values = [decode_word(word) for word in words]
+                else:
+                    decode_word = _word_decoder(param.abi_type)
+                    if decode_word is not None:
+                        values = [
+                            decode_word(data[offset : offset + 64]) for data in datas
+                        ]
+                    else:
+                        values = [
+                            _decode_value(data, offset, param.abi_type)
+                            for data in datas
+                        ]
+                    offset += _head_words(param.abi_type) * 64
+                if param.wide:
+                    values = [Decimal(value) for value in values]
+                columns[param.name] = values
+            batches[topic0] = columns
+        return batches
+
+    def decode_many(
+        self, batches: Iterable[list[dict]], executor: Optional[Executor] = None
+    ) -> Iterator[dict[str, dict[str, list]]]:
+        """
+        Decode batches of logs, in order, on an executor if given. Use a
+        `ProcessPoolExecutor` to decode large backfills on several cores.
+        """
+        if executor is None:
+            yield from map(self.decode, batches)
+        else:
+            yield from executor.map(self.decode, batches)
+
+    def _table_hints(self, topic0: str, table_name: str) -> dict:
+        return dict(
+            table_name=f"{table_name}_{self.table_suffixes[topic0]}",
+            columns=self.events[topic0].columns,
+            primary_key=BlockExplorerColumns.LogKey,
+        )
+
+    def iter_tables(
+        self, batches: dict[str, dict[str, list]], table_name: str
+    ) -> Iterator[Any]:
+        """
+        Yield decoded batches as rows marked for one table per event, named
+        `{table_name}_{event}`, for use in a dlt resource.
+        """
+        for topic0, columns in batches.items():
+            rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+            yield dlt.mark.with_hints(
+                rows,
+                dlt.mark.make_hints(**self._table_hints(topic0, table_name)),
+                create_table_variant=True,
+            )
+
+    def _arrow_table(self, topic0: str, columns: dict[str, list]):
+        return columns_to_arrow(
+            {
+                _naming.normalize_identifier(name): values
+                for name, values in columns.items()
+            },
+            self.events[topic0].columns,
+        )
+
+    def iter_arrow_tables(
+        self, batches: dict[str, dict[str, list]], table_name: str
+    ) -> Iterator[tuple[str, Any, dict]]:
+        """
+        Yield decoded batches as (event table name, arrow table, column hints),
+        e.g. for `CopyLoader.load`.
+        """
+        for topic0, columns in batches.items():
+            hints = self._table_hints(topic0, table_name)
+            table = self._arrow_table(topic0, columns)
+            yield hints["table_name"], table, hints["columns"]
+
+    def arrow_resources(
+        self, batches: list[dict[str, dict[str, list]]], table_name: str
+    ) -> list:
+        """
+        Get one dlt resource per event table, loading decoded batches as arrow
+        tables. dlt can't route arrow tables to the table variants of
+        `iter_tables`, so every event table gets its own resource.
+        """
+        topics = {topic0 for batch in batches for topic0 in batch}
+        resources = []
+        for topic0 in topics:
+            hints = self._table_hints(topic0, table_name)
+            tables = [
+                self._arrow_table(topic0, batch[topic0])
+                for batch in batches
+                if topic0 in batch
+            ]
+            resources.append(
+                dlt.resource(iter(tables), name=hints.pop("table_name"), **hints)
+            )
+        return resources
+
+    def transformer(self, table_name: str):
+        """dlt transformer decoding the raw log batches of a `table_name` resource."""
+
+        def _decode(logs: list[dict]):
+            if isinstance(logs, dict):
+                logs = [logs]
+            yield from self.iter_tables(self.decode(logs), table_name)
+
+        return dlt.transformer(_decode, name=f"{table_name}_events")
+
+    def arrow_transformers(self, table_name: str) -> list:
+        """
+        dlt transformers decoding the raw log batches of a `table_name`
+        resource into arrow tables, one transformer per event table.
+        """
+
+        def _transformer(topic0: str):
+            def _decode(logs: list[dict]):
+                if isinstance(logs, dict):
+                    logs = [logs]
+                logs = [
+                    log for log in logs if (log.get("topics") or [None])[0] == topic0
+                ]
+                if logs:
+                    yield self._arrow_table(topic0, self.decode(logs)[topic0])
+
+            hints = self._table_hints(topic0, table_name)
+            return dlt.transformer(_decode, name=hints.pop("table_name"), **hints)
+
+        return [_transformer(topic0) for topic0 in self.events]
@@ -2,15 +2,74 @@ import dlt
 from dlt.sources.rest_api import rest_api_source
 from dlt.sources.helpers.rest_client import paginators
 from dlt.common.typing import TDataItems
-from typing import Iterable, Literal, Optional
+from dlt.extract.items import DataItemWithMeta
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Optional,
+    Sequence,
+    Union,
+)
 import json
 import logging
 import datetime
+import itertools
+import functools
 
+import pyarrow as pa
+import pyarrow.compute as pc
 
 logger = logging.getLogger(__name__)
 
 from stables.config import API_URL
+from stables.data.source.http import api_transport
+from stables.data.source.arrow import columns_to_arrow, rows_to_arrow
+from stables.data.source.lake import RawLake
+from stables.data.source.json_stream import iter_json_items
+
+# Value columns come as ints or floats, type them for arrow batches. The time
+# series resources yield arrow tables with `arrow`, as their load helpers do by
+# default: dlt loads them without normalizing every row, and their time column
+# is cast at once instead of parsed into a datetime per row
+STABLE_DATA_ARROW_COLUMNS = {"circulating": {"data_type": "bigint"}}
+TOKEN_PRICE_ARROW_COLUMNS = {
+    "price": {"data_type": "double"},
+    "confidence": {"data_type": "double"},
+}
+PROTOCOL_REVENUE_ARROW_COLUMNS = {"revenue": {"data_type": "double"}}
+
+# Bytes of a streamed response body parsed at a time
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Rows transformed at a time
+TRANSFORM_BATCH_SIZE = 10_000
+
+# Tables of the metadata of time series resources, one row per coin/protocol
+STABLECOIN_METADATA_TABLE = "stablecoin_metadata"
+PROTOCOL_METADATA_TABLE = "protocol_metadata"
+
+# Rows this far behind the last loaded time are yielded again, DeFiLlama
+# revises the latest points of its time series
+TIME_CURSOR_LOOKBACK = datetime.timedelta(days=2)
+
+
+def time_cursor(
+    lookback: datetime.timedelta = TIME_CURSOR_LOOKBACK,
+) -> dlt.sources.incremental:
+    """
+    Incremental cursor on the `time` column of the time series resources, so
+    a resource only yields rows newer than the last time loaded by its
+    pipeline, minus `lookback`. The cursor is kept in the pipeline state of
+    the resource, so resources of different series need different names,
+    e.g. `yield_pool(pool_id, pool_name, time=time_cursor()).with_name(...)`.
+    Rows without a time, like metadata rows, are always yielded.
+    """
+    return dlt.sources.incremental(
+        "time", lag=lookback.total_seconds(), on_cursor_value_missing="include"
+    )
 
 
 def _create_defillama_source(
@@ -24,6 +83,7 @@ def _create_defillama_source(
             "client": {
                 "base_url": base_url,
                 "paginator": paginators.SinglePagePaginator(),
+                "session": api_transport.session(),
             },
             "resources": [
                 {
@@ -40,6 +100,66 @@ def _create_defillama_source(
     return source.resources[endpoint]
 
 
+def _stream_defillama_items(
+    base_url: str,
+    endpoint: str,
+    path: Sequence[str],
+    params: Optional[dict] = None,
+) -> Iterator[tuple[tuple[str, ...], Any]]:
+    """
+    Items at a path of a DeFiLlama response, parsed from the body as it
+    downloads, see `iter_json_items`.
+    """
+    session = api_transport.session()
+    with session.get(
+        f"{base_url.rstrip('/')}/{endpoint}", params=params, stream=True
+    ) as response:
+        response.raise_for_status()
+        yield from iter_json_items(response.iter_content(STREAM_CHUNK_SIZE), path)
+
+
+def _selector_path(data_selector: str) -> list[str]:
+    """Keys of a data selector like "data", "$" selecting the whole response."""
+    if data_selector in ("", "$"):
+        return []
+    return data_selector.removeprefix("$.").split(".")
+
+
+def _fetch_items(
+    base_url: str,
+    endpoint: str,
+    data_selector: str,
+    params: Optional[dict] = None,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    stream: bool = False,
+) -> Iterable:
+    """
+    Items of a DeFiLlama endpoint, also written to the raw lake if given one,
+    or with `replay`, read back from the lake's latest response instead.
+    With `stream`, items are parsed from the response body as it downloads
+    instead of once the whole response is read.
+    """
+    if replay:
+        if lake is None:
+            raise ValueError("Replaying requires a raw lake")
+        return lake.read_responses(base_url, endpoint, params)
+    if stream:
+        items = (
+            item
+            for _, item in _stream_defillama_items(
+                base_url, endpoint, _selector_path(data_selector), params
+            )
+        )
+    else:
+        items = _create_defillama_source(
+            base_url, endpoint, data_selector, params or {}
+        )
+    if lake is not None:
+        return lake.tee_responses(base_url, endpoint, items, params)
+    return items
+
+
 def _timestamp_to_datetime(
     timestamp: int, timezone: datetime.timezone = datetime.timezone.utc
 ) -> datetime.datetime:
@@ -56,68 +176,234 @@ def _convert_fields_to_json(item: dict, fields: list[str]) -> None:
             item[field] = json.dumps(item[field])
 
 
-def _remove_fields(item: dict, fields: list[str]) -> None:
-    """Remove specified fields from item in place."""
+def _parse_time(value: Any) -> Any:
+    """
+    Parse a timestamp: an ISO datetime string (e.g. "2024-02-16T23:01:19.228Z"),
+    or Unix seconds as a number or string. Unparseable values are kept.
+    """
+    if not isinstance(value, str):
+        return _timestamp_to_datetime(value)
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            return _timestamp_to_datetime(int(value))
+        except ValueError:
+            return value
+
+
+def _json_columns(rows: list[dict], fields: Sequence[str]) -> None:
+    for field in fields:
+        for row in rows:
+            value = row.get(field)
+            if value:
+                row[field] = json.dumps(value)
+
+
+def _remove_columns(rows: list[dict], fields: Sequence[str]) -> None:
     for field in fields:
-        if field in item:
-            item.pop(field)
+        for row in rows:
+            row.pop(field, None)
 
 
-def _rename_fields(item: dict, field_mappings: dict[str, str]) -> None:
-    """Rename fields according to mapping in place."""
+def _rename_columns(rows: list[dict], field_mappings: dict[str, str]) -> None:
     for old_key, new_key in field_mappings.items():
-        if old_key in item:
-            item[new_key] = item.pop(old_key)
-
-
-def _process_timestamps(item: dict, timestamp_fields: list[str] = None) -> None:
-    """Convert timestamp fields to datetime objects in place."""
-    timestamp_fields = timestamp_fields or ["timestamp"]
-    for field in timestamp_fields:
-        if field in item and item[field] is not None:
-            timestamp_value = item.pop(field)
-            # Handle different timestamp formats
-            if isinstance(timestamp_value, str):
-                try:
-                    # Try parsing as ISO datetime string first (e.g., "2024-02-16T23:01:19.228Z")
-                    item["time"] = datetime.datetime.fromisoformat(
-                        timestamp_value.replace("Z", "+00:00")
-                    )
-                except ValueError:
-                    # If that fails, try as Unix timestamp string
-                    try:
-                        timestamp_value = int(timestamp_value)
-                        item["time"] = _timestamp_to_datetime(timestamp_value)
-                    except ValueError:
-                        # Keep original value if parsing fails
-                        item["time"] = timestamp_value
-            else:
-                # Assume it's a numeric Unix timestamp
-                item["time"] = _timestamp_to_datetime(timestamp_value)
-
-
-def _standardize_item(item: dict, transformations: dict = None) -> dict:
-    """Apply standard transformations to an item."""
-    if not transformations:
-        return item
-
-    # Apply field conversions
-    if "json_fields" in transformations:
-        _convert_fields_to_json(item, transformations["json_fields"])
-
-    # Remove unwanted fields
-    if "remove_fields" in transformations:
-        _remove_fields(item, transformations["remove_fields"])
-
-    # Rename fields
-    if "field_mappings" in transformations:
-        _rename_fields(item, transformations["field_mappings"])
-
-    # Convert timestamps
-    if "timestamp_fields" in transformations:
-        _process_timestamps(item, transformations["timestamp_fields"])
+        for row in rows:
+            if old_key in row:
+                row[new_key] = row.pop(old_key)
 
-    return item
+
+def _time_columns(rows: list[dict], fields: Sequence[str]) -> None:
+    for field in fields:
+        values = [row.get(field) for row in rows]
+        distinct = set(values)
+        distinct.discard(None)
+        if not distinct:
+            continue
+        if len(distinct) <= len(values) // 2:
+            # Series sharing timestamps, parse each distinct one once
+            times = {value: _parse_time(value) for value in distinct}
+            parsed = [times.get(value) for value in values]
+        else:
+            # Unix seconds inline, saving a call per value
+            utc = datetime.timezone.utc
+            parsed = [
+                (
+                    datetime.datetime.fromtimestamp(value, utc)
+                    if type(value) is int
+                    else None if value is None else _parse_time(value)
+                )
+                for value in values
+            ]
+        for row, value, time in zip(rows, values, parsed):
+            if value is not None:
+                del row[field]
+                row["time"] = time
+
+
+# Type of the time column of arrow batches
+_ARROW_TIME_TYPE = pa.timestamp("us", tz="UTC")
+
+
+def _time_array(values: list) -> pa.Array:
+    """
+    Parse a column of timestamps, see `_parse_time`, into an arrow timestamp
+    array with one cast: ints as Unix seconds, strings as ISO datetimes.
+    Columns that don't cast are parsed value by value.
+    """
+    try:
+        array = pa.array(values)
+        if pa.types.is_integer(array.type) or pa.types.is_null(array.type):
+            seconds = array.cast(pa.int64()).cast(pa.timestamp("s", tz="UTC"))
+            return seconds.cast(_ARROW_TIME_TYPE)
+        if pa.types.is_string(array.type):
+            return pc.cast(array, _ARROW_TIME_TYPE)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+    parsed = [None if value is None else _parse_time(value) for value in values]
+    return columns_to_arrow({"time": parsed}).column("time")
+
+
+def _pop_time_values(rows: list[dict], fields: Sequence[str]) -> Optional[list]:
+    """
+    Remove the timestamp fields from rows, returning their values, later
+    fields taking precedence, or None if no row has one. Rows keep fields
+    without a value, as with `_time_columns`.
+    """
+    times = None
+    for field in fields:
+        values = []
+        for row in rows:
+            value = row.get(field)
+            if value is not None:
+                del row[field]
+            values.append(value)
+        if any(value is not None for value in values):
+            times = (
+                values
+                if times is None
+                else [t if v is None else v for v, t in zip(values, times)]
+            )
+    return times
+
+
+RowTransform = Callable[[list[dict]], Union[list[dict], pa.Table]]
+
+
+def compile_transform(
+    json_fields: Sequence[str] = (),
+    remove_fields: Sequence[str] = (),
+    field_mappings: Optional[dict[str, str]] = None,
+    timestamp_fields: Sequence[str] = (),
+    arrow_columns: Optional[dict[str, dict]] = None,
+) -> RowTransform:
+    """
+    Compile row transformations into a function transforming a batch of rows
+    in place, column by column. Only the given steps run, in this order:
+
+    Args:
+        json_fields: Fields with a value serialized to JSON strings
+        remove_fields: Fields dropped
+        field_mappings: Fields renamed, old name -> new name
+        timestamp_fields: Fields parsed into a datetime `time` field, see
+            `_parse_time`, each distinct value once per batch if values repeat
+        arrow_columns: Return batches as arrow tables typed by these column
+            hints instead, with the timestamp fields cast into the `time`
+            column at once rather than parsed value by value
+
+    Returns:
+        RowTransform: Function transforming and returning a list of rows, or
+            an arrow table with `arrow_columns`
+    """
+    steps = []
+    if json_fields:
+        steps.append(functools.partial(_json_columns, fields=tuple(json_fields)))
+    if remove_fields:
+        steps.append(functools.partial(_remove_columns, fields=tuple(remove_fields)))
+    if field_mappings:
+        steps.append(
+            functools.partial(_rename_columns, field_mappings=dict(field_mappings))
+        )
+    if arrow_columns is not None:
+        timestamp_fields = tuple(timestamp_fields)
+
+        def transform_arrow(rows: list[dict]) -> pa.Table:
+            for step in steps:
+                step(rows)
+            times = _pop_time_values(rows, timestamp_fields)
+            table = rows_to_arrow(rows, arrow_columns)
+            if times is not None:
+                table = table.append_column("time", _time_array(times))
+            return table
+
+        return transform_arrow
+
+    if timestamp_fields:
+        steps.append(functools.partial(_time_columns, fields=tuple(timestamp_fields)))
+
+    def transform(rows: list[dict]) -> list[dict]:
+        for step in steps:
+            step(rows)
+        return rows
+
+    return transform
+
+
+def _transform_rows(
+    transform: RowTransform,
+    rows: Iterable[dict],
+    batch_size: int = TRANSFORM_BATCH_SIZE,
+) -> Iterator[Union[list[dict], pa.Table, DataItemWithMeta]]:
+    """
+    Transform rows in batches of `batch_size`, yielding each batch as a page
+    (list) of rows, or an arrow table. Items marked for other tables, e.g.
+    metadata rows, are yielded on their own.
+
+    Pages keep parallel extraction cheap, each item of a parallel resource
+    being fetched by a worker.
+    """
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, batch_size)):
+        page = [row for row in batch if isinstance(row, dict)]
+        if len(page) < len(batch):
+            yield from (item for item in batch if not isinstance(item, dict))
+        if page:
+            yield transform(page)
+
+
+def _metadata_row(row: dict, table_name: str, key: str) -> DataItemWithMeta:
+    """
+    Mark a metadata row for its own table, merged on `key`, which the time
+    series rows of the resource keep as foreign key.
+    """
+    return dlt.mark.with_hints(
+        row,
+        dlt.mark.make_hints(
+            table_name=table_name, write_disposition="merge", primary_key=key
+        ),
+        create_table_variant=True,
+    )
+
+
+_TIME_TRANSFORM = compile_transform(timestamp_fields=["timestamp"])
+_STABLE_DATA_ARROW_TRANSFORM = compile_transform(
+    timestamp_fields=["timestamp"], arrow_columns=STABLE_DATA_ARROW_COLUMNS
+)
+_TOKEN_PRICE_ARROW_TRANSFORM = compile_transform(
+    timestamp_fields=["timestamp"], arrow_columns=TOKEN_PRICE_ARROW_COLUMNS
+)
+_PROTOCOL_REVENUE_ARROW_TRANSFORM = compile_transform(
+    timestamp_fields=["timestamp"], arrow_columns=PROTOCOL_REVENUE_ARROW_COLUMNS
+)
+_STABLES_METADATA_TRANSFORM = compile_transform(
+    json_fields=["chains"],
+    remove_fields=["chainCirculating"],
+    field_mappings={
+        "pegType": "peg_type",
+        "pegMechanism": "peg_mechanism",
+        "priceSource": "price_source",
+    },
+)
 
 
 @dlt.resource(
@@ -125,7 +411,9 @@ def _standardize_item(item: dict, transformations: dict = None) -> dict:
         "price": {"data_type": "double", "nullable": True},
     }
 )
-def stables_metadata() -> Iterable[TDataItems]:
+def stables_metadata(
+    lake: Optional[RawLake] = None, replay: bool = False
+) -> Iterable[TDataItems]:
     """
     Fetches stablecoin data from DefiLlama and yields data for the 'stables' table.
     """
@@ -136,87 +424,105 @@ def stables_metadata() -> Iterable[TDataItems]:
             return data.get(peg_type)
         return None
 
-    source = _create_defillama_source(
-        API_URL.DeFiLlamaStablecoins, "stablecoins", data_selector="peggedAssets"
+    source = _fetch_items(
+        API_URL.DeFiLlamaStablecoins,
+        "stablecoins",
+        data_selector="peggedAssets",
+        lake=lake,
+        replay=replay,
     )
 
-    for item in source:
-        peg_type = item.get("pegType")
-        if not peg_type:
-            continue
+    def _flatten(items: Iterable[dict]) -> Iterable[dict]:
+        for item in items:
+            peg_type = item.get("pegType")
+            if not peg_type:
+                continue
 
-        # Convert nested circulating data to flat values
-        circulating_keys = [
-            "circulating",
-            "circulatingPrevDay",
-            "circulatingPrevWeek",
-            "circulatingPrevMonth",
-        ]
-        for key in circulating_keys:
-            if key in item:
-                item[key] = _get_circulating_value(item[key], peg_type)
-
-        # Apply standardized transformations
-        _standardize_item(
-            item,
-            {
-                "json_fields": ["chains"],
-                "remove_fields": ["chainCirculating"],
-                "field_mappings": {
-                    "pegType": "peg_type",
-                    "pegMechanism": "peg_mechanism",
-                    "priceSource": "price_source",
-                },
-            },
-        )
+            # Convert nested circulating data to flat values
+            circulating_keys = [
+                "circulating",
+                "circulatingPrevDay",
+                "circulatingPrevWeek",
+                "circulatingPrevMonth",
+            ]
+            for key in circulating_keys:
+                if key in item:
+                    item[key] = _get_circulating_value(item[key], peg_type)
+            yield item
 
-        yield item
+    yield from _transform_rows(_STABLES_METADATA_TRANSFORM, _flatten(source))
 
 
-@dlt.resource
-def stable_data(
+def _chain_balance_row(id: int, chain_name: str, entry: dict) -> Optional[dict]:
+    """
+    Row of a historical chainBalances entry, None if it has no circulating
+    value. Its timestamp is parsed by `_TIME_TRANSFORM`.
+    """
+    circulating_data = entry.get("circulating", {})
+    if not circulating_data:
+        return None
+
+    # Extract circulating value and timestamp
+    circulating_value = list(circulating_data.values())[0]
+    timestamp = entry.get("date")
+
+    item = {
+        "id": id,
+        "chain": chain_name,
+        "circulating": (
+            int(circulating_value) if circulating_value is not None else None
+        ),
+        "timestamp": timestamp,
+    }
+    return item
+
+
+def _stable_data_rows(
     id: int,
-    get_response: Literal[
-        "chainBalances", "currentChainBalances"
-    ] = "currentChainBalances",
-    include_metadata: bool = False,
-) -> Iterable[TDataItems]:
-    """Get chain circulating data for a specific stablecoin by ID with optional metadata inclusion."""
-    source = _create_defillama_source(
+    get_response: Literal["chainBalances", "currentChainBalances"],
+    include_metadata: bool,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    stream: bool = False,
+    metadata_table: str = STABLECOIN_METADATA_TABLE,
+) -> Iterable[dict]:
+    if (
+        stream
+        and get_response == "chainBalances"
+        and not include_metadata
+        and lake is None
+        and not replay
+    ):
+        # Parse the history entry by entry, never holding the whole response
+        entries = _stream_defillama_items(
+            API_URL.DeFiLlamaStablecoins,
+            f"stablecoin/{id}",
+            ["chainBalances", "*", "tokens"],
+        )
+        for (_, chain_name, _), entry in entries:
+            item = _chain_balance_row(id, chain_name, entry)
+            if item is not None:
+                yield item
+        return
+
+    source = _fetch_items(
         API_URL.DeFiLlamaStablecoins,
         f"stablecoin/{id}",
         data_selector="$",  # Get full response
+        lake=lake,
+        replay=replay,
+        stream=stream,
     )
 
-    def _process_chain_balances(response: dict, metadata: dict) -> Iterable[dict]:
+    def _process_chain_balances(response: dict) -> Iterable[dict]:
         """Process historical chainBalances data."""
         for chain_name, chain_data in response.get("chainBalances", {}).items():
             for entry in chain_data.get("tokens", []):
-                circulating_data = entry.get("circulating", {})
-                if not circulating_data:
-                    continue
-
-                # Extract circulating value and timestamp
-                circulating_value = list(circulating_data.values())[0]
-                timestamp = entry.get("date")
-
-                item = {
-                    "id": id,
-                    "chain": chain_name,
-                    "circulating": (
-                        int(circulating_value)
-                        if circulating_value is not None
-                        else None
-                    ),
-                    "timestamp": timestamp,
-                    **metadata,
-                }
-                _standardize_item(item, {"timestamp_fields": ["timestamp"]})
-                yield item
+                item = _chain_balance_row(id, chain_name, entry)
+                if item is not None:
+                    yield item
 
-    def _process_current_chain_balances(
-        response: dict, metadata: dict
-    ) -> Iterable[dict]:
+    def _process_current_chain_balances(response: dict) -> Iterable[dict]:
         """Process current chainBalances data."""
         for chain_name, chain_data in response.get("currentChainBalances", {}).items():
             if not isinstance(chain_data, dict) or not chain_data:
@@ -232,22 +538,21 @@ def stable_data(
                 "timestamp": int(
                     datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
                 ),
-                **metadata,
             }
-            _standardize_item(item, {"timestamp_fields": ["timestamp"]})
             yield item
 
     for response in source:
-        # Extract metadata once if requested
-        metadata = {}
+        # Yield the metadata once, keyed on the id of the rows
         if include_metadata:
             # Include all metadata fields, excluding the time-series data
             excluded_fields = {"chainBalances", "currentChainBalances"}
             metadata = {k: v for k, v in response.items() if k not in excluded_fields}
+            metadata["id"] = id
 
             # Convert nested objects/arrays to JSON strings for storage
             json_fields = ["auditLinks", "tokens"]
             _convert_fields_to_json(metadata, json_fields)
+            yield _metadata_row(metadata, metadata_table, "id")
 
         # Process responses based on requested data type
         processor = (
@@ -256,22 +561,58 @@ def stable_data(
             else _process_current_chain_balances
         )
 
-        yield from processor(response, metadata)
+        yield from processor(response)
 
 
 @dlt.resource
-def token_price(
-    network: str, contract_address: str, params: Optional[dict] = None
+def stable_data(
+    id: int,
+    get_response: Literal[
+        "chainBalances", "currentChainBalances"
+    ] = "currentChainBalances",
+    include_metadata: bool = False,
+    arrow: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    time: Optional[dlt.sources.incremental[datetime.datetime]] = None,
+    stream: bool = False,
+    metadata_table: str = STABLECOIN_METADATA_TABLE,
 ) -> Iterable[TDataItems]:
-    """Get token price data for a specific network and contract address."""
+    """
+    Get chain circulating data for a specific stablecoin by ID with optional metadata inclusion.
+
+    With `include_metadata`, the coin's metadata is yielded once into
+    `metadata_table`, merged on `id`, instead of into every row.
+
+    With `stream`, the response is parsed as it downloads. chainBalances rows
+    without metadata, and not written to a raw lake, then reach the pipeline
+    before the whole history is downloaded.
+    """
+    yield from _transform_rows(
+        _STABLE_DATA_ARROW_TRANSFORM if arrow else _TIME_TRANSFORM,
+        _stable_data_rows(
+            id, get_response, include_metadata, lake, replay, stream, metadata_table
+        ),
+    )
+
+
+def _token_price_rows(
+    network: str,
+    contract_address: str,
+    params: Optional[dict],
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+) -> Iterable[dict]:
     default_params = {"span": 1000, "period": "1d"}
     params = params or default_params
 
-    source = _create_defillama_source(
+    source = _fetch_items(
         "https://coins.llama.fi",
         f"chart/{network}:{contract_address}",
         data_selector="coins",
         params=params,
+        lake=lake,
+        replay=replay,
     )
 
     token_key = f"{network}:{contract_address}"
@@ -292,41 +633,51 @@ def token_price(
 
         # Yield price data for each timestamp
         for price_entry in token_info["prices"]:
-            item = {
-                **base_metadata,
-                **price_entry,  # Contains 'timestamp' and 'price'
-            }
-
-            # Apply standardized transformations
-            _standardize_item(
-                item,
-                {"timestamp_fields": ["timestamp"]},
-            )
+            item = base_metadata.copy()
+            item.update(price_entry)  # Contains 'timestamp' and 'price'
             yield item
 
 
 @dlt.resource
-def protocol_revenue(
-    protocol: str,
-    data_selector: Literal[
-        "totalDataChart", "totalDataChartBreakdown"
-    ] = "totalDataChartBreakdown",
-    include_metadata: bool = False,
+def token_price(
+    network: str,
+    contract_address: str,
+    params: Optional[dict] = None,
+    arrow: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    time: Optional[dlt.sources.incremental[datetime.datetime]] = None,
 ) -> Iterable[TDataItems]:
-    """Get protocol revenue data with optional metadata inclusion."""
-    source = _create_defillama_source(
+    """Get token price data for a specific network and contract address."""
+    yield from _transform_rows(
+        _TOKEN_PRICE_ARROW_TRANSFORM if arrow else _TIME_TRANSFORM,
+        _token_price_rows(network, contract_address, params, lake, replay),
+    )
+
+
+def _protocol_revenue_rows(
+    protocol: str,
+    data_selector: Literal["totalDataChart", "totalDataChartBreakdown"],
+    include_metadata: bool,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    metadata_table: str = PROTOCOL_METADATA_TABLE,
+) -> Iterable[dict]:
+    source = _fetch_items(
         "https://api.llama.fi",
         f"summary/fees/{protocol}",
         data_selector="$",  # Get full response to access metadata if needed
+        lake=lake,
+        replay=replay,
     )
 
     for response in source:
-        # Extract metadata once if requested
-        metadata = {}
+        # Yield the metadata once, keyed on the protocol of the rows
         if include_metadata:
             # Include all metadata fields, excluding the time-series data
             excluded_fields = {"totalDataChart", "totalDataChartBreakdown"}
             metadata = {k: v for k, v in response.items() if k not in excluded_fields}
+            metadata["protocol"] = protocol
 
             # Convert nested objects/arrays to JSON strings for storage
             json_fields = [
@@ -337,6 +688,7 @@ def protocol_revenue(
                 "linkedProtocols",
             ]
             _convert_fields_to_json(metadata, json_fields)
+            yield _metadata_row(metadata, metadata_table, "protocol")
 
         # Process the time-series data
         time_series_data = response.get(data_selector, [])
@@ -355,9 +707,7 @@ def protocol_revenue(
                     "timestamp": timestamp,
                     "revenue": data,
                     "protocol": protocol,
-                    **metadata,
                 }
-                _standardize_item(revenue_item, {"timestamp_fields": ["timestamp"]})
                 yield revenue_item
 
             else:  # totalDataChartBreakdown
@@ -375,56 +725,89 @@ def protocol_revenue(
                                 "protocol": protocol,
                                 "sub_protocol": sub_protocol,
                                 "revenue": revenue_value,
-                                **metadata,
                             }
-                            _standardize_item(
-                                revenue_item, {"timestamp_fields": ["timestamp"]}
-                            )
                             yield revenue_item
 
 
 @dlt.resource
-def all_yield_pools() -> Iterable[TDataItems]:
-    """Get the latest data for all yield pools."""
-    source = _create_defillama_source(
-        API_URL.DeFiLlamaYields, "pools", data_selector="data"
+def protocol_revenue(
+    protocol: str,
+    data_selector: Literal[
+        "totalDataChart", "totalDataChartBreakdown"
+    ] = "totalDataChartBreakdown",
+    include_metadata: bool = False,
+    arrow: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    time: Optional[dlt.sources.incremental[datetime.datetime]] = None,
+    metadata_table: str = PROTOCOL_METADATA_TABLE,
+) -> Iterable[TDataItems]:
+    """
+    Get protocol revenue data with optional metadata inclusion.
+
+    With `include_metadata`, the protocol's metadata is yielded once into
+    `metadata_table`, merged on `protocol`, instead of into every row.
+    """
+    yield from _transform_rows(
+        _PROTOCOL_REVENUE_ARROW_TRANSFORM if arrow else _TIME_TRANSFORM,
+        _protocol_revenue_rows(
+            protocol, data_selector, include_metadata, lake, replay, metadata_table
+        ),
     )
 
-    for pool in source:
-        # Extract token arrays before removing them
-        reward_tokens = pool.get("rewardTokens", []) or []
-        underlying_tokens = pool.get("underlyingTokens", []) or []
-
-        # Apply standardized transformations
-        _standardize_item(
-            pool,
-            {
-                "remove_fields": ["rewardTokens", "underlyingTokens"],
-                "field_mappings": {},  # Add any field renames if needed
-            },
-        )
 
-        # Add processed token arrays as JSON strings
+@dlt.resource
+def all_yield_pools(
+    lake: Optional[RawLake] = None, replay: bool = False, stream: bool = False
+) -> Iterable[TDataItems]:
+    """
+    Get the latest data for all yield pools, with `stream` parsed pool by pool
+    as the response downloads.
+    """
+    source = _fetch_items(
+        API_URL.DeFiLlamaYields,
+        "pools",
+        data_selector="data",
+        lake=lake,
+        replay=replay,
+        stream=stream,
+    )
+
+    for pool in source:
+        # Replace the token arrays by JSON strings
+        reward_tokens = pool.pop("rewardTokens", None) or []
+        underlying_tokens = pool.pop("underlyingTokens", None) or []
         pool["reward_tokens"] = json.dumps(reward_tokens)
         pool["underlying_tokens"] = json.dumps(underlying_tokens)
 
         yield pool
 
 
-@dlt.resource(
-    columns={
-        "apy_reward": {"data_type": "double", "nullable": True},
-        "il7d": {"data_type": "double", "nullable": True},
-        "apy_base7d": {"data_type": "double", "nullable": True},
-        "apy_base": {"data_type": "double", "nullable": True},
-        "apy": {"data_type": "double", "nullable": True},
-        "tvl_usd": {"data_type": "double", "nullable": True},
-    }
+YIELD_POOL_COLUMNS = {
+    "apy_reward": {"data_type": "double", "nullable": True},
+    "il7d": {"data_type": "double", "nullable": True},
+    "apy_base7d": {"data_type": "double", "nullable": True},
+    "apy_base": {"data_type": "double", "nullable": True},
+    "apy": {"data_type": "double", "nullable": True},
+    "tvl_usd": {"data_type": "double", "nullable": True},
+}
+_YIELD_POOL_ARROW_TRANSFORM = compile_transform(
+    timestamp_fields=["timestamp"], arrow_columns=YIELD_POOL_COLUMNS
 )
-def yield_pool(pool_id: str, pool_name: str) -> Iterable[TDataItems]:
-    """Get historical data for a yield pool."""
-    source = _create_defillama_source(
-        API_URL.DeFiLlamaYields, f"chart/{pool_id}", data_selector="data"
+
+
+def _yield_pool_rows(
+    pool_id: str,
+    pool_name: str,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+) -> Iterable[dict]:
+    source = _fetch_items(
+        API_URL.DeFiLlamaYields,
+        f"chart/{pool_id}",
+        data_selector="data",
+        lake=lake,
+        replay=replay,
     )
 
     # Common nullable fields that might be missing from the API
@@ -433,11 +816,20 @@ def yield_pool(pool_id: str, pool_name: str) -> Iterable[TDataItems]:
         # Add pool identification
         item["pool_id"] = pool_id
         item["pool_name"] = pool_name
+        yield item
 
-        # Apply standardized transformations
-        _standardize_item(
-            item,
-            {"timestamp_fields": ["timestamp"]},
-        )
 
-        yield item
+@dlt.resource(columns=YIELD_POOL_COLUMNS)
+def yield_pool(
+    pool_id: str,
+    pool_name: str,
+    arrow: bool = False,
+    lake: Optional[RawLake] = None,
+    replay: bool = False,
+    time: Optional[dlt.sources.incremental[datetime.datetime]] = None,
+) -> Iterable[TDataItems]:
+    """Get historical data for a yield pool."""
+    yield from _transform_rows(
+        _YIELD_POOL_ARROW_TRANSFORM if arrow else _TIME_TRANSFORM,
+        _yield_pool_rows(pool_id, pool_name, lake, replay),
+    )
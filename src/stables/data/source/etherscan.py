@@ -4,47 +4,98 @@ from datetime import datetime
 import dlt
 from dlt.sources.helpers.rest_client import paginators
 from dlt.sources.rest_api import rest_api_source
-from stables.config import API_URL, BlockExplorerColumns, ETHERSCAN_API_KEY
+from stables.config import (
+    API_URL,
+    BlockExplorerColumns,
+    ETHERSCAN_API_KEY,
+    ETHERSCAN_CALLS_PER_SECOND,
+    ETHERSCAN_BURST,
+    METADATA_CACHE_DIR,
+    LATEST_BLOCK_TTL_SECONDS,
+)
+from stables.utils.cache import MetadataCache
+from stables.utils.ratelimit import TokenBucket, default_state_path
+from stables.data.source.http import HttpTransport, etherscan_transport
+from stables.data.source.arrow import iter_arrow_batches
+from stables.data.source.lake import RawLake
 import json
 import time
 import logging
+import threading
+from typing import Iterator, Optional
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 
-class RateLimitedSession(requests.Session):
-    """Simple rate-limited session for Etherscan API"""
+etherscan_bucket = TokenBucket(
+    rate=ETHERSCAN_CALLS_PER_SECOND,
+    capacity=ETHERSCAN_BURST,
+    state_path=default_state_path("etherscan"),
+)
 
-    def __init__(self, calls_per_second=5):
-        super().__init__()
-        self.calls_per_second = calls_per_second
-        self.last_request_time = 0
-        self.min_interval = 1.0 / calls_per_second
-        self.request_count = 0
 
-    def request(self, method, url, **kwargs):
-        # Rate limiting
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_interval:
-            sleep_time = self.min_interval - time_since_last
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.3f}s")
-            time.sleep(sleep_time)
+def _is_rate_limited(response: requests.Response) -> bool:
+    """Whether Etherscan rejected the call for exceeding the rate limit."""
+    if response.status_code == 429:
+        return True
+    # Etherscan answers 200 with a small NOTOK body like "Max calls per sec rate limit reached"
+    return len(response.content) < 512 and b"rate limit" in response.content.lower()
 
-        self.last_request_time = time.time()
-        self.request_count += 1
 
-        # Log API call
-        logger.info(f"API Call #{self.request_count}: {method} {url}")
-
-        response = super().request(method, url, **kwargs)
+class RateLimitedSession(requests.Session):
+    """
+    Rate-limited session for Etherscan API.
 
-        # Log response status
-        logger.info(
-            f"Response #{self.request_count}: {response.status_code} - {response.reason}"
-        )
+    Every request takes a token from a bucket shared by all sessions, threads
+    and worker processes, and rate-limited responses pause the bucket with
+    exponential backoff before the request is retried. Connections come from
+    the shared Etherscan transport pool.
+    """
 
+    def __init__(
+        self,
+        bucket: TokenBucket = None,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        transport: HttpTransport = None,
+    ):
+        super().__init__()
+        self.transport = transport or etherscan_transport
+        self.transport.mount(self)
+        self.bucket = bucket or etherscan_bucket
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # rest_api_source deep-copies its config (including the session) to validate it
+        return self
+
+    def send(self, request, **kwargs):
+        # dlt's REST client calls send() directly, so the limit is enforced here
+        kwargs.setdefault("timeout", self.transport.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            with self._count_lock:
+                self.request_count += 1
+                request_number = self.request_count
+
+            # Log API call
+            logger.info(
+                f"API Call #{request_number}: {request.method} {request.url.split('?')[0]}"
+            )
+
+            response = super().send(request, **kwargs)
+
+            # Log response status
+            logger.info(
+                f"Response #{request_number}: {response.status_code} - {response.reason}"
+            )
+            if not _is_rate_limited(response) or attempt == self.max_retries:
+                return response
+            self.bucket.pause(self.backoff_seconds * 2**attempt)
         return response
 
 
@@ -53,7 +104,7 @@ def _create_etherscan_source(params: dict):
     Creates a dlt rest_api_source for a given set of Etherscan API parameters.
     It includes a rate-limited session for the client.
     """
-    session = RateLimitedSession(calls_per_second=5)
+    session = RateLimitedSession()
     return rest_api_source(
         {
             "client": {
@@ -100,6 +151,12 @@ def etherscan_transactions(
     return _create_etherscan_source(params)
 
 
+def _with_chainid(items, chainid):
+    for item in items:
+        item["chainid"] = chainid
+        yield item
+
+
 @dlt.resource(columns=BlockExplorerColumns.Log)
 def etherscan_logs(
     chainid,
@@ -109,8 +166,12 @@ def etherscan_logs(
     fromBlock=0,
     toBlock="latest",
     offset=1000,
+    arrow: bool = False,
 ):
-    """dlt resource to get event logs for a given address."""
+    """
+    dlt resource to get event logs for a given address, as arrow tables
+    typed from `BlockExplorerColumns.Log` with `arrow`.
+    """
     params = {
         "chainid": chainid,
         "module": module,
@@ -126,31 +187,39 @@ def etherscan_logs(
     )
 
     source = _create_etherscan_source(params)
-    for item in source:
-        item["chainid"] = chainid
-        yield item
+    items = _with_chainid(source, chainid)
+    if arrow:
+        yield from iter_arrow_batches(items, BlockExplorerColumns.Log)
+    else:
+        yield from items
 
 
 # --- Refactored V2 API Calls ---
 
-_v2_session = RateLimitedSession(calls_per_second=5)
+_v2_session = RateLimitedSession()
 
 
-def _etherscan_v2_call(params: dict):
+def _etherscan_v2_call(
+    params: dict, allow_empty: bool = False, session: RateLimitedSession = None
+):
     """
     Helper to make a call to the Etherscan 'v2' API.
     It uses a shared, rate-limited session and handles common error checking.
+    With `allow_empty`, a "No records found" response returns an empty list
+    instead of raising.
     """
     base_url = "https://api.etherscan.io/v2/api"
     params["apikey"] = ETHERSCAN_API_KEY
 
-    response = _v2_session.get(base_url, params=params)
+    response = (session or _v2_session).get(base_url, params=params)
     response.raise_for_status()
     data = response.json()
 
     # Check for API errors
     if data.get("status") == "0":
         message = data.get("message", "Etherscan API error")
+        if allow_empty and message.lower().startswith("no records found"):
+            return []
         logger.error(f"API error: {message}")
         if "rate limit" in message.lower():
             raise Exception(f"Etherscan rate limit exceeded: {message}")
@@ -159,10 +228,36 @@ def _etherscan_v2_call(params: dict):
     return data["result"]
 
 
-def get_latest_block(chainid, timestamp: int = None, closest="before"):
-    """Gets the latest block number, or the block number closest to a timestamp."""
+# Chain metadata caches, creation blocks never change so they never expire
+creation_cache = MetadataCache(
+    os.path.join(METADATA_CACHE_DIR, "contract_creation.json")
+)
+block_cache = MetadataCache(os.path.join(METADATA_CACHE_DIR, "block_by_timestamp.json"))
+
+FINALITY_SECONDS = 15 * 60  # blocks older than this are cached without expiry
+CONTRACT_CREATION_BATCH = 5  # max addresses per getcontractcreation call
+
+
+def get_latest_block(chainid, timestamp: int = None, closest="before", use_cache=True):
+    """
+    Gets the latest block number, or the block number closest to a timestamp.
+
+    Lookups are cached: the latest block for `LATEST_BLOCK_TTL_SECONDS`, blocks
+    of recent timestamps likewise, and blocks of final timestamps forever.
+    """
+    now = int(datetime.now().timestamp())
     if timestamp is None:
-        timestamp = int(datetime.now().timestamp())
+        key, ttl = f"{chainid}:latest", LATEST_BLOCK_TTL_SECONDS
+        timestamp = now
+    else:
+        key = f"{chainid}:{timestamp}:{closest}"
+        ttl = None if timestamp < now - FINALITY_SECONDS else LATEST_BLOCK_TTL_SECONDS
+
+    if use_cache:
+        cached = block_cache.get(key)
+        if cached is not None:
+            logger.debug(f"Block for {key} served from cache: {cached}")
+            return cached
 
     logger.info(f"Getting latest block for chain {chainid}")
 
@@ -177,11 +272,26 @@ def get_latest_block(chainid, timestamp: int = None, closest="before"):
 
     latest_block = int(result)
     logger.info(f"Latest block: {latest_block}")
+    if use_cache:
+        block_cache.set(key, latest_block, ttl=ttl)
     return latest_block
 
 
-def get_contract_abi(chainid, address, save=True, save_dir: str = "data/abi"):
-    """Gets the ABI for a given contract address."""
+def get_contract_abi(
+    chainid, address, save=True, save_dir: str = "data/abi", use_cache=True
+):
+    """
+    Gets the ABI for a given contract address.
+
+    With `use_cache`, an ABI previously saved to `save_dir` is read back
+    instead of calling the API.
+    """
+    path = os.path.join(save_dir, f"{address}.json")
+    if use_cache and os.path.exists(path):
+        logger.debug(f"ABI for contract {address} read from {path}")
+        with open(path) as f:
+            return json.load(f)
+
     logger.info(f"Getting ABI for contract {address} on chain {chainid}")
 
     params = {
@@ -197,41 +307,207 @@ def get_contract_abi(chainid, address, save=True, save_dir: str = "data/abi"):
 
     if save:
         os.makedirs(save_dir, exist_ok=True)
-        with open(os.path.join(save_dir, f"{address}.json"), "w") as f:
+        with open(path, "w") as f:
             json.dump(abi_json, f, indent=2)
-        logger.info(f"ABI saved to {os.path.join(save_dir, f'{address}.json')}")
+        logger.info(f"ABI saved to {path}")
 
     return abi_json
 
 
-def get_contract_creation_txn(chainid, contract_addresses):
+def get_contract_creation_txn(chainid, contract_addresses, use_cache=True):
     """
     Gets contract creation block numbers for one or more contract addresses.
 
+    Cached addresses are served from the metadata cache; the others are
+    queried in batches of up to 5 addresses per call and cached.
+
     Args:
         chainid: The chain ID.
         contract_addresses: A single contract address string or a list of contract address strings.
+        use_cache: Read and write the contract creation cache.
 
     Returns:
-        A tuple containing:
-        - A dictionary mapping contract addresses (lowercase) to their creation block numbers.
-        - The raw API response.
+        The creation info (contractAddress, contractCreator, txHash,
+        blockNumber, ...) of a single address, or a list for multiple addresses.
     """
     # Handle single address case
     if isinstance(contract_addresses, str):
         contract_addresses = [contract_addresses]
 
-    logger.info(
-        f"Getting creation block numbers for {len(contract_addresses)} contracts on chain {chainid}"
-    )
+    keys = {address: f"{chainid}:{address.lower()}" for address in contract_addresses}
+    found = creation_cache.get_many(keys.values()) if use_cache else {}
+    missing = [address for address in contract_addresses if keys[address] not in found]
 
-    params = {
-        "chainid": chainid,
-        "module": "contract",
-        "action": "getcontractcreation",
-        "contractaddresses": ",".join(contract_addresses),
-    }
-    result = _etherscan_v2_call(params)
+    if missing:
+        logger.info(
+            f"Getting creation block numbers for {len(missing)} contracts on chain {chainid}"
+        )
+    fetched = {}
+    for i in range(0, len(missing), CONTRACT_CREATION_BATCH):
+        params = {
+            "chainid": chainid,
+            "module": "contract",
+            "action": "getcontractcreation",
+            "contractaddresses": ",".join(missing[i : i + CONTRACT_CREATION_BATCH]),
+        }
+        for item in _etherscan_v2_call(params):
+            fetched[f"{chainid}:{item['contractAddress'].lower()}"] = item
+    if fetched and use_cache:
+        creation_cache.set_many(fetched)
+    found.update(fetched)
+
+    result = [
+        found[keys[address]] for address in contract_addresses if keys[address] in found
+    ]
     if len(result) == 1:
         return result[0]
     return result
+
+
+# --- Adaptive getLogs windows ---
+
+LOGS_RESULT_CAP = 1000  # max records returned by a single getLogs call
+
+
+def get_logs(
+    chainid, address, from_block: int, to_block: int, page=1, offset=LOGS_RESULT_CAP
+) -> list[dict]:
+    """Gets one page of event logs for an address, without pagination."""
+    params = {
+        "chainid": chainid,
+        "module": "logs",
+        "action": "getLogs",
+        "address": address,
+        "fromBlock": from_block,
+        "toBlock": to_block,
+        "page": page,
+        "offset": offset,
+    }
+    return _etherscan_v2_call(params, allow_empty=True)
+
+
+class LogWindowPlanner:
+    """
+    Sizes getLogs block windows from the observed log density.
+
+    A window that saturates the result cap is halved and retried; an accepted
+    window moves the cursor forward and sizes the next window so that it is
+    expected to hold `target_rows` logs, growing at most `growth_factor` times
+    per step across sparse stretches.
+    """
+
+    def __init__(
+        self,
+        from_block: int,
+        to_block: int,
+        chunk_size: int = 10_000,
+        min_chunk_size: int = 1,
+        max_chunk_size: int = 1_000_000,
+        target_rows: int = LOGS_RESULT_CAP // 2,
+        growth_factor: int = 4,
+        result_cap: int = LOGS_RESULT_CAP,
+    ):
+        self.cursor = from_block
+        self.to_block = to_block
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.target_rows = target_rows
+        self.growth_factor = growth_factor
+        self.result_cap = result_cap
+        self.chunk_size = self._clamp(chunk_size)
+        self.calls = 0
+        self.splits = 0
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_chunk_size, min(self.max_chunk_size, int(size)))
+
+    @property
+    def done(self) -> bool:
+        return self.cursor > self.to_block
+
+    def next_window(self) -> tuple[int, int]:
+        """Returns the (from_block, to_block) window to fetch next."""
+        return self.cursor, min(self.cursor + self.chunk_size - 1, self.to_block)
+
+    def observe(self, from_block: int, to_block: int, n_rows: int) -> bool:
+        """
+        Records the result of fetching a window.
+
+        Returns False if the window saturated the cap and must be refetched
+        with the (now smaller) next window, True if it was accepted.
+        """
+        self.calls += 1
+        span = to_block - from_block + 1
+        if n_rows >= self.result_cap and span > self.min_chunk_size:
+            self.splits += 1
+            self.chunk_size = self._clamp(span // 2)
+            return False
+
+        if n_rows:
+            next_size = span * self.target_rows / n_rows
+        else:
+            next_size = span * self.growth_factor
+        self.chunk_size = self._clamp(min(next_size, span * self.growth_factor))
+        self.cursor = to_block + 1
+        return True
+
+
+def _get_logs_with_retry(chainid, address, from_block, to_block, page, max_retries):
+    for attempt in range(max_retries + 1):
+        try:
+            return get_logs(chainid, address, from_block, to_block, page=page)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            logger.error(
+                f"Error fetching logs {from_block}-{to_block}: {e}. Retrying... ({max_retries - attempt} retries left)"
+            )
+            time.sleep(3)
+
+
+def iter_log_windows(
+    chainid,
+    address,
+    from_block: int,
+    to_block: int,
+    chunk_size: int = 10_000,
+    max_chunk_size: int = 1_000_000,
+    max_retries: int = 2,
+    lake: Optional[RawLake] = None,
+) -> Iterator[tuple[int, int, list[dict]]]:
+    """
+    Yields (from_block, to_block, logs) for consecutive windows covering the
+    block range, bisecting windows that hit the getLogs result cap.
+
+    A single block holding more logs than the cap is paged through, so every
+    yielded window is complete. Given a `lake`, every window is also written
+    to it as fetched.
+    """
+    planner = LogWindowPlanner(
+        from_block, to_block, chunk_size=chunk_size, max_chunk_size=max_chunk_size
+    )
+    while not planner.done:
+        start, end = planner.next_window()
+        rows = _get_logs_with_retry(chainid, address, start, end, 1, max_retries)
+        if not planner.observe(start, end, len(rows)):
+            logger.debug(f"Window {start}-{end} hit the result cap, splitting")
+            continue
+
+        page = 1
+        last_page = rows
+        while len(last_page) >= LOGS_RESULT_CAP:
+            page += 1
+            last_page = _get_logs_with_retry(
+                chainid, address, start, end, page, max_retries
+            )
+            rows.extend(last_page)
+
+        for row in rows:
+            row["chainid"] = chainid
+        if lake is not None:
+            lake.write_logs(chainid, address, start, end, rows)
+        yield start, end, rows
+
+    logger.info(
+        f"Fetched logs for {address} in {planner.calls} windows ({planner.splits} splits)"
+    )
@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import weakref
+from typing import AsyncIterator, Callable, Hashable
+
+import dlt
+
+from stables.config import BlockExplorerColumns, ETHERSCAN_BURST
+from stables.data.source.etherscan import (
+    CONTRACT_CREATION_BATCH,
+    LOGS_RESULT_CAP,
+    RateLimitedSession,
+    _etherscan_v2_call,
+)
+
+logger = logging.getLogger(__name__)
+
+RESULT_WINDOW = 10_000  # Etherscan rejects paged calls with page * offset above this
+
+
+def _log_key(row: dict) -> Hashable:
+    return row["transactionHash"], row["logIndex"]
+
+
+def _transaction_key(row: dict) -> Hashable:
+    return row["hash"], row.get("transactionIndex")
+
+
+class AsyncEtherscanClient:
+    """
+    asyncio client for the Etherscan v2 API.
+
+    Calls run on worker threads over a `RateLimitedSession`, so they take
+    tokens from the same bucket and connections from the same pool as the
+    blocking helpers in `stables.data.source.etherscan`, while up to
+    `max_in_flight` requests are outstanding at once. Paged endpoints fetch
+    pages concurrently once they are known to hold rows, see
+    `_iter_result_window`.
+
+    Args:
+        max_in_flight: Max concurrent requests, defaults to the rate limiter burst
+        session: Rate-limited session used to send the requests
+    """
+
+    def __init__(self, max_in_flight: int = None, session: RateLimitedSession = None):
+        self.session = session or RateLimitedSession()
+        self.max_in_flight = max_in_flight or max(1, int(ETHERSCAN_BURST))
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # A semaphore is bound to the event loop it is first used on
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphores[loop]
+
+    async def call(self, params: dict, allow_empty: bool = False):
+        """Make an Etherscan v2 call without blocking the event loop."""
+        async with self._semaphore():
+            return await asyncio.to_thread(
+                _etherscan_v2_call, dict(params), allow_empty, self.session
+            )
+
+    async def get_logs(
+        self,
+        chainid,
+        address,
+        from_block: int,
+        to_block,
+        page=1,
+        offset=LOGS_RESULT_CAP,
+    ) -> list[dict]:
+        """Gets one page of event logs for an address."""
+        params = {
+            "chainid": chainid,
+            "module": "logs",
+            "action": "getLogs",
+            "address": address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "page": page,
+            "offset": offset,
+        }
+        return await self.call(params, allow_empty=True)
+
+    async def get_transactions(
+        self,
+        chainid,
+        address,
+        startblock=0,
+        endblock="latest",
+        page=1,
+        offset=1000,
+        sort="asc",
+    ) -> list[dict]:
+        """Gets one page of normal transactions for an address."""
+        params = {
+            "chainid": chainid,
+            "module": "account",
+            "action": "txlist",
+            "address": address,
+            "startblock": startblock,
+            "endblock": endblock,
+            "page": page,
+            "offset": offset,
+            "sort": sort,
+        }
+        return await self.call(params, allow_empty=True)
+
+    async def get_block_by_timestamp(
+        self, chainid, timestamp: int, closest="before"
+    ) -> int:
+        """Gets the block number closest to a timestamp."""
+        params = {
+            "chainid": chainid,
+            "module": "block",
+            "action": "getblocknobytime",
+            "timestamp": timestamp,
+            "closest": closest,
+        }
+        return int(await self.call(params))
+
+    async def get_contract_creation(self, chainid, contract_addresses) -> list[dict]:
+        """
+        Gets contract creation info for one or more addresses, querying batches
+        of up to 5 addresses concurrently.
+        """
+        if isinstance(contract_addresses, str):
+            contract_addresses = [contract_addresses]
+        batches = [
+            contract_addresses[i : i + CONTRACT_CREATION_BATCH]
+            for i in range(0, len(contract_addresses), CONTRACT_CREATION_BATCH)
+        ]
+        results = await asyncio.gather(
+            *(
+                self.call(
+                    {
+                        "chainid": chainid,
+                        "module": "contract",
+                        "action": "getcontractcreation",
+                        "contractaddresses": ",".join(batch),
+                    }
+                )
+                for batch in batches
+            )
+        )
+        return [item for result in results for item in result]
+
+    async def _iter_result_window(
+        self, params: dict, max_pages: int
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yields pages of one query in order, up to a short page or `max_pages`.
+
+        Requests running on worker threads can't be cancelled, so pages are
+        only fetched ahead once the window is known to hold them: after a full
+        first page, the last page of the window is fetched along with the
+        second. If it holds rows, every page before it is full and they are
+        all fetched concurrently, otherwise pages are fetched one at a time.
+        At most that one request is spent past the end of the window.
+        """
+        offset = params["offset"]
+        tasks: dict[int, asyncio.Task] = {}
+
+        def fetch(page: int) -> asyncio.Task:
+            if page not in tasks:
+                tasks[page] = asyncio.ensure_future(
+                    self.call({**params, "page": page}, allow_empty=True)
+                )
+            return tasks[page]
+
+        try:
+            rows = await self.call({**params, "page": 1}, allow_empty=True)
+            yield rows
+            if len(rows) < offset or max_pages == 1:
+                return
+
+            last_page = fetch(max_pages)
+            fetch(2)
+            if await last_page:
+                for page in range(3, max_pages):
+                    fetch(page)
+            for page in range(2, max_pages + 1):
+                rows = await fetch(page)
+                del tasks[page]
+                yield rows
+                if len(rows) < offset:
+                    return
+        finally:
+            # Pages left over if the consumer stopped early, or past a short page
+            for task in tasks.values():
+                if task.done() and not task.cancelled():
+                    task.exception()
+                task.cancel()
+
+    async def iter_pages(
+        self,
+        params: dict,
+        from_key: str,
+        to_key: str,
+        from_block: int,
+        to_block,
+        key: Callable[[dict], Hashable],
+        offset: int = 1000,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yields all pages of a block-ranged, ascending query.
+
+        Etherscan only serves the first 10,000 records of a query, so once that
+        window is exhausted the query is restarted from the last block seen,
+        skipping the records of that block that were already yielded.
+
+        Args:
+            params: Query parameters without the block range, page and offset
+            from_key: Name of the start block parameter
+            to_key: Name of the end block parameter
+            from_block: First block of the range
+            to_block: Last block of the range, or "latest"
+            key: Function giving the identity of a record
+            offset: Records per page
+        """
+        max_pages = max(1, RESULT_WINDOW // offset)
+        restart_block, restart_keys = None, set()
+        while True:
+            query = {**params, from_key: from_block, to_key: to_block, "offset": offset}
+            n_pages, last_rows = 0, []
+            tail_block, tail_keys = None, set()
+            async for rows in self._iter_result_window(query, max_pages):
+                n_pages += 1
+                last_rows = rows
+                if restart_keys:
+                    rows = [row for row in rows if key(row) not in restart_keys]
+                for row in rows:
+                    block = int(row["blockNumber"], 0)
+                    if block != tail_block:
+                        tail_block, tail_keys = block, set()
+                    tail_keys.add(key(row))
+                if rows:
+                    yield rows
+
+            if n_pages < max_pages or len(last_rows) < offset:
+                return
+            if params.get("sort", "asc") != "asc":
+                logger.warning(
+                    f"Result window exhausted for a descending query, stopping at block {tail_block}"
+                )
+                return
+            if tail_block == restart_block:
+                raise ValueError(
+                    f"Block {tail_block} holds more than {RESULT_WINDOW} records"
+                )
+            logger.debug(f"Result window exhausted, restarting from block {tail_block}")
+            from_block = restart_block = tail_block
+            restart_keys = tail_keys
+
+    def iter_logs(
+        self,
+        chainid,
+        address,
+        from_block=0,
+        to_block="latest",
+        offset=LOGS_RESULT_CAP,
+        module="logs",
+        action="getLogs",
+    ) -> AsyncIterator[list[dict]]:
+        """Yields pages of event logs for an address over a block range."""
+        params = {
+            "chainid": chainid,
+            "module": module,
+            "action": action,
+            "address": address,
+        }
+        return self.iter_pages(
+            params, "fromBlock", "toBlock", from_block, to_block, _log_key, offset
+        )
+
+    def iter_transactions(
+        self,
+        chainid,
+        address,
+        startblock=0,
+        endblock="latest",
+        offset=1000,
+        sort="asc",
+        module="account",
+        action="txlist",
+    ) -> AsyncIterator[list[dict]]:
+        """Yields pages of normal transactions for an address over a block range."""
+        params = {
+            "chainid": chainid,
+            "module": module,
+            "action": action,
+            "address": address,
+            "sort": sort,
+        }
+        return self.iter_pages(
+            params,
+            "startblock",
+            "endblock",
+            startblock,
+            endblock,
+            _transaction_key,
+            offset,
+        )
+
+
+@dlt.resource(name="etherscan_transactions", columns=BlockExplorerColumns.Transaction)
+async def etherscan_transactions_async(
+    chainid,
+    address,
+    module="account",
+    action="txlist",
+    startblock=0,
+    endblock="latest",
+    offset=1000,
+    sort="asc",
+    max_in_flight: int = None,
+):
+    """
+    Async drop-in for `etherscan_transactions`, keeping several page requests
+    in flight within the shared rate limit.
+    """
+    logger.info(f"Fetching transactions for address {address} from block {startblock}")
+    client = AsyncEtherscanClient(max_in_flight=max_in_flight)
+    async for page in client.iter_transactions(
+        chainid,
+        address,
+        startblock,
+        endblock,
+        offset=offset,
+        sort=sort,
+        module=module,
+        action=action,
+    ):
+        yield page
+
+
+@dlt.resource(name="etherscan_logs", columns=BlockExplorerColumns.Log)
+async def etherscan_logs_async(
+    chainid,
+    address,
+    module="logs",
+    action="getLogs",
+    fromBlock=0,
+    toBlock="latest",
+    offset=1000,
+    max_in_flight: int = None,
+):
+    """
+    Async drop-in for `etherscan_logs`, keeping several page requests in
+    flight within the shared rate limit.
+    """
+    logger.info(
+        f"Fetching logs for address {address} from block {fromBlock} to {toBlock}"
+    )
+    client = AsyncEtherscanClient(max_in_flight=max_in_flight)
+    async for page in client.iter_logs(
+        chainid,
+        address,
+        fromBlock,
+        toBlock,
+        offset=offset,
+        module=module,
+        action=action,
+    ):
+        for item in page:
+            item["chainid"] = chainid
+        yield page
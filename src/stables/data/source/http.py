@@ -0,0 +1,133 @@
+import logging
+import threading
+from typing import Sequence, Type
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from dlt.sources.helpers.requests.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that reports body sizes of the responses it receives."""
+
+    def __init__(self, on_response, **kwargs):
+        self._on_response = on_response
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        response = super().send(request, stream=stream, **kwargs)
+        if stream:
+            # Streamed bodies are read by the caller, only count the response
+            self._on_response(0, 0)
+        else:
+            # Read here rather than in Session.send, so the wire size is known
+            decoded = len(response.content)
+            self._on_response(response.raw.tell(), decoded)
+        return response
+
+
+class HttpTransport:
+    """
+    Shared HTTP transport for the API sources.
+
+    Sessions mounted on a transport share one pooled `HTTPAdapter`, so
+    keep-alive connections (and their TLS handshakes) are reused across
+    sessions, resources and pipeline runs. Responses are requested compressed
+    with every encoding urllib3 can decode (gzip, deflate, and br/zstd when
+    their packages are installed).
+
+    Args:
+        pool_connections: Number of per-host connection pools to keep
+        pool_maxsize: Max connections kept alive per host
+        pool_block: Block instead of opening extra connections when a host's
+            pool is exhausted, capping connections per host at `pool_maxsize`
+        retry_statuses: Status codes retried with exponential backoff
+        max_retries: Max retries for connection errors and `retry_statuses`
+        backoff_factor: Backoff factor for retries
+        timeout: Default request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        retry_statuses: Sequence[int] = (429, 500, 502, 503, 504),
+        max_retries: int = 5,
+        backoff_factor: float = 1.0,
+        timeout: float = 60,
+    ):
+        self.timeout = timeout
+        self.adapter = _CountingAdapter(
+            self._record_response,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=Retry(
+                total=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=retry_statuses,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        )
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.bytes_on_wire = 0
+        self.bytes_decoded = 0
+
+    def __deepcopy__(self, memo):
+        # Shared by design; rest_api_source deep-copies its config to validate it
+        return self
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """Route a session's requests through this transport."""
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        return session
+
+    def session(
+        self, session_cls: Type[requests.Session] = Session
+    ) -> requests.Session:
+        """Create a session on this transport, by default a dlt session that doesn't raise on status."""
+        if issubclass(session_cls, Session):
+            session = session_cls(timeout=self.timeout, raise_for_status=False)
+        else:
+            session = session_cls()
+        return self.mount(session)
+
+    def _record_response(self, wire: int, decoded: int) -> None:
+        with self._lock:
+            self.responses += 1
+            self.bytes_on_wire += wire
+            self.bytes_decoded += decoded
+
+    def stats(self) -> dict:
+        """Requests, connections opened vs reused, and body bytes on the wire vs decoded."""
+        pools = self.adapter.poolmanager.pools
+        requests_sent, connections = 0, 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        return {
+            "responses": self.responses,
+            "requests": requests_sent,
+            "new_connections": connections,
+            "reused_connections": max(0, requests_sent - connections),
+            "bytes_on_wire": self.bytes_on_wire,
+            "bytes_decoded": self.bytes_decoded,
+        }
+
+
+# Transport for the DeFiLlama and CoinGecko sources
+api_transport = HttpTransport()
+
+# Transport for Etherscan, rate-limit responses are backed off by RateLimitedSession
+etherscan_transport = HttpTransport(retry_statuses=(500, 502, 503, 504))
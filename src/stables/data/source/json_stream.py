@@ -0,0 +1,136 @@
+import json
+import codecs
+from typing import Any, Iterable, Iterator, Sequence, Union
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    """Text of a JSON document decoded chunk by chunk, consumed from the front."""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk, False once the document is read."""
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if not text:
+                continue
+            # Drop the consumed text, only the unread rest is kept in memory
+            if self.pos:
+                self.text = self.text[self.pos :]
+                self.pos = 0
+            self.text += text
+            return True
+        self.text += self._utf8.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next character after whitespace, "" at the end of the document."""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, one of `chars`."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                f"Expecting one of {chars!r}", self.text, self.pos
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next value, reading chunks until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # A number at the end of the text may go on in the next chunk
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Read as much again before retrying, so large values decode in
+            # linear time
+            size = len(self.text) - self.pos
+            while len(self.text) - self.pos < 2 * size and self._fill():
+                pass
+
+
+def _walk(
+    buffer: _Buffer, path: Sequence[str], prefix: tuple[str, ...]
+) -> Iterator[tuple[tuple[str, ...], Any]]:
+    if not path:
+        if buffer.peek() != "[":
+            yield prefix, buffer.value()
+            return
+        buffer.expect("[")
+        if buffer.peek() == "]":
+            buffer.pos += 1
+            return
+        while True:
+            yield prefix, buffer.value()
+            if buffer.expect(",]") == "]":
+                return
+
+    if buffer.peek() != "{":
+        # Nothing to select in a value that isn't an object
+        buffer.value()
+        return
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        buffer.pos += 1
+        return
+    while True:
+        key = buffer.value()
+        buffer.expect(":")
+        if path[0] in ("*", key):
+            yield from _walk(buffer, path[1:], prefix + (key,))
+        else:
+            buffer.value()
+        if buffer.expect(",}") == "}":
+            return
+
+
+def iter_json_items(
+    chunks: Iterable[Union[bytes, str]], path: Sequence[str] = ()
+) -> Iterator[tuple[tuple[str, ...], Any]]:
+    """
+    Parse the values at a path of a JSON document as its chunks come in,
+    e.g. from `requests.Response.iter_content`, so the document is never
+    held in memory as a whole.
+
+    The values of an array at the path are yielded one by one, any other
+    value at the path as a whole. Values off the path are decoded and dropped.
+
+    Args:
+        chunks: UTF-8 bytes or text of the document
+        path: Object keys leading to the values, "*" matching any key, e.g.
+            ["chainBalances", "*", "tokens"]
+
+    Yields:
+        tuple[tuple[str, ...], Any]: Keys matched by the path, and a value
+
+    Raises:
+        json.JSONDecodeError: The document is not valid JSON
+    """
+    yield from _walk(_Buffer(chunks), path, ())
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional
+from urllib.parse import quote, urlparse
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from stables.config import RAW_LAKE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def _subtract(
+    interval: tuple[int, int], covered: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    """Parts of a block interval outside the covered intervals."""
+    parts = []
+    start, end = interval
+    for covered_from, covered_to in sorted(covered):
+        if covered_to < start or covered_from > end:
+            continue
+        if covered_from > start:
+            parts.append((start, covered_from - 1))
+        start = max(start, covered_to + 1)
+        if start > end:
+            break
+    if start <= end:
+        parts.append((start, end))
+    return parts
+
+
+def _merge(intervals: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping and adjacent block intervals."""
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _read_ahead(read: Callable, items: Iterable, max_workers: int) -> Iterator:
+    """Map `read` over items in threads, in order, reading a few items ahead."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(read, item))
+            if len(pending) > 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class RawLake:
+    """
+    Local Parquet landing zone of raw API responses, so tables can be rebuilt
+    without calling the APIs again.
+
+    Etherscan log windows are written as fetched, one file per window,
+    partitioned by chain and address:
+    `etherscan/logs/chainid=1/address=0x.../{from_block}-{to_block}-{written}.parquet`.
+    Blocks refetched later are read from the newest file covering them.
+
+    DeFiLlama responses are written one file per fetch, partitioned by host,
+    endpoint and fetch date:
+    `defillama/{host}/{endpoint}/date=2024-01-01/{written}.parquet`, and
+    replayed from the latest fetch.
+
+    Args:
+        root: Lake directory. Defaults to `RAW_LAKE_DIR`
+        compression: Parquet compression codec
+        read_workers: Files read in parallel when replaying
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        compression: str = "zstd",
+        read_workers: int = 4,
+    ):
+        self.root = root or RAW_LAKE_DIR
+        self.compression = compression
+        self.read_workers = read_workers
+
+    def _write(self, directory: str, file_name: str, table: pa.Table) -> str:
+        """Write a Parquet file atomically, so readers never see partial files."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, file_name)
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+        return path
+
+    # Etherscan logs
+
+    def _logs_dir(self, chainid: int, address: str) -> str:
+        return os.path.join(
+            self.root,
+            "etherscan",
+            "logs",
+            f"chainid={chainid}",
+            f"address={address.lower()}",
+        )
+
+    def write_logs(
+        self,
+        chainid: int,
+        address: str,
+        from_block: int,
+        to_block: int,
+        rows: list[dict],
+    ) -> str:
+        """
+        Write the raw logs of a fetched window, empty windows included so
+        the lake records which ranges were fetched.
+
+        Returns:
+            str: Path of the written file
+        """
+        return self._write(
+            self._logs_dir(chainid, address),
+            f"{from_block:012d}-{to_block:012d}-{time.time_ns()}.parquet",
+            pa.Table.from_pylist(rows),
+        )
+
+    def _log_files(self, chainid: int, address: str) -> list[tuple[int, int, int, str]]:
+        """(from_block, to_block, written, path) of the log files of a contract."""
+        directory = self._logs_dir(chainid, address)
+        if not os.path.isdir(directory):
+            return []
+        files = []
+        for file_name in os.listdir(directory):
+            if not file_name.endswith(".parquet"):
+                continue
+            from_block, to_block, written = file_name[: -len(".parquet")].split("-")
+            files.append(
+                (
+                    int(from_block),
+                    int(to_block),
+                    int(written),
+                    os.path.join(directory, file_name),
+                )
+            )
+        return files
+
+    def _plan_logs(
+        self,
+        chainid: int,
+        address: str,
+        start_block: Optional[int],
+        end_block: Optional[int],
+    ) -> list[tuple[str, list[tuple[int, int]]]]:
+        """
+        Files to read for a block range, in block order, each with the block
+        ranges it is the newest file for.
+        """
+        start_block = 0 if start_block is None else start_block
+        end_block = float("inf") if end_block is None else end_block
+        covered: list[tuple[int, int]] = []
+        plan = []
+        for from_block, to_block, _, path in sorted(
+            self._log_files(chainid, address), key=lambda f: f[2], reverse=True
+        ):
+            clipped = (max(from_block, start_block), min(to_block, end_block))
+            if clipped[0] > clipped[1]:
+                continue
+            parts = _subtract(clipped, covered)
+            covered = _merge(covered + [clipped])
+            if parts:
+                plan.append((path, parts))
+        return sorted(plan, key=lambda p: p[1][0])
+
+    def log_coverage(
+        self,
+        chainid: int,
+        address: str,
+        start_block: Optional[int] = None,
+        end_block: Optional[int] = None,
+    ) -> list[tuple[int, int]]:
+        """Contiguous (from_block, to_block) ranges of a contract in the lake."""
+        return _merge(
+            part
+            for _, parts in self._plan_logs(chainid, address, start_block, end_block)
+            for part in parts
+        )
+
+    @staticmethod
+    def _read_log_file(
+        planned: tuple[str, list[tuple[int, int]]],
+    ) -> list[tuple[int, int, list[dict]]]:
+        path, parts = planned
+        rows = pq.read_table(path).to_pylist()
+        if not rows:
+            return [(from_block, to_block, []) for from_block, to_block in parts]
+        windows = []
+        for from_block, to_block in parts:
+            windows.append(
+                (
+                    from_block,
+                    to_block,
+                    [
+                        row
+                        for row in rows
+                        if from_block <= int(row["blockNumber"], 16) <= to_block
+                    ],
+                )
+            )
+        return windows
+
+    def iter_log_windows(
+        self,
+        chainid: int,
+        address: str,
+        start_block: Optional[int] = None,
+        end_block: Optional[int] = None,
+    ) -> Iterator[tuple[int, int, list[dict]]]:
+        """
+        Yields (from_block, to_block, logs) for the windows in the lake within
+        a block range, in block order, like
+        `stables.data.source.etherscan.iter_log_windows`. Files are read
+        `read_workers` at a time.
+        """
+        plan = self._plan_logs(chainid, address, start_block, end_block)
+        logger.info(f"Replaying {len(plan)} log files of {address} from {self.root}")
+        for windows in _read_ahead(self._read_log_file, plan, self.read_workers):
+            yield from windows
+
+    # DeFiLlama responses
+
+    def _responses_dir(
+        self, base_url: str, endpoint: str, params: Optional[dict] = None
+    ) -> str:
+        directory = os.path.join(
+            self.root, "defillama", urlparse(base_url).netloc, quote(endpoint, safe="/")
+        )
+        if params:
+            key = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()[
+                :12
+            ]
+            directory = os.path.join(directory, f"params={key}")
+        return directory
+
+    def _write_responses(
+        self,
+        base_url: str,
+        endpoint: str,
+        serialized: list[str],
+        params: Optional[dict] = None,
+    ) -> str:
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        return self._write(
+            os.path.join(
+                self._responses_dir(base_url, endpoint, params),
+                f"date={now.date().isoformat()}",
+            ),
+            f"{time.time_ns()}.parquet",
+            pa.table({"response": pa.array(serialized, pa.string())}),
+        )
+
+    def write_responses(
+        self,
+        base_url: str,
+        endpoint: str,
+        items: list[Any],
+        params: Optional[dict] = None,
+    ) -> str:
+        """
+        Write the items of one DeFiLlama response, as JSON.
+
+        Returns:
+            str: Path of the written file
+        """
+        return self._write_responses(
+            base_url, endpoint, [json.dumps(item) for item in items], params
+        )
+
+    def tee_responses(
+        self,
+        base_url: str,
+        endpoint: str,
+        items: Iterable[Any],
+        params: Optional[dict] = None,
+    ) -> Iterator[Any]:
+        """
+        Yield response items, writing them to the lake once all were fetched.
+        Items are serialized before they are yielded, so the lake keeps them
+        as fetched even if the consumer modifies them.
+        """
+        serialized = []
+        for item in items:
+            serialized.append(json.dumps(item))
+            yield item
+        self._write_responses(base_url, endpoint, serialized, params)
+
+    def read_responses(
+        self,
+        base_url: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+        date: Optional[str] = None,
+    ) -> list[Any]:
+        """
+        Read the items of the latest response of an endpoint.
+
+        Args:
+            date: Read the latest response fetched on or before this
+                ISO date instead
+
+        Raises:
+            FileNotFoundError: No response of the endpoint is in the lake
+        """
+        directory = self._responses_dir(base_url, endpoint, params)
+        partitions = sorted(
+            p
+            for p in (os.listdir(directory) if os.path.isdir(directory) else [])
+            if p.startswith("date=") and (date is None or p[len("date=") :] <= date)
+        )
+        for partition in reversed(partitions):
+            files = sorted(
+                f
+                for f in os.listdir(os.path.join(directory, partition))
+                if f.endswith(".parquet")
+            )
+            if files:
+                path = os.path.join(directory, partition, files[-1])
+                logger.info(f"Replaying {endpoint} from {path}")
+                return [
+                    json.loads(item)
+                    for item in pq.read_table(path).column("response").to_pylist()
+                ]
+        raise FileNotFoundError(f"No response of {endpoint} in {directory}")
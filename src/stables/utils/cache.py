@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, writes are then per process
+    fcntl = None
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataCache:
+    """
+    JSON file cache for chain metadata, shared by threads and, through file
+    locking, by worker processes.
+
+    Entries are stored with an optional expiry time; entries without one never
+    expire, which suits immutable data like contract creation blocks. Reads are
+    served from memory and the file is re-read when another process changed it.
+
+    Args:
+        path: Path of the cache file
+        ttl: Default time to live in seconds, None to keep entries forever
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._mtime = None
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _refresh(self) -> None:
+        """Re-read the cache file if it changed since it was last read."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+            self._mtime = mtime
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable metadata cache {self.path}: {e}")
+
+    @contextmanager
+    def _locked_entries(self):
+        """Yields the entries to update, locked for threads and processes."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, "r+") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    content = f.read()
+                    entries = json.loads(content) if content else {}
+                    yield entries
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(entries, f)
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            self._entries = entries
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Get the unexpired values of the keys found in the cache."""
+        now = time.time()
+        found = {}
+        with self._lock:
+            self._refresh()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or (
+                    entry["expires_at"] is not None and entry["expires_at"] <= now
+                ):
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                found[key] = entry["value"]
+        return found
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items: dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Store values, expiring after `ttl` seconds (default: the cache's ttl)."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._locked_entries() as entries:
+            now = time.time()
+            # Drop expired entries while the file is rewritten anyway
+            for key in [
+                k
+                for k, e in entries.items()
+                if e["expires_at"] is not None and e["expires_at"] <= now
+            ]:
+                del entries[key]
+            for key, value in items.items():
+                entries[key] = {"value": value, "expires_at": expires_at}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_many({key: value}, ttl=ttl)
+
+    def stats(self) -> dict:
+        """Returns this process's cache hits and misses."""
+        return {"hits": self.hits, "misses": self.misses}
@@ -1,11 +1,22 @@
+import os
+import re
+import asyncio
+import hashlib
+import threading
 from typing import Optional, Any
 
 import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
 from contextlib import contextmanager
 from sqlalchemy import create_engine
 
-from stables.data.source.etherscan import get_contract_creation_txn
+try:
+    import asyncpg
+except ImportError:  # optional, only needed by get_async_pool
+    asyncpg = None
+
 from stables.config import PostgresConfig
 
 import logging
@@ -13,10 +24,115 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class _PooledConnection(psycopg2.extensions.connection):
+    """Connection remembering the statements prepared on it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: set[str] = set()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections of one PostgresConfig.
+
+    Unlike `ThreadedConnectionPool`, which raises when all connections are in
+    use, borrowers wait for a connection. Connections are handed back rolled
+    back, and broken ones are replaced.
+
+    Args:
+        db_config: PostgresConfig instance, with the pool size
+    """
+
+    def __init__(self, db_config: PostgresConfig):
+        self._pool = ThreadedConnectionPool(
+            db_config.pool_min_size,
+            db_config.pool_max_size,
+            connection_factory=_PooledConnection,
+            **db_config.get_connection_params(),
+        )
+        self._slots = threading.BoundedSemaphore(db_config.pool_max_size)
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            conn = self._pool.getconn()
+            if conn.closed:
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+            try:
+                yield conn
+            finally:
+                self._release(conn)
+
+    def _release(self, conn) -> None:
+        broken = bool(conn.closed)
+        if not broken:
+            try:
+                if conn.autocommit:
+                    conn.autocommit = False
+                else:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        self._pool.putconn(conn, close=broken)
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+
+_pools: dict[tuple, ConnectionPool] = {}
+_engines: dict[tuple, Any] = {}
+_async_pools: dict[tuple, Any] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(db_config: PostgresConfig) -> tuple:
+    """Configs with the same settings share a pool, pools aren't shared across processes."""
+    return (
+        os.getpid(),
+        tuple(sorted(db_config.get_connection_params().items())),
+        db_config.pool_min_size,
+        db_config.pool_max_size,
+    )
+
+
+def get_connection_pool(db_config: PostgresConfig) -> ConnectionPool:
+    """Get the shared connection pool of a PostgresConfig, creating it on first use."""
+    key = _pool_key(db_config)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(db_config)
+        return _pools[key]
+
+
+def close_pools() -> None:
+    """
+    Close every pooled connection and dispose of the cached engines. asyncpg
+    pools are terminated, closing their connections without waiting for
+    queries in progress; pools of event loops already closed are dropped.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        for engine in _engines.values():
+            engine.dispose()
+        for async_pool in _async_pools.values():
+            try:
+                async_pool.terminate()
+            except RuntimeError:  # its event loop is closed
+                pass
+        _pools.clear()
+        _engines.clear()
+        _async_pools.clear()
+
+
 @contextmanager
 def get_postgres_connection(db_config: PostgresConfig):
     """
-    Context manager for PostgreSQL database connections.
+    Context manager for PostgreSQL database connections, borrowed from the
+    config's pool. Uncommitted work is rolled back when the connection is
+    handed back.
 
     Args:
         db_config: PostgresConfig instance.
@@ -30,18 +146,14 @@ def get_postgres_connection(db_config: PostgresConfig):
             cursor.execute("SELECT COUNT(*) FROM table")
             result = cursor.fetchone()
     """
-    conn = None
-    try:
-        conn = psycopg2.connect(**db_config.get_connection_params())
+    with get_connection_pool(db_config).connection() as conn:
         yield conn
-    finally:
-        if conn:
-            conn.close()
 
 
 def get_sqlalchemy_engine(db_config: PostgresConfig):
     """
-    Create a SQLAlchemy engine for pandas operations.
+    Get the SQLAlchemy engine for pandas operations, created once per config
+    and pooled like `get_postgres_connection`.
 
     Args:
         db_config: PostgresConfig instance
@@ -49,9 +161,74 @@ def get_sqlalchemy_engine(db_config: PostgresConfig):
     Returns:
         sqlalchemy.engine.Engine: SQLAlchemy engine
     """
-    params = db_config.get_connection_params()
-    connection_string = f"postgresql://{params['user']}:{params['password']}@{params['host']}:{params['port']}/{params['database']}"
-    return create_engine(connection_string)
+    key = _pool_key(db_config)
+    with _pools_lock:
+        if key not in _engines:
+            params = db_config.get_connection_params()
+            connection_string = f"postgresql+psycopg2://{params['user']}:{params['password']}@{params['host']}:{params['port']}/{params['database']}"
+            connect_args = {"options": params["options"]} if "options" in params else {}
+            _engines[key] = create_engine(
+                connection_string,
+                pool_size=db_config.pool_min_size,
+                max_overflow=db_config.pool_max_size - db_config.pool_min_size,
+                pool_pre_ping=True,
+                connect_args=connect_args,
+            )
+        return _engines[key]
+
+
+async def get_async_pool(db_config: PostgresConfig):
+    """
+    Get the asyncpg pool of a PostgresConfig for the running event loop,
+    created on first use. Statements are prepared and cached per connection
+    with `prepare_statements`. Requires `asyncpg`.
+
+    Returns:
+        asyncpg.Pool: Connection pool
+    """
+    if asyncpg is None:
+        raise ImportError(
+            "get_async_pool requires asyncpg, pip install 'stables[async]'"
+        )
+    key = (_pool_key(db_config), id(asyncio.get_running_loop()))
+    with _pools_lock:
+        pool = _async_pools.get(key)
+    if pool is not None:
+        return pool
+
+    # Created without holding the lock, which would block the event loop
+    server_settings = {}
+    if db_config.statement_timeout_ms is not None:
+        server_settings["statement_timeout"] = str(db_config.statement_timeout_ms)
+    pool = await asyncpg.create_pool(
+        host=db_config.host,
+        port=db_config.port,
+        database=db_config.database,
+        user=db_config.user,
+        password=db_config.password,
+        min_size=db_config.pool_min_size,
+        max_size=db_config.pool_max_size,
+        statement_cache_size=100 if db_config.prepare_statements else 0,
+        server_settings=server_settings,
+    )
+    with _pools_lock:
+        shared = _async_pools.setdefault(key, pool)
+    if shared is not pool:
+        # Another task of the loop created the pool meanwhile
+        await pool.close()
+    return shared
+
+
+def _execute_prepared(cursor, query: str, params: tuple) -> None:
+    """Execute a query as a statement prepared once per connection."""
+    conn = cursor.connection
+    name = "stables_" + hashlib.md5(query.encode()).hexdigest()[:16]
+    if name not in conn.prepared:
+        placeholders = iter(range(1, len(params) + 1))
+        statement = re.sub(r"%s", lambda _: f"${next(placeholders)}", query)
+        cursor.execute(f"PREPARE {name} AS {statement}")
+        conn.prepared.add(name)
+    cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
 
 
 def _fetch_one(
@@ -60,7 +237,8 @@ def _fetch_one(
     params: Optional[tuple] = None,
 ) -> Any:
     """
-    Execute a query and return the result.
+    Execute a query and return the result, prepared once per pooled
+    connection if the config prepares statements.
 
     Args:
         db_config: PostgresConfig instance
@@ -71,11 +249,12 @@ def _fetch_one(
         Query result (fetchone())
     """
     with get_postgres_connection(db_config) as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        result = cursor.fetchone()
-        cursor.close()
-        return result
+        with conn.cursor() as cursor:
+            if db_config.prepare_statements and params:
+                _execute_prepared(cursor, query, params)
+            else:
+                cursor.execute(query, params)
+            return cursor.fetchone()
 
 
 def get_rows_count(
@@ -117,6 +296,438 @@ def get_rows_count(
         return 0
 
 
+def partitioned_key(
+    cursor, table_schema: str, table_name: str, columns: list[str]
+) -> list[str]:
+    """
+    Key columns plus the partition key columns of a partitioned table, which
+    its unique indexes (and so `ON CONFLICT` targets) must include.
+    """
+    cursor.execute(
+        """
+        SELECT a.attname FROM pg_partitioned_table p
+        JOIN pg_attribute a
+            ON a.attrelid = p.partrelid AND a.attnum = ANY(p.partattrs::int2[])
+        WHERE p.partrelid = to_regclass(%s)
+        """,
+        (f"{table_schema}.{table_name}",),
+    )
+    return list(columns) + [c for (c,) in cursor.fetchall() if c not in columns]
+
+
+def create_unique_key(
+    cursor, table_schema: str, table_name: str, columns: list[str]
+) -> Optional[int]:
+    """
+    Create a unique index on `columns` with an open cursor, deleting duplicate
+    rows first. The caller commits. On a partitioned table the index also
+    covers the partition key, see `partitioned_key`.
+
+    Returns:
+        Optional[int]: Number of duplicate rows deleted, None if the table
+            already had a unique index on `columns`
+    """
+    qualified_name = f"{table_schema}.{table_name}"
+    columns = partitioned_key(cursor, table_schema, table_name, columns)
+    cursor.execute(
+        """
+        SELECT 1 FROM pg_index i
+        WHERE i.indrelid = to_regclass(%s) AND i.indisunique
+            AND (
+                SELECT array_agg(a.attname::text ORDER BY a.attname::text)
+                FROM pg_attribute a
+                WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            ) = %s::text[]
+        """,
+        (qualified_name, sorted(columns)),
+    )
+    if cursor.fetchone():
+        return None
+
+    key = ", ".join(columns)
+    # ctids are only unique within a partition
+    cursor.execute(f"""
+        DELETE FROM {qualified_name} t
+        USING (
+            SELECT tableoid, ctid, row_number() OVER (
+                PARTITION BY {key} ORDER BY tableoid, ctid
+            ) AS rn
+            FROM {qualified_name}
+        ) d
+        WHERE t.tableoid = d.tableoid AND t.ctid = d.ctid AND d.rn > 1
+        """)
+    deleted = cursor.rowcount
+    cursor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_key_idx ON {qualified_name} ({key})"
+    )
+    logger.info(
+        f"Created unique key ({key}) on {qualified_name}, deleted {deleted} duplicates"
+    )
+    return deleted
+
+
+def ensure_unique_key(
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+    columns: list[str],
+) -> int:
+    """
+    Ensure a table has a unique index on `columns`, deleting duplicate rows first.
+
+    Upserts on the key then only touch the index for the keys being loaded,
+    instead of scanning the table. Duplicates are only searched for when the
+    index has to be created, so this is cheap to call before every load.
+
+    Args:
+        pg_config: PostgresConfig instance
+        table_schema: Schema name
+        table_name: Table name
+        columns: Key columns
+
+    Returns:
+        int: Number of duplicate rows deleted, 0 if the table doesn't exist yet
+    """
+    with get_postgres_connection(pg_config) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", (f"{table_schema}.{table_name}",))
+            if cursor.fetchone()[0] is None:
+                return 0
+            deleted = create_unique_key(cursor, table_schema, table_name, columns)
+        conn.commit()
+    return deleted or 0
+
+
+# Blocks per partition of a raw log table, unless its partitions say otherwise
+PARTITION_BLOCKS = 1_000_000
+
+# Indexes of raw log tables: BRIN for the block and time ranges scanned by
+# staging models, btree for `get_loaded_block` and log lookups
+LOG_TABLE_INDEXES = {
+    "block_number_brin": ("brin", ["block_number"]),
+    "time_stamp_brin": ("brin", ["time_stamp"]),
+    "address_block_idx": ("btree", ["address", "block_number"]),
+    "tx_log_idx": ("btree", ["transaction_hash", "log_index"]),
+}
+
+_RANGE_BOUND = re.compile(r"FROM \('?(-?\d+)'?\) TO \('?(-?\d+)'?\)")
+
+
+def _block_partitions(
+    cursor, table_schema: str, table_name: str
+) -> list[tuple[str, Optional[int], Optional[int]]]:
+    """
+    (partition, from_block, to_block exclusive) of a table partitioned by
+    block number, with None bounds for the default partition.
+    """
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        (f"{table_schema}.{table_name}",),
+    )
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _RANGE_BOUND.search(bound)
+        if match:
+            partitions.append((name, int(match[1]), int(match[2])))
+        else:
+            partitions.append((name, None, None))
+    return sorted(partitions, key=lambda p: (p[1] is not None, p[1]))
+
+
+def _missing_block_partitions(
+    partitions: list[tuple[str, Optional[int], Optional[int]]],
+    from_block: int,
+    to_block: int,
+    partition_blocks: int,
+) -> list[int]:
+    """Lower bounds of the partitions a block range lacks."""
+    existing = {lower for _, lower, _ in partitions if lower is not None}
+    first = from_block - from_block % partition_blocks
+    return [
+        lower
+        for lower in range(first, to_block + 1, partition_blocks)
+        if lower not in existing
+    ]
+
+
+def _add_block_partitions(
+    cursor,
+    table_schema: str,
+    table_name: str,
+    from_block: int,
+    to_block: int,
+    partition_blocks: int,
+) -> int:
+    """
+    Attach the missing partitions covering a block range, moving their rows
+    out of the default partition. Returns the number of partitions attached.
+    """
+    qualified_name = f"{table_schema}.{table_name}"
+    partitions = _block_partitions(cursor, table_schema, table_name)
+    default = next((name for name, lower, _ in partitions if lower is None), None)
+    attached = 0
+    for lower in _missing_block_partitions(
+        partitions, from_block, to_block, partition_blocks
+    ):
+        upper = lower + partition_blocks
+        partition = f"{table_schema}.{table_name}_p{lower}"
+        cursor.execute(
+            f"CREATE TABLE {partition} (LIKE {qualified_name} INCLUDING DEFAULTS)"
+        )
+        if default:
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {table_schema}.{default}
+                    WHERE block_number >= %s AND block_number < %s
+                    RETURNING *
+                )
+                INSERT INTO {partition} SELECT * FROM moved
+                """,
+                (lower, upper),
+            )
+        cursor.execute(
+            f"ALTER TABLE {qualified_name} ATTACH PARTITION {partition} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            (lower, upper),
+        )
+        attached += 1
+    if attached:
+        logger.info(f"Attached {attached} block partitions to {qualified_name}")
+    return attached
+
+
+def partition_by_block(
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+    partition_blocks: int = PARTITION_BLOCKS,
+) -> int:
+    """
+    Convert a raw log table into a table range partitioned by block_number.
+
+    The table is recreated with the same columns, one partition per
+    `partition_blocks` blocks of its data and a default partition for blocks
+    beyond them, and its rows are copied over, in one transaction. Unique
+    keys, dlt's `_dlt_id` key among them, are recreated including
+    block_number, which a partitioned table's unique indexes must include.
+    Loads keep working unchanged, partitions for new blocks are attached
+    by `ensure_block_partitions`.
+
+    This is a one-off migration, see `scripts/partition_log_tables.py`: the
+    table is locked against reads and writes while every row is copied, and
+    the copy runs without the config's statement timeout.
+
+    Args:
+        pg_config: PostgresConfig instance
+        table_schema: Schema name
+        table_name: Table name
+        partition_blocks: Blocks per partition
+
+    Returns:
+        int: Number of partitions created, 0 if the table doesn't exist or is
+            already partitioned
+    """
+    qualified_name = f"{table_schema}.{table_name}"
+    old_name = f"{table_name}_unpartitioned"
+    with get_postgres_connection(pg_config) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                (qualified_name,),
+            )
+            relkind = cursor.fetchone()
+            if relkind is None or relkind[0] != "r":
+                return 0
+            # Another load may be converting the table, check again once it's done
+            cursor.execute(f"LOCK TABLE {qualified_name} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                (qualified_name,),
+            )
+            if cursor.fetchone()[0] != "r":
+                return 0
+            cursor.execute("SET LOCAL statement_timeout = 0")
+
+            # Unique keys to recreate
+            cursor.execute(
+                """
+                SELECT array_agg(a.attname::text ORDER BY k.n)
+                FROM pg_index i
+                CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY k(attnum, n)
+                JOIN pg_attribute a
+                    ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                WHERE i.indrelid = to_regclass(%s) AND i.indisunique
+                GROUP BY i.indexrelid
+                """,
+                (qualified_name,),
+            )
+            unique_keys = [key for (key,) in cursor.fetchall()]
+            dlt_id_key = ["_dlt_id"] in unique_keys
+            if dlt_id_key:
+                unique_keys.remove(["_dlt_id"])
+            cursor.execute(
+                f"SELECT MIN(block_number), MAX(block_number) FROM {qualified_name}"
+            )
+            min_block, max_block = cursor.fetchone()
+
+            cursor.execute(f"ALTER TABLE {qualified_name} RENAME TO {old_name}")
+            cursor.execute(
+                f"CREATE TABLE {qualified_name} "
+                f"(LIKE {table_schema}.{old_name} INCLUDING DEFAULTS) "
+                "PARTITION BY RANGE (block_number)"
+            )
+            cursor.execute(
+                f"CREATE TABLE {qualified_name}_pdefault "
+                f"PARTITION OF {qualified_name} DEFAULT"
+            )
+            created = 1
+            if min_block is not None:
+                created += _add_block_partitions(
+                    cursor,
+                    table_schema,
+                    table_name,
+                    min_block,
+                    max_block,
+                    partition_blocks,
+                )
+            cursor.execute(
+                f"INSERT INTO {qualified_name} SELECT * FROM {table_schema}.{old_name}"
+            )
+            cursor.execute(f"DROP TABLE {table_schema}.{old_name}")
+            for key in unique_keys:
+                create_unique_key(cursor, table_schema, table_name, key)
+            if dlt_id_key:
+                cursor.execute(
+                    f"CREATE UNIQUE INDEX {table_name}__dlt_id_key "
+                    f"ON {qualified_name} (_dlt_id, block_number)"
+                )
+        conn.commit()
+    logger.info(
+        f"Partitioned {qualified_name} by block_number into {created} partitions"
+    )
+    return created
+
+
+def ensure_block_partitions(
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+    from_block: int,
+    to_block: int,
+) -> int:
+    """
+    Attach the partitions a block range is about to be loaded into, sized
+    like the table's last partition. Cheap to call before every load, it does
+    nothing for tables that haven't been partitioned with `partition_by_block`.
+
+    Returns:
+        int: Number of partitions attached
+    """
+    with get_postgres_connection(pg_config) as conn:
+        with conn.cursor() as cursor:
+            partitions = _block_partitions(cursor, table_schema, table_name)
+            if not partitions:
+                return 0
+            ranges = [
+                (lower, upper) for _, lower, upper in partitions if lower is not None
+            ]
+            partition_blocks = (
+                ranges[-1][1] - ranges[-1][0] if ranges else PARTITION_BLOCKS
+            )
+            if not _missing_block_partitions(
+                partitions, from_block, to_block, partition_blocks
+            ):
+                return 0
+            # Concurrent loads of the table attach partitions one at a time,
+            # each seeing those attached before it
+            cursor.execute(
+                f"LOCK TABLE {table_schema}.{table_name} IN SHARE ROW EXCLUSIVE MODE"
+            )
+            attached = _add_block_partitions(
+                cursor, table_schema, table_name, from_block, to_block, partition_blocks
+            )
+        conn.commit()
+    return attached
+
+
+def _index_names(cursor, table_schema: str, table_name: str) -> set[str]:
+    cursor.execute(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+        (table_schema, table_name),
+    )
+    return {name for (name,) in cursor.fetchall()}
+
+
+def ensure_log_indexes(
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+) -> list[str]:
+    """
+    Create the `LOG_TABLE_INDEXES` a raw log table is missing, skipping those
+    whose columns it doesn't have. Indexes on a partitioned table are created
+    on every partition, including those attached later.
+
+    Returns:
+        list[str]: Names of the indexes created
+    """
+    qualified_name = f"{table_schema}.{table_name}"
+    created = []
+    with get_postgres_connection(pg_config) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = %s AND table_name = %s
+                """,
+                (table_schema, table_name),
+            )
+            columns = {c for (c,) in cursor.fetchall()}
+            indexes = {
+                f"{table_name}_{suffix}": (method, index_columns)
+                for suffix, (method, index_columns) in LOG_TABLE_INDEXES.items()
+                if columns.issuperset(index_columns)
+            }
+            missing = set(indexes) - _index_names(cursor, table_schema, table_name)
+            if missing:
+                # Concurrent loads create the indexes one at a time
+                cursor.execute(
+                    f"LOCK TABLE {qualified_name} IN SHARE ROW EXCLUSIVE MODE"
+                )
+                missing -= _index_names(cursor, table_schema, table_name)
+            for index_name, (method, index_columns) in indexes.items():
+                if index_name not in missing:
+                    continue
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} ON {qualified_name} "
+                    f"USING {method} ({', '.join(index_columns)})"
+                )
+                created.append(index_name)
+        conn.commit()
+    if created:
+        logger.info(f"Created indexes {created} on {qualified_name}")
+    return created
+
+
+def ensure_log_layout(
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+    partition_blocks: int = PARTITION_BLOCKS,
+) -> None:
+    """
+    Partition a raw log table by block number and create its indexes, if not
+    done yet. A one-off migration, loads only call `ensure_log_indexes`.
+    """
+    partition_by_block(pg_config, table_schema, table_name, partition_blocks)
+    ensure_log_indexes(pg_config, table_schema, table_name)
+
+
 def get_loaded_block(
     pg_config: PostgresConfig,
     table_schema: str,
@@ -150,16 +761,19 @@ def get_loaded_block(
           returns the contract creation block number
         - Used primarily for incremental data loading to avoid reprocessing existing data
     """
+    # Imported here, the loaders importing this module are imported by stables.data
+    from stables.data.source.etherscan import get_contract_creation_txn
+
     try:
         query = f"""
-        SELECT MAX(CAST({column_name} AS INTEGER)) 
-        FROM {table_schema}.{table_name} 
-        WHERE address = %s
+        SELECT MAX({column_name})
+        FROM {table_schema}.{table_name}
+        WHERE chainid = %s AND address = %s
         """
-        result = _fetch_one(pg_config, query, (address,))
+        result = _fetch_one(pg_config, query, (chainid, address))
 
         if result and result[0] is not None:
-            return result[0]
+            return int(result[0]) + 1
         else:
             # No data found, start from contract creation block
             creation_txn = get_contract_creation_txn(chainid, address)
@@ -172,3 +786,46 @@ def get_loaded_block(
         # Fall back to contract creation block on any error
         creation_txn = get_contract_creation_txn(chainid, address)
         return int(creation_txn["blockNumber"])
+
+
+def get_loaded_ranges(
+    pg_config: PostgresConfig,
+    table_schema: str,
+    table_name: str,
+    chainid: int,
+    address: str,
+    ranges: list[tuple[int, int]],
+) -> list[tuple[int, int]]:
+    """
+    Get the (from_block, to_block) ranges, inclusive, that already hold rows
+    of an address, e.g. before appending them again.
+
+    Returns:
+        list[tuple[int, int]]: The ranges with rows, none if the table doesn't exist
+    """
+    if not ranges:
+        return []
+    with get_postgres_connection(pg_config) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", (f"{table_schema}.{table_name}",))
+            if cursor.fetchone()[0] is None:
+                return []
+            cursor.execute(
+                f"""
+                SELECT r.from_block, r.to_block
+                FROM unnest(%s::bigint[], %s::bigint[]) AS r(from_block, to_block)
+                WHERE EXISTS (
+                    SELECT 1 FROM {table_schema}.{table_name}
+                    WHERE chainid = %s AND address = %s
+                        AND block_number BETWEEN r.from_block AND r.to_block
+                )
+                ORDER BY 1
+                """,
+                (
+                    [from_block for from_block, _ in ranges],
+                    [to_block for _, to_block in ranges],
+                    chainid,
+                    address,
+                ),
+            )
+            return [tuple(row) for row in cursor.fetchall()]
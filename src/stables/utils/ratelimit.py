@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, bucket is then per process
+    fcntl = None
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by threads and, through a state file, by
+    worker processes on the same host.
+
+    Tokens refill at `rate` per second up to `capacity`, which is the burst
+    size. `pause` stops every consumer of the bucket for a while, which is how
+    callers back off after a rate-limit response.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        state_path: Optional[str] = None,
+    ):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.state_path = state_path if fcntl is not None else None
+        self._lock = threading.Lock()
+        self._state = {
+            "tokens": self.capacity,
+            "updated_at": time.time(),
+            "paused_until": 0.0,
+        }
+        # Per-process counters, guarded by _lock
+        self.acquired = 0
+        self.wait_seconds = 0.0
+        self.pauses = 0
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @contextmanager
+    def _locked_state(self):
+        """Yields the bucket state, locked for threads and (with a state file) processes."""
+        with self._lock:
+            if self.state_path is None:
+                yield self._state
+                return
+
+            fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, "r+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    content = f.read()
+                    state = json.loads(content) if content else dict(self._state)
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _try_take(self, tokens: float) -> float:
+        """Takes tokens if available; otherwise returns the seconds to wait."""
+        now = time.time()
+        with self._locked_state() as state:
+            elapsed = max(0.0, now - state["updated_at"])
+            state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.rate)
+            state["updated_at"] = now
+            if now < state["paused_until"]:
+                return state["paused_until"] - now
+            if state["tokens"] >= tokens:
+                state["tokens"] -= tokens
+                return 0.0
+            return (tokens - state["tokens"]) / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Blocks until `tokens` are available and returns the seconds waited."""
+        waited = 0.0
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                break
+            logger.debug(f"Rate limiting: sleeping for {wait:.3f}s")
+            time.sleep(wait)
+            waited += wait
+
+        with self._lock:
+            self.acquired += 1
+            self.wait_seconds += waited
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Stops all consumers of the bucket for `seconds` and drains it."""
+        until = time.time() + seconds
+        with self._locked_state() as state:
+            state["paused_until"] = max(state["paused_until"], until)
+            state["tokens"] = 0.0
+            self.pauses += 1
+        logger.warning(f"Rate limit hit, pausing all requests for {seconds:.1f}s")
+
+    def stats(self) -> dict:
+        """Returns this process's acquire count, time spent waiting and pauses."""
+        with self._lock:
+            return {
+                "acquired": self.acquired,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "pauses": self.pauses,
+            }
+
+
+def default_state_path(name: str) -> str:
+    """Path of the shared state file for a named bucket."""
+    return os.path.join(tempfile.gettempdir(), f"stables_ratelimit_{name}.json")